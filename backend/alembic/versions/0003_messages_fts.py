@@ -0,0 +1,33 @@
+"""messages full-text search index
+
+Revision ID: 0003_messages_fts
+Revises: 0002_create_schema
+Create Date: 2024-01-01 00:00:02.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0003_messages_fts"
+down_revision: Union[str, None] = "0002_create_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_messages_content_fts",
+        "messages",
+        [sa.text("to_tsvector('simple'::regconfig, content)")],
+        postgresql_using="gin",
+    )
+    op.create_index("ix_messages_thread_id_created_at", "messages", ["thread_id", "created_at"])
+    op.create_index("ix_threads_project_id", "threads", ["project_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_threads_project_id", table_name="threads")
+    op.drop_index("ix_messages_thread_id_created_at", table_name="messages")
+    op.drop_index("ix_messages_content_fts", table_name="messages")
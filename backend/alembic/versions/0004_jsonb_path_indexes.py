@@ -0,0 +1,38 @@
+"""jsonb containment indexes
+
+Revision ID: 0004_jsonb_path_indexes
+Revises: 0003_messages_fts
+Create Date: 2024-01-01 00:00:03.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0004_jsonb_path_indexes"
+down_revision: Union[str, None] = "0003_messages_fts"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ("ix_messages_meta_gin", "messages", "meta"),
+    ("ix_threads_tags_gin", "threads", "tags"),
+    ("ix_actions_payload_gin", "actions", "payload"),
+    ("ix_artifacts_metadata_gin", "artifacts", "metadata"),
+)
+
+
+def upgrade() -> None:
+    for name, table, column in INDEXES:
+        op.create_index(
+            name,
+            table,
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "jsonb_path_ops"},
+        )
+
+
+def downgrade() -> None:
+    for name, table, _column in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,124 @@
+"""range-partition audit by created_at
+
+Revision ID: 0005_audit_partitioning
+Revises: 0004_jsonb_path_indexes
+Create Date: 2024-01-01 00:00:04.000000
+"""
+
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0005_audit_partitioning"
+down_revision: Union[str, None] = "0004_jsonb_path_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+# Rows copied per statement, so a large audit table is not moved in one huge INSERT.
+COPY_BATCH_SIZE = 10_000
+AUDIT_COLUMNS = "id, project_id, thread_id, action_id, actor, event_type, payload, created_at"
+
+
+def _add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partition(month: date) -> None:
+    upper = _add_months(month, 1)
+    op.execute(
+        f"CREATE TABLE audit_p{month:%Y_%m} PARTITION OF audit "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+    )
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE audit RENAME TO audit_legacy")
+    op.execute("ALTER TABLE audit_legacy RENAME CONSTRAINT audit_pkey TO audit_legacy_pkey")
+
+    op.execute(
+        """
+        CREATE TABLE audit (
+            id uuid NOT NULL,
+            project_id uuid REFERENCES projects (id),
+            thread_id uuid REFERENCES threads (id),
+            action_id uuid REFERENCES actions (id),
+            actor varchar(255) NOT NULL,
+            event_type varchar(255) NOT NULL,
+            payload jsonb NOT NULL DEFAULT '{}'::jsonb,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            CONSTRAINT audit_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.create_index("ix_audit_project_id_created_at", "audit", ["project_id", "created_at"])
+    op.create_index("ix_audit_thread_id_created_at", "audit", ["thread_id", "created_at"])
+    op.create_index("ix_audit_action_id_created_at", "audit", ["action_id", "created_at"])
+    op.create_index("ix_audit_created_at", "audit", ["created_at"])
+
+    oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM audit_legacy")).scalar()
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    month = min(oldest.date().replace(day=1), current) if oldest else current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        _create_partition(month)
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE audit_default PARTITION OF audit DEFAULT")
+
+    _copy_legacy_rows()
+    op.drop_table("audit_legacy")
+
+
+def _copy_legacy_rows() -> None:
+    bind = op.get_bind()
+    copy_batch = sa.text(
+        "WITH batch AS ("
+        "  SELECT id, project_id, thread_id, action_id, actor, event_type, payload, "
+        "  COALESCE(created_at, now()) AS created_at FROM audit_legacy "
+        "  WHERE CAST(:after AS uuid) IS NULL OR id > :after ORDER BY id LIMIT :limit"
+        "), copied AS ("
+        f"  INSERT INTO audit ({AUDIT_COLUMNS}) SELECT {AUDIT_COLUMNS} FROM batch"
+        ") SELECT id FROM batch ORDER BY id DESC LIMIT 1"
+    )
+    after = None
+    while True:
+        after = bind.execute(copy_batch, {"after": after, "limit": COPY_BATCH_SIZE}).scalar()
+        if after is None:
+            return
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE audit RENAME TO audit_partitioned")
+    op.execute("ALTER TABLE audit_partitioned RENAME CONSTRAINT audit_pkey TO audit_partitioned_pkey")
+
+    op.create_table(
+        "audit",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "project_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("projects.id"),
+            nullable=True,
+        ),
+        sa.Column(
+            "thread_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("threads.id"),
+            nullable=True,
+        ),
+        sa.Column(
+            "action_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("actions.id"),
+            nullable=True,
+        ),
+        sa.Column("actor", sa.String(length=255), nullable=False),
+        sa.Column("event_type", sa.String(length=255), nullable=False),
+        sa.Column("payload", postgresql.JSONB, nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+    )
+    op.execute(f"INSERT INTO audit ({AUDIT_COLUMNS}) SELECT {AUDIT_COLUMNS} FROM audit_partitioned")
+    op.execute("DROP TABLE audit_partitioned CASCADE")
@@ -0,0 +1,53 @@
+"""archive segments for cold messages and audit rows
+
+Revision ID: 0006_archive_segments
+Revises: 0005_audit_partitioning
+Create Date: 2024-01-01 00:00:05.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0006_archive_segments"
+down_revision: Union[str, None] = "0005_audit_partitioning"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "archive_segments",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "project_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("projects.id"),
+            nullable=False,
+        ),
+        sa.Column(
+            "thread_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("threads.id"),
+            nullable=True,
+        ),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("storage_path", sa.String(length=512), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column("min_created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("max_created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+        sa.CheckConstraint("kind IN ('messages', 'audit')", name="ck_archive_segments_kind"),
+    )
+    op.create_index(
+        "ix_archive_segments_project_id_kind", "archive_segments", ["project_id", "kind"]
+    )
+    op.create_index("ix_archive_segments_thread_id", "archive_segments", ["thread_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_archive_segments_thread_id", table_name="archive_segments")
+    op.drop_index("ix_archive_segments_project_id_kind", table_name="archive_segments")
+    op.drop_table("archive_segments")
@@ -0,0 +1,36 @@
+"""project shard directory
+
+Revision ID: 0007_project_shards
+Revises: 0006_archive_segments
+Create Date: 2024-01-01 00:00:06.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0007_project_shards"
+down_revision: Union[str, None] = "0006_archive_segments"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Only the directory database (the default shard) stores rows; the table exists
+    # everywhere so that every shard runs the same migrations.
+    op.create_table(
+        "project_shards",
+        sa.Column("project_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("shard", sa.String(length=64), nullable=False),
+        sa.Column("state", sa.String(length=16), nullable=False, server_default="active"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()")),
+        sa.CheckConstraint("state IN ('active', 'moving')", name="ck_project_shards_state"),
+    )
+    op.create_index("ix_project_shards_shard", "project_shards", ["shard"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_project_shards_shard", table_name="project_shards")
+    op.drop_table("project_shards")
@@ -0,0 +1,44 @@
+"""action retries and dead letters
+
+Revision ID: 0008_action_retries
+Revises: 0007_project_shards
+Create Date: 2024-01-01 00:00:07.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0008_action_retries"
+down_revision: Union[str, None] = "0007_project_shards"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OLD_STATUSES = "'DRAFT', 'APPROVED', 'EXECUTING', 'DONE', 'FAILED', 'CANCELED'"
+NEW_STATUSES = OLD_STATUSES + ", 'RETRYING', 'DEAD_LETTER'"
+
+
+def upgrade() -> None:
+    op.add_column(
+        "actions", sa.Column("attempts", sa.Integer(), nullable=False, server_default="0")
+    )
+    op.add_column("actions", sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=True))
+    op.drop_constraint("ck_actions_status", "actions", type_="check")
+    op.create_check_constraint("ck_actions_status", "actions", f"status IN ({NEW_STATUSES})")
+    # The retry scheduler only ever looks at due RETRYING actions.
+    op.create_index(
+        "ix_actions_retry_due",
+        "actions",
+        ["next_attempt_at"],
+        postgresql_where=sa.text("status = 'RETRYING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_actions_retry_due", table_name="actions")
+    op.execute("UPDATE actions SET status = 'FAILED' WHERE status IN ('RETRYING', 'DEAD_LETTER')")
+    op.drop_constraint("ck_actions_status", "actions", type_="check")
+    op.create_check_constraint("ck_actions_status", "actions", f"status IN ({OLD_STATUSES})")
+    op.drop_column("actions", "next_attempt_at")
+    op.drop_column("actions", "attempts")
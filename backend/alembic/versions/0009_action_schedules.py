@@ -0,0 +1,35 @@
+"""delayed and recurring actions
+
+Revision ID: 0009_action_schedules
+Revises: 0008_action_retries
+Create Date: 2024-01-01 00:00:08.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0009_action_schedules"
+down_revision: Union[str, None] = "0008_action_retries"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("actions", sa.Column("run_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("actions", sa.Column("schedule", sa.String(length=128), nullable=True))
+    # Only scheduled actions are indexed, so the scheduler's range scan over due
+    # APPROVED actions stays small next to the bulk of unscheduled ones.
+    op.create_index(
+        "ix_actions_status_run_at",
+        "actions",
+        ["status", "run_at"],
+        postgresql_where=sa.text("run_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_actions_status_run_at", table_name="actions")
+    op.drop_column("actions", "schedule")
+    op.drop_column("actions", "run_at")
@@ -0,0 +1,43 @@
+"""action dependency graph
+
+Revision ID: 0010_action_dependencies
+Revises: 0009_action_schedules
+Create Date: 2024-01-01 00:00:09.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0010_action_dependencies"
+down_revision: Union[str, None] = "0009_action_schedules"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "action_dependencies",
+        sa.Column(
+            "action_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("actions.id"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "depends_on_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("actions.id"),
+            primary_key=True,
+        ),
+        sa.CheckConstraint("action_id <> depends_on_id", name="ck_action_dependencies_not_self"),
+    )
+    # Failure and cancellation propagate from an action to its dependents.
+    op.create_index("ix_action_dependencies_depends_on_id", "action_dependencies", ["depends_on_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_action_dependencies_depends_on_id", table_name="action_dependencies")
+    op.drop_table("action_dependencies")
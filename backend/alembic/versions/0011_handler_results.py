@@ -0,0 +1,35 @@
+"""shared cache of deterministic handler results
+
+Revision ID: 0011_handler_results
+Revises: 0010_action_dependencies
+Create Date: 2024-01-01 00:00:10.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "0011_handler_results"
+down_revision: Union[str, None] = "0010_action_dependencies"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A cache: no WAL needed, losing it on a crash only costs recomputation.
+    op.create_table(
+        "handler_results",
+        sa.Column("key", sa.String(length=64), primary_key=True),
+        sa.Column("action_type", sa.String(length=255), nullable=False),
+        sa.Column("result", postgresql.JSONB(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        prefixes=["UNLOGGED"],
+    )
+    op.create_index("ix_handler_results_expires_at", "handler_results", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_handler_results_expires_at", table_name="handler_results")
+    op.drop_table("handler_results")
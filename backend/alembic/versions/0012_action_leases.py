@@ -0,0 +1,35 @@
+"""leases on executing actions
+
+Revision ID: 0012_action_leases
+Revises: 0011_handler_results
+Create Date: 2024-01-01 00:00:11.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0012_action_leases"
+down_revision: Union[str, None] = "0011_handler_results"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("actions", sa.Column("lease_owner", sa.String(length=255), nullable=True))
+    op.add_column(
+        "actions", sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.create_index(
+        "ix_actions_lease_expiry",
+        "actions",
+        ["lease_expires_at"],
+        postgresql_where=sa.text("status = 'EXECUTING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_actions_lease_expiry", table_name="actions")
+    op.drop_column("actions", "lease_expires_at")
+    op.drop_column("actions", "lease_owner")
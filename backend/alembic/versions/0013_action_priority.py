@@ -0,0 +1,27 @@
+"""action priority
+
+Revision ID: 0013_action_priority
+Revises: 0012_action_leases
+Create Date: 2024-01-01 00:00:12.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0013_action_priority"
+down_revision: Union[str, None] = "0012_action_leases"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "actions",
+        sa.Column("priority", sa.SmallInteger(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("actions", "priority")
@@ -0,0 +1,33 @@
+"""jsonb key-existence indexes
+
+Revision ID: 0014_jsonb_key_indexes
+Revises: 0013_action_priority
+Create Date: 2024-01-01 00:00:13.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0014_jsonb_key_indexes"
+down_revision: Union[str, None] = "0013_action_priority"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# jsonb_path_ops (0004) only indexes values, so ``?&`` key filters need jsonb_ops.
+INDEXES = (
+    ("ix_messages_meta_keys_gin", "messages", "meta"),
+    ("ix_threads_tags_keys_gin", "threads", "tags"),
+    ("ix_actions_payload_keys_gin", "actions", "payload"),
+    ("ix_artifacts_metadata_keys_gin", "artifacts", "metadata"),
+)
+
+
+def upgrade() -> None:
+    for name, table, column in INDEXES:
+        op.create_index(name, table, [column], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    for name, table, _column in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,31 @@
+"""pending actions by thread
+
+Revision ID: 0015_action_pending_by_thread
+Revises: 0014_jsonb_key_indexes
+Create Date: 2024-01-01 00:00:14.000000
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0015_action_pending_by_thread"
+down_revision: Union[str, None] = "0014_jsonb_key_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Claimers read the due actions of one project at a time (see
+    # app.services.fair_share), through its threads.
+    op.create_index(
+        "ix_actions_thread_pending",
+        "actions",
+        ["thread_id"],
+        postgresql_where=sa.text("status IN ('APPROVED', 'RETRYING')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_actions_thread_pending", table_name="actions")
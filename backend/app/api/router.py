@@ -1,8 +1,10 @@
 from fastapi import APIRouter
 
 from app.api.health import router as health_router
+from app.api.metrics import router as metrics_router
 from app.api.v1.router import router as v1_router
 
 api_router = APIRouter()
 api_router.include_router(health_router)
+api_router.include_router(metrics_router)
 api_router.include_router(v1_router, prefix="/v1")
@@ -0,0 +1,86 @@
+"""Fast path for list endpoints.
+
+List endpoints select plain column tuples instead of ORM entities and serialize them
+straight to JSON bytes with a pydantic-core serializer built once per response
+schema. Returning a ``Response`` skips FastAPI's second validation pass through
+``response_model``, which stays on the route for the OpenAPI schema only.
+"""
+
+import time
+from functools import lru_cache
+from typing import Any, Iterable, Mapping
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.elements import ColumnElement
+from typing_extensions import TypedDict
+
+from app.core.metrics import record_serialization
+
+JSON_MEDIA_TYPE = "application/json"
+# Projections come from the client's ``fields=``; parse_fields normalizes them to
+# model order, but every subset of a model is still a distinct key.
+ROW_ADAPTER_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=ROW_ADAPTER_CACHE_SIZE)
+def row_adapter(model: type[BaseModel], fields: tuple[str, ...] | None = None) -> TypeAdapter:
+    """``TypeAdapter`` for a list of dict rows shaped like ``model`` (or a subset).
+
+    ``fields`` must be a projection from :func:`app.api.v1.filters.parse_fields`.
+    """
+    names = fields or tuple(model.model_fields)
+    row_type = TypedDict(  # type: ignore[misc]
+        f"{model.__name__}Row",
+        {name: model.model_fields[name].annotation for name in names},
+    )
+    return TypeAdapter(list[row_type])
+
+
+def select_columns(
+    model: type[BaseModel],
+    entity: type,
+    fields: tuple[str, ...] | None = None,
+    **overrides: ColumnElement | InstrumentedAttribute,
+) -> list[ColumnElement]:
+    """Columns of ``entity`` labelled with the field names of ``model``.
+
+    Fields whose column is named differently (or is computed) are passed as overrides.
+    ``fields`` narrows the selection to a projection of the model.
+    """
+    columns = []
+    for name in fields or model.model_fields:
+        column = overrides.get(name)
+        if column is None:
+            column = getattr(entity, name)
+        columns.append(column.label(name))
+    return columns
+
+
+def coerce_rows(
+    model: type[BaseModel],
+    rows: Iterable[Mapping[str, Any]],
+    fields: tuple[str, ...] | None = None,
+) -> list[dict[str, Any]]:
+    """Validate rows that did not come from the database (e.g. archive files)."""
+    return row_adapter(model, fields).validate_python([dict(row) for row in rows])
+
+
+def rows_response(
+    model: type[BaseModel],
+    rows: Iterable[Any],
+    fields: tuple[str, ...] | None = None,
+    *,
+    status_code: int = 200,
+) -> Response:
+    """Serialize result rows (``Row`` or dict) as a JSON array of ``model``."""
+    started = time.perf_counter()
+    payload = [row if isinstance(row, dict) else row._asdict() for row in rows]
+    content = row_adapter(model, fields).dump_json(payload)
+    record_serialization(time.perf_counter() - started)
+    return Response(
+        content=content,
+        status_code=status_code,
+        media_type=JSON_MEDIA_TYPE,
+    )
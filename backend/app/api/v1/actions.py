@@ -1,13 +1,32 @@
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse, JSONResponse
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.api.serialization import rows_response, select_columns
+from app.api.v1.filters import (
+    fields_query,
+    parse_containment_filter,
+    parse_fields,
+    parse_key_filter,
+)
+from app.db.jsonb import has_keys
 from app.db.models import Action, Thread
-from app.db.session import get_db_session
-from app.schemas.actions import ActionApproveRequest, ActionCreate, ActionResponse
+from app.db.query_budget import query_budget
+from app.db.session import get_db_session, get_unit_of_work, mark_read_primary
+from app.schemas.actions import (
+    ActionApproveRequest,
+    ActionCreate,
+    ActionResponse,
+    PlanResponse,
+)
 from app.services import actions as actions_service
+from app.services import artifacts as artifact_service
+from app.services import plans as plans_service
+from app.services import result_offload
 
 router = APIRouter(tags=["actions"])
 
@@ -17,11 +36,13 @@ router = APIRouter(tags=["actions"])
     response_model=ActionResponse,
     status_code=status.HTTP_201_CREATED,
 )
+# Two more than without depends_on: the dependency check and the edge insert.
+@query_budget(6)
 def create_action(
     thread_id: UUID,
     payload: ActionCreate,
     response: Response,
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_unit_of_work),
 ) -> ActionResponse:
     thread = db.get(Thread, thread_id)
     if not thread:
@@ -33,41 +54,81 @@ def create_action(
         policy_mode=payload.policy_mode,
         payload=payload.payload,
         idempotency_key=payload.idempotency_key,
+        run_at=payload.run_at,
+        schedule=payload.schedule,
+        depends_on=payload.depends_on,
+        priority=payload.priority,
     )
     response.status_code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
-    db.commit()
-    db.refresh(action)
+    db.flush()
     return ActionResponse.model_validate(action)
 
 
 @router.get("/threads/{thread_id}/actions", response_model=list[ActionResponse])
+@query_budget(2)
 def list_actions(
-    thread_id: UUID, db: Session = Depends(get_db_session)
-) -> list[ActionResponse]:
+    thread_id: UUID,
+    payload: str | None = None,
+    payload_has: str | None = None,
+    fields: str | None = fields_query(),
+    db: Session = Depends(get_db_session),
+) -> Response:
+    payload_filter = parse_containment_filter(payload, "payload")
+    payload_keys = parse_key_filter(payload_has, "payload")
+    projection = parse_fields(fields, ActionResponse)
     thread = db.get(Thread, thread_id)
     if not thread:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
-    actions = (
-        db.execute(select(Action).where(Action.thread_id == thread_id).order_by(Action.created_at))
-        .scalars()
-        .all()
+    q = (
+        select(*select_columns(ActionResponse, Action, projection))
+        .where(Action.thread_id == thread_id)
+        .order_by(Action.created_at)
     )
-    return [ActionResponse.model_validate(action) for action in actions]
+    if payload_filter is not None:
+        q = q.where(Action.payload.contains(payload_filter))
+    if payload_keys is not None:
+        q = q.where(has_keys(Action.payload, payload_keys))
+    return rows_response(ActionResponse, db.execute(q).all(), projection)
 
 
 @router.get("/actions/{action_id}", response_model=ActionResponse)
-def get_action(action_id: UUID, db: Session = Depends(get_db_session)) -> ActionResponse:
+# One more to look up the artifact of an offloaded result.
+@query_budget(2)
+def get_action(
+    action_id: UUID,
+    result: Literal["inline", "stream"] | None = Query(
+        None,
+        description="For a result offloaded to an artifact: return it inline in the "
+        "action, or stream just the result as JSON.",
+    ),
+    db: Session = Depends(get_db_session),
+) -> Response | ActionResponse:
     action = db.get(Action, action_id)
     if not action:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Action not found")
-    return ActionResponse.model_validate(action)
+    artifact_id = result_offload.offloaded_artifact_id(action.result) if result else None
+    if artifact_id is None:
+        if result == "stream":
+            return JSONResponse(action.result)
+        return ActionResponse.model_validate(action)
+    artifact = artifact_service.get_artifact(db, artifact_id)
+    if artifact is None or artifact.action_id != action.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Result artifact not found")
+    file_path = artifact_service.get_artifact_file_path(artifact)
+    if not file_path.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Result artifact file not found")
+    if result == "stream":
+        return FileResponse(path=file_path, media_type=result_offload.RESULT_ARTIFACT_TYPE)
+    response = ActionResponse.model_validate(action)
+    return response.model_copy(update={"result": result_offload.load_result(artifact)})
 
 
 @router.post("/actions/{action_id}/approve", response_model=ActionResponse)
+@query_budget(4)
 def approve_action(
     action_id: UUID,
     payload: ActionApproveRequest,
-    db: Session = Depends(get_db_session),
+    db: Session = Depends(get_unit_of_work),
 ) -> ActionResponse:
     action = db.get(Action, action_id)
     if not action:
@@ -81,27 +142,66 @@ def approve_action(
         )
 
     action = actions_service.approve_action(db, action=action, approved_by=payload.approved_by)
-    db.commit()
-    db.refresh(action)
+    db.flush()
     return ActionResponse.model_validate(action)
 
 @router.post("/actions/{action_id}/execute", response_model=ActionResponse)
-def execute_action(action_id: UUID, db: Session = Depends(get_db_session)) -> ActionResponse:
+def execute_action(
+    action_id: UUID, response: Response, db: Session = Depends(get_db_session)
+) -> ActionResponse:
+    """Run the action's handler now.
+
+    The attempt commits ``EXECUTING`` and its lease before the handler runs and the
+    outcome after it, so this route does not use a unit of work.
+    """
+    mark_read_primary(response)
     action = db.get(Action, action_id)
     if not action:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Action not found")
+    if actions_service.unfinished_dependencies(db, action_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Action has dependencies that are not DONE yet.",
+        )
     action = actions_service.execute_action(db, action=action)
-    db.commit()
-    db.refresh(action)
     return ActionResponse.model_validate(action)
 
 
 @router.post("/actions/{action_id}/cancel", response_model=ActionResponse)
-def cancel_action(action_id: UUID, db: Session = Depends(get_db_session)) -> ActionResponse:
+@query_budget(4)
+def cancel_action(action_id: UUID, db: Session = Depends(get_unit_of_work)) -> ActionResponse:
     action = db.get(Action, action_id)
     if not action:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Action not found")
     action = actions_service.cancel_action(db, action=action)
-    db.commit()
-    db.refresh(action)
+    db.flush()
     return ActionResponse.model_validate(action)
+
+
+@router.get("/threads/{thread_id}/plan", response_model=PlanResponse)
+@query_budget(3)
+def get_plan(thread_id: UUID, db: Session = Depends(get_db_session)) -> PlanResponse:
+    if not db.get(Thread, thread_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
+    return PlanResponse.model_validate(plans_service.describe_plan(db, thread_id))
+
+
+@router.post("/threads/{thread_id}/plan/execute", response_model=PlanResponse)
+# The thread, the project settings, the graph and describe_plan (two each); the
+# actions run in sessions of their own.
+@query_budget(6)
+def execute_plan(
+    thread_id: UUID,
+    max_parallel: int | None = Query(None, ge=1),
+    db: Session = Depends(get_db_session),
+) -> PlanResponse:
+    """Run every ready action of the thread, independent branches in parallel.
+
+    Each action commits on its own, so this route does not use a unit of work, and
+    the request's transaction is ended before the first action starts.
+    """
+    if not db.get(Thread, thread_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
+    limit = plans_service.plan_max_parallel()
+    plan = plans_service.run_plan(db, thread_id, max_parallel=min(max_parallel or limit, limit))
+    return PlanResponse.model_validate(plan)
@@ -1,18 +1,58 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.responses import FileResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db_session
+from app.api.serialization import rows_response, select_columns
+from app.api.v1.filters import (
+    fields_query,
+    parse_containment_filter,
+    parse_fields,
+    parse_key_filter,
+    require_project_scope,
+)
+from app.db import sharding
+from app.db.models import Artifact
+from app.db.query_budget import query_budget
+from app.db.session import get_read_db_session, get_unit_of_work, project_moving
 from app.schemas.artifacts import ArtifactCreate, ArtifactResponse
 from app.services import artifacts as artifact_service
 
 router = APIRouter(prefix="/artifacts", tags=["artifacts"])
 
+LIST_COLUMN_OVERRIDES = {
+    "metadata": Artifact.metadata_,
+    "download_url": func.concat("/v1/artifacts/", Artifact.id, "/download"),
+}
+
+
+def _to_response(artifact: Artifact) -> ArtifactResponse:
+    return ArtifactResponse(
+        id=artifact.id,
+        project_id=artifact.project_id,
+        thread_id=artifact.thread_id,
+        action_id=artifact.action_id,
+        type=artifact.type,
+        storage_path=artifact.storage_path,
+        filename=artifact.filename,
+        metadata=artifact.metadata_,
+        version=artifact.version,
+        created_at=artifact.created_at,
+        download_url=artifact_service.download_url(artifact.id),
+    )
+
 
 @router.post("", response_model=ArtifactResponse, status_code=status.HTTP_201_CREATED)
-def create_artifact(payload: ArtifactCreate, db: Session = Depends(get_db_session)) -> ArtifactResponse:
+@query_budget(4)
+def create_artifact(
+    payload: ArtifactCreate, db: Session = Depends(get_unit_of_work)
+) -> ArtifactResponse:
+    try:
+        sharding.bind_to_project(db, payload.project_id)
+    except sharding.ProjectMovingError as exc:
+        raise project_moving(exc) from exc
     try:
         artifact = artifact_service.create_artifact(db, payload)
     except LookupError as exc:
@@ -20,82 +60,53 @@ def create_artifact(payload: ArtifactCreate, db: Session = Depends(get_db_sessio
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-    return ArtifactResponse.model_validate(
-        {
-            "id": artifact.id,
-            "project_id": artifact.project_id,
-            "thread_id": artifact.thread_id,
-            "action_id": artifact.action_id,
-            "type": artifact.type,
-            "storage_path": artifact.storage_path,
-            "filename": artifact.filename,
-            "metadata": artifact.metadata_,
-            "version": artifact.version,
-            "created_at": artifact.created_at,
-            "download_url": f"/v1/artifacts/{artifact.id}/download",
-        }
-    )
+    return _to_response(artifact)
 
 
 @router.get("", response_model=list[ArtifactResponse])
+@query_budget(1)
 def list_artifacts(
     project_id: UUID | None = None,
     thread_id: UUID | None = None,
     action_id: UUID | None = None,
+    metadata: str | None = None,
+    metadata_has: str | None = None,
     limit: int = 100,
-    db: Session = Depends(get_db_session),
-) -> list[ArtifactResponse]:
-    rows = artifact_service.list_artifacts(
-        db, project_id=project_id, thread_id=thread_id, action_id=action_id, limit=limit
+    fields: str | None = fields_query(),
+    db: Session = Depends(get_read_db_session),
+) -> Response:
+    require_project_scope(project_id, thread_id, action_id)
+    projection = parse_fields(fields, ArtifactResponse)
+    rows = artifact_service.list_artifact_rows(
+        db,
+        select_columns(ArtifactResponse, Artifact, projection, **LIST_COLUMN_OVERRIDES),
+        project_id=project_id,
+        thread_id=thread_id,
+        action_id=action_id,
+        metadata=parse_containment_filter(metadata, "metadata"),
+        metadata_has=parse_key_filter(metadata_has, "metadata"),
+        limit=limit,
     )
-
-    out: list[ArtifactResponse] = []
-    for a in rows:
-        out.append(
-            ArtifactResponse.model_validate(
-                {
-                    "id": a.id,
-                    "project_id": a.project_id,
-                    "thread_id": a.thread_id,
-                    "action_id": a.action_id,
-                    "type": a.type,
-                    "storage_path": a.storage_path,
-                    "filename": a.filename,
-                    "metadata": a.metadata_,
-                    "version": a.version,
-                    "created_at": a.created_at,
-                    "download_url": f"/v1/artifacts/{a.id}/download",
-                }
-            )
-        )
-    return out
+    return rows_response(ArtifactResponse, rows, projection)
 
 
 @router.get("/{artifact_id}", response_model=ArtifactResponse)
-def get_artifact(artifact_id: UUID, db: Session = Depends(get_db_session)) -> ArtifactResponse:
+@query_budget(1)
+def get_artifact(
+    artifact_id: UUID, db: Session = Depends(get_read_db_session)
+) -> ArtifactResponse:
     a = artifact_service.get_artifact(db, artifact_id)
     if not a:
         raise HTTPException(status_code=404, detail="Artifact not found")
 
-    return ArtifactResponse.model_validate(
-        {
-            "id": a.id,
-            "project_id": a.project_id,
-            "thread_id": a.thread_id,
-            "action_id": a.action_id,
-            "type": a.type,
-            "storage_path": a.storage_path,
-            "filename": a.filename,
-            "metadata": a.metadata_,
-            "version": a.version,
-            "created_at": a.created_at,
-            "download_url": f"/v1/artifacts/{a.id}/download",
-        }
-    )
+    return _to_response(a)
 
 
 @router.get("/{artifact_id}/download")
-def download_artifact(artifact_id: UUID, db: Session = Depends(get_db_session)) -> FileResponse:
+@query_budget(1)
+def download_artifact(
+    artifact_id: UUID, db: Session = Depends(get_read_db_session)
+) -> FileResponse:
     artifact = artifact_service.get_artifact(db, artifact_id)
     if not artifact:
         raise HTTPException(status_code=404, detail="Artifact not found")
@@ -1,25 +1,34 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from app.api.serialization import coerce_rows, rows_response, select_columns
+from app.api.v1.filters import fields_query, parse_fields, require_project_scope
 from app.db.models import Audit
-from app.db.session import get_db_session
+from app.db.query_budget import query_budget
+from app.db.session import get_read_db_session
 from app.schemas.audit import AuditResponse
+from app.services import archive as archive_service
 
 router = APIRouter(prefix="/audit", tags=["audit"])
 
 
 @router.get("", response_model=list[AuditResponse])
+@query_budget(3)
 def list_audit(
     project_id: UUID | None = None,
     thread_id: UUID | None = None,
     action_id: UUID | None = None,
     limit: int = 100,
-    db: Session = Depends(get_db_session),
-) -> list[AuditResponse]:
-    q = select(Audit).order_by(Audit.created_at.desc()).limit(limit)
+    offset: int = Query(0, ge=0),
+    fields: str | None = fields_query(),
+    db: Session = Depends(get_read_db_session),
+) -> Response:
+    require_project_scope(project_id, thread_id, action_id)
+    projection = parse_fields(fields, AuditResponse)
+    q = select(*select_columns(AuditResponse, Audit, projection)).order_by(Audit.created_at.desc())
 
     if project_id:
         q = q.where(Audit.project_id == project_id)
@@ -28,5 +37,22 @@ def list_audit(
     if action_id:
         q = q.where(Audit.action_id == action_id)
 
-    rows = db.execute(q).scalars().all()
-    return [AuditResponse.model_validate(r) for r in rows]
+    rows: list = list(db.execute(q.offset(offset).limit(limit)).all())
+
+    # Archived audit rows are per project and older than its hot rows.
+    if project_id and len(rows) < limit:
+        hot_total = offset + len(rows)
+        if not rows:
+            hot_total = db.execute(
+                select(func.count()).select_from(q.order_by(None).subquery())
+            ).scalar_one()
+        archived = archive_service.read_archived_audit(
+            db,
+            project_id,
+            offset=max(0, offset - hot_total),
+            limit=limit - len(rows),
+            thread_id=thread_id,
+            action_id=action_id,
+        )
+        rows.extend(coerce_rows(AuditResponse, archived, projection))
+    return rows_response(AuditResponse, rows, projection)
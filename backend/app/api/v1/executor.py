@@ -9,4 +9,8 @@ router = APIRouter(prefix="/executor", tags=["executor"])
 @router.get("/handlers", response_model=ExecutorHandlersResponse)
 def list_executor_handlers() -> ExecutorHandlersResponse:
     handlers = executor_service.list_handlers()
-    return ExecutorHandlersResponse(handlers=handlers)
+    return ExecutorHandlersResponse(
+        handlers=handlers,
+        stats=executor_service.handler_stats(),
+        payload_schemas=executor_service.payload_schemas(),
+    )
@@ -0,0 +1,70 @@
+import json
+from typing import Any
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+
+from app.db import sharding
+
+
+def parse_containment_filter(raw: str | None, param: str) -> dict[str, Any] | None:
+    """Parse a ``?param={...}`` query value into a JSONB containment (``@>``) filter."""
+    if raw is None:
+        return None
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = None
+    if not isinstance(value, dict):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{param} must be a JSON object",
+        )
+    return value
+
+
+def parse_key_filter(raw: str | None, param: str) -> tuple[str, ...] | None:
+    """Parse a ``?param_has=a,b`` query value into top-level keys that must all be present."""
+    if raw is None:
+        return None
+    keys = tuple(dict.fromkeys(key.strip() for key in raw.split(",") if key.strip()))
+    if not keys:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{param}_has must name at least one key",
+        )
+    return keys
+
+
+def require_project_scope(*ids: Any) -> None:
+    """Reject a list that addresses no project when projects live on several shards.
+
+    Such a request is routed to the default shard and would miss every other one.
+    """
+    if sharding.sharding_enabled() and not any(ids):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="project_id, thread_id or action_id is required when projects are sharded",
+        )
+
+
+def fields_query() -> Any:
+    return Query(
+        None,
+        description="Comma-separated subset of response fields to return; id is always included.",
+    )
+
+
+def parse_fields(raw: str | None, model: type[BaseModel]) -> tuple[str, ...] | None:
+    """Parse ``?fields=a,b`` into a projection of ``model`` in declaration order."""
+    if raw is None:
+        return None
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    requested.add("id")
+    return tuple(name for name in model.model_fields if name in requested)
@@ -1,19 +1,63 @@
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
 from sqlalchemy.orm import Session
 
-from app.db.models import Message, Thread
-from app.db.session import get_db_session
-from app.schemas.messages import MessageCreate, MessageResponse
+from app.api.serialization import coerce_rows, rows_response, select_columns
+from app.api.v1.filters import (
+    fields_query,
+    parse_containment_filter,
+    parse_fields,
+    parse_key_filter,
+)
+from app.db import sharding
+from app.db.models import Message, Project, Thread
+from app.db.query_budget import query_budget
+from app.db.session import (
+    get_db_session,
+    get_read_db_session,
+    get_unit_of_work,
+    project_moving,
+)
+from app.schemas.messages import (
+    MessageBulkChunk,
+    MessageBulkResponse,
+    MessageBulkRow,
+    MessageBulkThreadRow,
+    MessageCreate,
+    MessageResponse,
+    MessageSearchHit,
+)
+from app.services import messages as messages_service
 
-router = APIRouter(prefix="/threads/{thread_id}/messages", tags=["messages"])
+logger = logging.getLogger(__name__)
 
+router = APIRouter(tags=["messages"])
 
-@router.post("", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
+BULK_DEFAULT_CHUNK_SIZE = 1000
+BULK_MAX_CHUNK_SIZE = 10000
+BULK_ATOMIC_DESCRIPTION = "Commit once at the end, so that a failing line inserts nothing."
+# Longest NDJSON line accepted; a longer one ends the request before it is buffered whole.
+BULK_MAX_LINE_BYTES = 1024 * 1024
+
+
+class LineTooLong(ValueError):
+    pass
+
+
+@router.post(
+    "/threads/{thread_id}/messages",
+    response_model=MessageResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+@query_budget(2)
 def create_message(
-    thread_id: UUID, payload: MessageCreate, db: Session = Depends(get_db_session)
+    thread_id: UUID, payload: MessageCreate, db: Session = Depends(get_unit_of_work)
 ) -> MessageResponse:
     thread = db.get(Thread, thread_id)
     if not thread:
@@ -26,21 +70,270 @@ def create_message(
         meta=payload.meta,
     )
     db.add(message)
-    db.commit()
-    db.refresh(message)
+    db.flush()
     return MessageResponse.model_validate(message)
 
 
-@router.get("", response_model=list[MessageResponse])
+@router.get("/threads/{thread_id}/messages", response_model=list[MessageResponse])
+@query_budget(4)
 def list_messages(
-    thread_id: UUID, db: Session = Depends(get_db_session)
-) -> list[MessageResponse]:
+    thread_id: UUID,
+    meta: str | None = None,
+    meta_has: str | None = None,
+    limit: int | None = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    order: Literal["asc", "desc"] = Query(
+        "asc",
+        description="desc lists the newest messages first and reads archived messages "
+        "only for pages past the ones still in the database.",
+    ),
+    fields: str | None = fields_query(),
+    db: Session = Depends(get_read_db_session),
+) -> Response:
+    meta_filter = parse_containment_filter(meta, "meta")
+    meta_keys = parse_key_filter(meta_has, "meta")
+    projection = parse_fields(fields, MessageResponse)
     thread = db.get(Thread, thread_id)
     if not thread:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
-    messages = (
-        db.execute(select(Message).where(Message.thread_id == thread_id).order_by(Message.created_at))
-        .scalars()
-        .all()
+    archived, rows = messages_service.list_thread_messages(
+        db,
+        thread_id,
+        select_columns(MessageResponse, Message, projection),
+        meta=meta_filter,
+        meta_has=meta_keys,
+        limit=limit,
+        offset=offset,
+        newest_first=order == "desc",
     )
-    return [MessageResponse.model_validate(message) for message in messages]
+    archived = coerce_rows(MessageResponse, archived, projection)
+    page = [*rows, *archived] if order == "desc" else [*archived, *rows]
+    return rows_response(MessageResponse, page, projection)
+
+
+@router.get("/projects/{project_id}/messages/search", response_model=list[MessageSearchHit])
+@query_budget(2)
+def search_messages(
+    project_id: UUID,
+    q: str = Query(..., min_length=1, max_length=512),
+    channel: Literal["web", "telegram"] | None = None,
+    role: Literal["user", "assistant", "system"] | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db_session),
+) -> list[MessageSearchHit]:
+    project = db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    hits = messages_service.search_messages(
+        db,
+        project_id=project_id,
+        query=q,
+        channel=channel,
+        role=role,
+        limit=limit,
+        offset=offset,
+    )
+    return [
+        MessageSearchHit(
+            **MessageResponse.model_validate(message).model_dump(), rank=rank, snippet=snippet
+        )
+        for message, rank, snippet in hits
+    ]
+
+
+@router.post(
+    "/threads/{thread_id}/messages:bulk",
+    response_model=MessageBulkResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def bulk_create_messages(
+    thread_id: UUID,
+    request: Request,
+    chunk_size: int = Query(BULK_DEFAULT_CHUNK_SIZE, ge=1, le=BULK_MAX_CHUNK_SIZE),
+    atomic: bool = Query(False, description=BULK_ATOMIC_DESCRIPTION),
+    db: Session = Depends(get_db_session),
+) -> MessageBulkResponse:
+    """Ingest NDJSON messages into one thread, committing every ``chunk_size`` rows.
+
+    A failing line ends the request; the error reports the rows committed before
+    it (``inserted``) and the last line they came from (``committed_through_line``),
+    so the client can resume after it. With ``atomic=true`` chunks are only
+    flushed and the request commits once, so a failure inserts nothing. A line
+    longer than ``BULK_MAX_LINE_BYTES`` fails with 413 and its line number.
+    """
+    thread = await run_in_threadpool(db.get, Thread, thread_id)
+    if not thread:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
+
+    def to_row(row: MessageBulkRow) -> dict[str, Any]:
+        return messages_service.build_message_row(thread_id, row)
+
+    return await _ingest_ndjson(
+        request, db, MessageBulkRow, to_row, chunk_size, check_threads=False, atomic=atomic
+    )
+
+
+@router.post(
+    "/messages:bulk",
+    response_model=MessageBulkResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def bulk_create_messages_multi(
+    request: Request,
+    chunk_size: int = Query(BULK_DEFAULT_CHUNK_SIZE, ge=1, le=BULK_MAX_CHUNK_SIZE),
+    atomic: bool = Query(False, description=BULK_ATOMIC_DESCRIPTION),
+    db: Session = Depends(get_db_session),
+) -> MessageBulkResponse:
+    """Ingest NDJSON messages that each carry their own ``thread_id``.
+
+    Commits and failures work as for the single-thread endpoint. With sharding the
+    request goes to the shard of its threads, which must all be on one shard.
+    """
+
+    def to_row(row: MessageBulkThreadRow) -> dict[str, Any]:
+        return messages_service.build_message_row(row.thread_id, row)
+
+    return await _ingest_ndjson(
+        request, db, MessageBulkThreadRow, to_row, chunk_size, check_threads=True, atomic=atomic
+    )
+
+
+async def _ingest_ndjson(
+    request: Request,
+    db: Session,
+    row_model: type[BaseModel],
+    to_row: Callable[[Any], dict[str, Any]],
+    chunk_size: int,
+    *,
+    check_threads: bool,
+    atomic: bool = False,
+) -> MessageBulkResponse:
+    chunks: list[MessageBulkChunk] = []
+    known_threads: set[UUID] = set()
+    pending: list[dict[str, Any]] = []
+    # Rows and the last input line that are committed; an atomic ingest commits at the end.
+    inserted = 0
+    committed_line = 0
+    flushed = 0
+    line_no = 0
+
+    def failure(**detail: Any) -> dict[str, Any]:
+        return {**detail, "inserted": inserted, "committed_through_line": committed_line}
+
+    def flush_chunk() -> int:
+        if check_threads:
+            new_threads = {row["thread_id"] for row in pending} - known_threads
+            if sharding.sharding_enabled():
+                bind_to_threads(new_threads)
+            unknown = messages_service.missing_thread_ids(db, new_threads)
+            if unknown:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=failure(
+                        message="Thread not found",
+                        thread_ids=sorted(str(thread_id) for thread_id in unknown),
+                    ),
+                )
+            known_threads.update(row["thread_id"] for row in pending)
+        count = messages_service.insert_messages(db, pending)
+        if not atomic:
+            db.commit()
+        return count
+
+    def bind_to_threads(thread_ids: set[UUID]) -> None:
+        # The path names no project; route by the threads' projects instead.
+        projects = {sharding.owning_project("thread_id", thread_id) for thread_id in thread_ids}
+        try:
+            sharding.bind_to_projects(db, projects - {None})
+        except sharding.ProjectMovingError as exc:
+            moving = project_moving(exc)
+            moving.detail = failure(message=moving.detail)
+            raise moving from exc
+        except sharding.CrossShardError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=failure(message=str(exc)),
+            ) from exc
+
+    async def commit_pending() -> None:
+        nonlocal inserted, committed_line, flushed, pending
+        started = time.perf_counter()
+        try:
+            count = await run_in_threadpool(flush_chunk)
+        except HTTPException:
+            await run_in_threadpool(db.rollback)
+            raise
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        flushed += count
+        if not atomic:
+            inserted, committed_line = flushed, line_no
+        chunks.append(MessageBulkChunk(index=len(chunks), rows=count, elapsed_ms=elapsed_ms))
+        logger.info("bulk messages chunk=%d rows=%d total=%d", len(chunks) - 1, count, flushed)
+        pending = []
+
+    lines = _iter_lines(request.stream(), BULK_MAX_LINE_BYTES)
+    while True:
+        try:
+            line = await anext(lines)
+        except StopAsyncIteration:
+            break
+        except LineTooLong as exc:
+            await run_in_threadpool(db.rollback)
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=failure(line=line_no + 1, message=str(exc)),
+            ) from exc
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            row = row_model.model_validate_json(line)
+        except ValidationError as exc:
+            await run_in_threadpool(db.rollback)
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=failure(
+                    line=line_no,
+                    errors=exc.errors(
+                        include_url=False, include_input=False, include_context=False
+                    ),
+                ),
+            ) from exc
+        pending.append(to_row(row))
+        if len(pending) >= chunk_size:
+            await commit_pending()
+
+    if pending:
+        await commit_pending()
+    if atomic:
+        await run_in_threadpool(db.commit)
+    return MessageBulkResponse(inserted=flushed, chunks=chunks)
+
+
+async def _iter_lines(
+    stream: AsyncIterator[bytes], max_line_bytes: int = BULK_MAX_LINE_BYTES
+) -> AsyncIterator[bytes]:
+    # Parts of the current line; joined once, so long lines split over many
+    # network chunks are not copied again for every chunk.
+    parts: list[bytes] = []
+    size = 0
+
+    def add(part: bytes) -> None:
+        nonlocal size
+        size += len(part)
+        if size > max_line_bytes:
+            raise LineTooLong(f"Line exceeds {max_line_bytes} bytes")
+        parts.append(part)
+
+    async for data in stream:
+        start = 0
+        while (end := data.find(b"\n", start)) != -1:
+            add(data[start:end])
+            yield b"".join(parts)
+            parts, size = [], 0
+            start = end + 1
+        if start < len(data):
+            add(data[start:])
+    if parts:
+        yield b"".join(parts)
@@ -1,34 +1,47 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.api.serialization import rows_response, select_columns
+from app.api.v1.filters import fields_query, parse_fields
 from app.db.models import Project
-from app.db.session import get_db_session
+from app.db import sharding
+from app.db.query_budget import query_budget
+from app.db.session import get_db_session, get_unit_of_work
 from app.schemas.projects import ProjectCreate, ProjectResponse
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
 
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
+# One more for the directory entry of a project placed on the default shard.
+@query_budget(2)
 def create_project(
-    payload: ProjectCreate, db: Session = Depends(get_db_session)
+    payload: ProjectCreate, db: Session = Depends(get_unit_of_work)
 ) -> ProjectResponse:
     project = Project(slug=payload.slug, name=payload.name, settings=payload.settings)
+    sharding.place_new_project(db, project)
     db.add(project)
-    db.commit()
-    db.refresh(project)
+    db.flush()
     return ProjectResponse.model_validate(project)
 
 
 @router.get("", response_model=list[ProjectResponse])
-def list_projects(db: Session = Depends(get_db_session)) -> list[ProjectResponse]:
-    projects = db.execute(select(Project).order_by(Project.created_at)).scalars().all()
-    return [ProjectResponse.model_validate(project) for project in projects]
+@query_budget(1)
+def list_projects(
+    fields: str | None = fields_query(), db: Session = Depends(get_db_session)
+) -> Response:
+    projection = parse_fields(fields, ProjectResponse)
+    q = select(*select_columns(ProjectResponse, Project, projection)).order_by(Project.created_at)
+    # Projects live on all shards; merging needs created_at in the projection.
+    key = (lambda row: row.created_at) if "created_at" in (projection or ("created_at",)) else None
+    return rows_response(ProjectResponse, sharding.execute_on_all_shards(db, q, key=key), projection)
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
+@query_budget(1)
 def get_project(project_id: UUID, db: Session = Depends(get_db_session)) -> ProjectResponse:
     project = db.get(Project, project_id)
     if not project:
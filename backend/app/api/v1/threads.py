@@ -1,40 +1,61 @@
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.api.serialization import rows_response, select_columns
+from app.api.v1.filters import (
+    fields_query,
+    parse_containment_filter,
+    parse_fields,
+    parse_key_filter,
+)
+from app.db.jsonb import has_keys
 from app.db.models import Project, Thread
-from app.db.session import get_db_session
+from app.db.query_budget import query_budget
+from app.db.session import get_read_db_session, get_unit_of_work
 from app.schemas.threads import ThreadCreate, ThreadResponse
 
 router = APIRouter(prefix="/projects/{project_id}/threads", tags=["threads"])
 
 
 @router.post("", response_model=ThreadResponse, status_code=status.HTTP_201_CREATED)
+@query_budget(2)
 def create_thread(
-    project_id: UUID, payload: ThreadCreate, db: Session = Depends(get_db_session)
+    project_id: UUID, payload: ThreadCreate, db: Session = Depends(get_unit_of_work)
 ) -> ThreadResponse:
     project = db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     thread = Thread(project_id=project_id, title=payload.title, tags=payload.tags)
     db.add(thread)
-    db.commit()
-    db.refresh(thread)
+    db.flush()
     return ThreadResponse.model_validate(thread)
 
 
 @router.get("", response_model=list[ThreadResponse])
+@query_budget(2)
 def list_threads(
-    project_id: UUID, db: Session = Depends(get_db_session)
-) -> list[ThreadResponse]:
+    project_id: UUID,
+    tags: str | None = None,
+    tags_has: str | None = None,
+    fields: str | None = fields_query(),
+    db: Session = Depends(get_read_db_session),
+) -> Response:
+    tags_filter = parse_containment_filter(tags, "tags")
+    tags_keys = parse_key_filter(tags_has, "tags")
+    projection = parse_fields(fields, ThreadResponse)
     project = db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    threads = (
-        db.execute(select(Thread).where(Thread.project_id == project_id).order_by(Thread.created_at))
-        .scalars()
-        .all()
+    q = (
+        select(*select_columns(ThreadResponse, Thread, projection))
+        .where(Thread.project_id == project_id)
+        .order_by(Thread.created_at)
     )
-    return [ThreadResponse.model_validate(thread) for thread in threads]
+    if tags_filter is not None:
+        q = q.where(Thread.tags.contains(tags_filter))
+    if tags_keys is not None:
+        q = q.where(has_keys(Thread.tags, tags_keys))
+    return rows_response(ThreadResponse, db.execute(q).all(), projection)
@@ -0,0 +1,49 @@
+"""Move old messages and audit rows of every project into cold archive segments.
+
+Projects opt in with ``settings["archive_after_days"]``. Run periodically::
+
+    python -m app.cli.archive
+"""
+
+import argparse
+
+from sqlalchemy import select
+
+from app.core import env  # noqa: F401
+from app.db import sharding
+from app.db.models import Project
+from app.services import archive as archive_service
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=archive_service.ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    for shard in sharding.shard_names():
+        session_local = sharding.get_shard_sessionmaker(shard)
+        with session_local() as db:
+            project_ids = (
+                db.execute(
+                    select(Project.id).where(Project.settings.has_key(archive_service.ARCHIVE_SETTING))
+                )
+                .scalars()
+                .all()
+            )
+
+        for project_id in project_ids:
+            with session_local() as db:
+                project = db.get(Project, project_id)
+                segments = archive_service.archive_project(db, project, batch_size=args.batch_size)
+                summary = [
+                    f"{project.slug}: archived {s.row_count} {s.kind} -> {s.storage_path}"
+                    for s in segments
+                ]
+                db.commit()
+                archive_service.remove_replaced_files(db)
+            for line in summary:
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Create upcoming audit partitions and enforce audit retention.
+
+Run periodically (e.g. daily from cron)::
+
+    python -m app.cli.audit_partitions --months-ahead 3 --retention-months 12
+"""
+
+import argparse
+
+from app.core import env  # noqa: F401
+from app.db import sharding
+from app.services import audit_partitions
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--months-ahead", type=int, default=3)
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=None,
+        help="Keep this many months of audit (including the current one); omit to keep all.",
+    )
+    parser.add_argument("--mode", choices=("drop", "detach"), default="drop")
+    args = parser.parse_args(argv)
+
+    for shard in sharding.shard_names():
+        with sharding.get_shard_sessionmaker(shard)() as db:
+            created = audit_partitions.ensure_audit_partitions(db, months_ahead=args.months_ahead)
+            removed: list[str] = []
+            if args.retention_months is not None:
+                removed = audit_partitions.apply_audit_retention(
+                    db, keep_months=args.retention_months, mode=args.mode
+                )
+            db.commit()
+
+        prefix = f"{shard}: " if sharding.sharding_enabled() else ""
+        for name in created:
+            print(f"{prefix}created {name}")
+        for name in removed:
+            print(f"{prefix}{'dropped' if args.mode == 'drop' else 'detached'} {name}")
+
+
+if __name__ == "__main__":
+    main()
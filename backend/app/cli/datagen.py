@@ -0,0 +1,282 @@
+"""Bulk-generate a production-sized synthetic dataset.
+
+Rows are streamed into Postgres with ``COPY``. ``--skew`` is the exponent of a
+Zipf-like distribution of threads over projects and of messages and actions over
+threads (0 gives a uniform spread); timestamps lean towards the recent end of
+``--days``. Artifacts get metadata rows only, no stored files::
+
+    python -m app.cli.datagen --projects 50 --threads 20000 --messages 5000000 --skew 1.1
+"""
+
+import argparse
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, Sequence
+from uuid import UUID
+
+from psycopg.types.json import Jsonb
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core import env  # noqa: F401
+from app.db.engine import get_sessionmaker
+from app.services import audit_partitions
+from app.services import messages as messages_service
+
+WORDS = (
+    "invoice deploy meeting refund schedule contract report budget travel release customer "
+    "ticket outage review payroll vendor quote shipment onboarding renewal please thanks "
+    "tomorrow urgent draft approve send update status call notes follow up the a to for with"
+).split()
+ACTION_TYPES = ("stub.echo", "artifact.store", "email.send", "calendar.create")
+ACTION_STATUSES = (
+    ("DONE", 0.55),
+    ("DRAFT", 0.2),
+    ("APPROVED", 0.1),
+    ("FAILED", 0.1),
+    ("CANCELED", 0.05),
+)
+AUDIT_EVENTS = ("action.created", "action.approved", "action.executing", "action.done")
+
+PROJECT_COLUMNS = ("id", "slug", "name", "settings", "created_at", "updated_at")
+THREAD_COLUMNS = ("id", "project_id", "title", "tags", "created_at", "updated_at")
+ACTION_COLUMNS = (
+    "id",
+    "thread_id",
+    "type",
+    "policy_mode",
+    "status",
+    "payload",
+    "result",
+    "approved_by",
+    "approved_at",
+    "idempotency_key",
+    "created_at",
+    "updated_at",
+)
+AUDIT_COLUMNS = (
+    "id",
+    "project_id",
+    "thread_id",
+    "action_id",
+    "actor",
+    "event_type",
+    "payload",
+    "created_at",
+)
+ARTIFACT_COLUMNS = (
+    "id",
+    "project_id",
+    "thread_id",
+    "action_id",
+    "type",
+    "storage_path",
+    "filename",
+    "metadata",
+    "version",
+    "created_at",
+)
+
+
+@dataclass(frozen=True)
+class DatagenConfig:
+    projects: int = 10
+    threads: int = 1000
+    messages: int = 100_000
+    actions: int = 10_000
+    audit_per_action: int = 4
+    artifacts: int = 1000
+    days: int = 365
+    skew: float = 1.1
+    seed: int = 0
+
+
+def skewed_counts(total: int, buckets: int, skew: float, rng: random.Random) -> list[int]:
+    """Split ``total`` over ``buckets`` with Zipf weights ``1 / rank ** skew`` in random order."""
+    if buckets <= 0:
+        return []
+    weights = [1 / (rank**skew) for rank in range(1, buckets + 1)]
+    rng.shuffle(weights)
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for index in sorted(range(buckets), key=weights.__getitem__, reverse=True)[: total - sum(counts)]:
+        counts[index] += 1
+    return counts
+
+
+def recent_timestamp(now: datetime, days: int, rng: random.Random) -> datetime:
+    # Squaring biases towards 0, i.e. towards ``now``.
+    return now - timedelta(seconds=days * 86400 * rng.random() ** 2)
+
+
+def sentence(rng: random.Random) -> str:
+    return " ".join(rng.choices(WORDS, k=rng.randint(4, 40)))
+
+
+def copy_rows(db: Session, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+    raw = db.connection().connection.driver_connection
+    count = 0
+    with raw.cursor() as cursor:
+        with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+                count += 1
+    return count
+
+
+def generate(db: Session, config: DatagenConfig, *, log=print) -> dict[str, int]:
+    rng = random.Random(config.seed)
+    now = datetime.now(timezone.utc)
+    run = uuid.uuid4().hex[:8]
+    counts: dict[str, int] = {}
+
+    def load(table: str, columns: Sequence[str], rows: Iterable[tuple]) -> None:
+        started = time.perf_counter()
+        counts[table] = copy_rows(db, table, columns, rows)
+        db.commit()
+        log(f"{table}: {counts[table]} rows in {time.perf_counter() - started:.1f}s")
+
+    project_ids = [uuid.uuid4() for _ in range(config.projects)]
+    load(
+        "projects",
+        PROJECT_COLUMNS,
+        (
+            (pid, f"gen-{run}-{index}", f"Generated {index}", Jsonb({}), now, now)
+            for index, pid in enumerate(project_ids)
+        ),
+    )
+
+    threads: list[tuple[UUID, UUID, datetime]] = []
+    per_project = skewed_counts(config.threads, config.projects, config.skew, rng)
+    for pid, count in zip(project_ids, per_project):
+        threads.extend(
+            (uuid.uuid4(), pid, recent_timestamp(now, config.days, rng)) for _ in range(count)
+        )
+    load(
+        "threads",
+        THREAD_COLUMNS,
+        (
+            (tid, pid, sentence(rng)[:200], Jsonb({"source": rng.choice(("web", "telegram"))}), at, at)
+            for tid, pid, at in threads
+        ),
+    )
+
+    def message_rows() -> Iterator[tuple]:
+        per_thread = skewed_counts(config.messages, len(threads), config.skew, rng)
+        for (tid, _, started), count in zip(threads, per_thread):
+            step = (now - started) / max(count, 1)
+            for seq in range(count):
+                yield (
+                    uuid.uuid4(),
+                    tid,
+                    "web" if rng.random() < 0.8 else "telegram",
+                    "user" if seq % 2 == 0 else "assistant",
+                    sentence(rng),
+                    Jsonb({"seq": seq, "lang": rng.choice(("en", "de", "ru"))}),
+                    started + step * seq,
+                )
+
+    load("messages", messages_service.BULK_COLUMNS, message_rows())
+
+    actions: list[tuple[UUID, UUID, UUID, str, datetime]] = []
+    statuses, status_weights = zip(*ACTION_STATUSES)
+    per_thread = skewed_counts(config.actions, len(threads), config.skew, rng)
+    for (tid, pid, started), count in zip(threads, per_thread):
+        for _ in range(count):
+            status = rng.choices(statuses, status_weights)[0]
+            at = started + (now - started) * rng.random()
+            actions.append((uuid.uuid4(), tid, pid, status, at))
+    load(
+        "actions",
+        ACTION_COLUMNS,
+        (
+            (
+                aid,
+                tid,
+                rng.choice(ACTION_TYPES),
+                "EXECUTE" if status in ("DONE", "FAILED") else rng.choice(("DRAFT", "EXECUTE")),
+                status,
+                Jsonb({"note": sentence(rng)}),
+                Jsonb({"status": "executed"}) if status == "DONE" else None,
+                "user@example.com" if status in ("APPROVED", "DONE", "FAILED") else None,
+                at if status in ("APPROVED", "DONE", "FAILED") else None,
+                f"gen-{aid}",
+                at,
+                at,
+            )
+            for aid, tid, _, status, at in actions
+        ),
+    )
+
+    oldest = min((at for *_, at in actions), default=now)
+    months_back = (now.year - oldest.year) * 12 + now.month - oldest.month
+    audit_partitions.ensure_audit_partitions(db, months_back=months_back, now=now)
+    db.commit()
+
+    def audit_rows() -> Iterator[tuple]:
+        for aid, tid, pid, status, at in actions:
+            for offset, event in enumerate(AUDIT_EVENTS[: config.audit_per_action]):
+                yield (
+                    uuid.uuid4(),
+                    pid,
+                    tid,
+                    aid,
+                    "system",
+                    event,
+                    Jsonb({"status": status}),
+                    min(at + timedelta(seconds=offset), now),
+                )
+
+    load("audit", AUDIT_COLUMNS, audit_rows())
+
+    def artifact_rows() -> Iterator[tuple]:
+        # Artifacts are attached to actions, so none are generated without them.
+        for _ in range(config.artifacts if actions else 0):
+            aid, tid, pid, _, at = rng.choice(actions)
+            artifact_id = uuid.uuid4()
+            filename = f"{rng.choice(WORDS)}.pdf"
+            yield (
+                artifact_id,
+                pid,
+                tid,
+                aid,
+                "document",
+                f"artifacts/{pid}/{artifact_id}/{filename}",
+                filename,
+                Jsonb({"pages": rng.randint(1, 40), "generated": True}),
+                1,
+                at,
+            )
+
+    load("artifacts", ARTIFACT_COLUMNS, artifact_rows())
+
+    for table in ("projects", "threads", "messages", "actions", "audit", "artifacts"):
+        db.execute(text(f"ANALYZE {table}"))
+    db.commit()
+    return counts
+
+
+def main(argv: list[str] | None = None) -> None:
+    defaults = DatagenConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=defaults.projects)
+    parser.add_argument("--threads", type=int, default=defaults.threads, help="total threads")
+    parser.add_argument("--messages", type=int, default=defaults.messages, help="total messages")
+    parser.add_argument("--actions", type=int, default=defaults.actions, help="total actions")
+    parser.add_argument("--audit-per-action", type=int, default=defaults.audit_per_action)
+    parser.add_argument("--artifacts", type=int, default=defaults.artifacts)
+    parser.add_argument("--days", type=int, default=defaults.days, help="time span of the data")
+    parser.add_argument("--skew", type=float, default=defaults.skew, help="Zipf exponent, 0 = uniform")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+
+    config = DatagenConfig(**{name.replace("-", "_"): value for name, value in vars(args).items()})
+    with get_sessionmaker()() as db:
+        generate(db, config)
+
+
+if __name__ == "__main__":
+    main()
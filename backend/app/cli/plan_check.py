@@ -0,0 +1,214 @@
+"""Check the query plans of the read endpoints against the current database.
+
+Every GET request in ``PLAN_REQUESTS`` is issued in-process against sample ids of
+the largest project, and each SELECT it runs is re-executed under
+``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)``. The check fails when a plan
+sequentially scans a table with at least ``--min-seq-scan-rows`` rows or touches
+more than ``--max-buffers`` shared buffers. Run it after ``app.cli.datagen``::
+
+    python -m app.cli.plan_check --max-buffers 5000
+"""
+
+import argparse
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select, text
+from sqlalchemy.engine import Engine
+
+from app.core import env  # noqa: F401
+from app.db.engine import get_engine, get_sessionmaker
+from app.db.models import Action, Artifact, Message, Thread
+from app.db.query_budget import statement_shape
+
+PLAN_REQUESTS = (
+    "/v1/projects/{project_id}",
+    "/v1/projects/{project_id}/threads",
+    '/v1/projects/{project_id}/threads?tags={{"source":"web"}}',
+    "/v1/projects/{project_id}/messages/search?q=invoice refund",
+    "/v1/threads/{thread_id}/messages?limit=50",
+    "/v1/threads/{thread_id}/messages?limit=50&offset=500",
+    '/v1/threads/{thread_id}/messages?meta={{"lang":"de"}}&limit=50',
+    "/v1/threads/{thread_id}/actions",
+    "/v1/actions/{action_id}",
+    "/v1/audit?project_id={project_id}&limit=50",
+    "/v1/audit?thread_id={thread_id}&limit=50",
+    "/v1/audit?action_id={action_id}&limit=50",
+    "/v1/artifacts?project_id={project_id}&limit=50",
+    "/v1/artifacts/{artifact_id}",
+)
+
+DEFAULT_MAX_BUFFERS = 5000
+DEFAULT_MIN_SEQ_SCAN_ROWS = 10_000
+
+
+@dataclass
+class PlanReport:
+    request: str
+    statement: str
+    execution_ms: float
+    buffers: int
+    problems: list[str] = field(default_factory=list)
+
+
+def plan_nodes(plan: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def plan_buffers(plan: dict[str, Any]) -> int:
+    # Buffer counts of a node include its children.
+    return plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+
+
+def plan_problems(
+    plan: dict[str, Any],
+    table_rows: dict[str, float],
+    *,
+    max_buffers: int,
+    min_seq_scan_rows: int,
+) -> list[str]:
+    problems = []
+    for node in plan_nodes(plan):
+        if node["Node Type"] != "Seq Scan":
+            continue
+        relation = node.get("Relation Name", "?")
+        if table_rows.get(relation, 0) >= min_seq_scan_rows:
+            problems.append(f"seq scan on {relation} (~{int(table_rows[relation])} rows)")
+    buffers = plan_buffers(plan)
+    if buffers > max_buffers:
+        problems.append(f"{buffers} buffers (budget {max_buffers})")
+    return problems
+
+
+def sample_ids(db) -> dict[str, Any] | None:
+    thread_counts = (
+        select(Thread.project_id, func.count().label("n")).group_by(Thread.project_id).subquery()
+    )
+    project_id = db.execute(
+        select(thread_counts.c.project_id).order_by(thread_counts.c.n.desc()).limit(1)
+    ).scalar()
+    if project_id is None:
+        return None
+    message_counts = (
+        select(Message.thread_id, func.count().label("n"))
+        .join(Thread, Thread.id == Message.thread_id)
+        .where(Thread.project_id == project_id)
+        .group_by(Message.thread_id)
+        .subquery()
+    )
+    thread_id = db.execute(
+        select(message_counts.c.thread_id).order_by(message_counts.c.n.desc()).limit(1)
+    ).scalar() or db.execute(select(Thread.id).where(Thread.project_id == project_id).limit(1)).scalar()
+    action_id = db.execute(select(Action.id).where(Action.thread_id == thread_id).limit(1)).scalar()
+    artifact_id = db.execute(
+        select(Artifact.id).where(Artifact.project_id == project_id).limit(1)
+    ).scalar()
+    return {
+        "project_id": project_id,
+        "thread_id": thread_id,
+        "action_id": action_id,
+        "artifact_id": artifact_id,
+    }
+
+
+def capture_selects(engine: Engine, client: TestClient, path: str) -> list[tuple[str, Any]]:
+    captured: list[tuple[str, Any]] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        client.get(path).raise_for_status()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def explain(engine: Engine, statement: str, parameters: Any) -> dict[str, Any]:
+    with engine.connect() as conn:
+        try:
+            result = conn.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+            ).scalar_one()
+        finally:
+            conn.rollback()
+    return result[0]
+
+
+def check_plans(
+    *, max_buffers: int = DEFAULT_MAX_BUFFERS, min_seq_scan_rows: int = DEFAULT_MIN_SEQ_SCAN_ROWS
+) -> list[PlanReport]:
+    from app.main import app
+
+    engine = get_engine()
+    with get_sessionmaker()() as db:
+        ids = sample_ids(db)
+        table_rows = {
+            name: rows
+            for name, rows in db.execute(
+                text("SELECT relname, reltuples FROM pg_class WHERE relkind IN ('r', 'p')")
+            )
+        }
+    if ids is None:
+        raise SystemExit("No data to check; run app.cli.datagen first.")
+
+    client = TestClient(app)
+    reports: list[PlanReport] = []
+    seen: set[str] = set()
+    for template in PLAN_REQUESTS:
+        if any(f"{{{name}}}" in template and value is None for name, value in ids.items()):
+            continue
+        path = template.format(**ids)
+        for statement, parameters in capture_selects(engine, client, path):
+            shape = statement_shape(statement)
+            if shape in seen:
+                continue
+            seen.add(shape)
+            plan = explain(engine, statement, parameters)
+            reports.append(
+                PlanReport(
+                    request=template.replace("{{", "{").replace("}}", "}"),
+                    statement=shape,
+                    execution_ms=plan["Execution Time"],
+                    buffers=plan_buffers(plan["Plan"]),
+                    problems=plan_problems(
+                        plan["Plan"],
+                        table_rows,
+                        max_buffers=max_buffers,
+                        min_seq_scan_rows=min_seq_scan_rows,
+                    ),
+                )
+            )
+    return reports
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-buffers", type=int, default=DEFAULT_MAX_BUFFERS)
+    parser.add_argument("--min-seq-scan-rows", type=int, default=DEFAULT_MIN_SEQ_SCAN_ROWS)
+    parser.add_argument("--verbose", action="store_true", help="print the statements")
+    args = parser.parse_args(argv)
+
+    reports = check_plans(max_buffers=args.max_buffers, min_seq_scan_rows=args.min_seq_scan_rows)
+    failed = 0
+    for report in reports:
+        status = "FAIL" if report.problems else "ok"
+        failed += bool(report.problems)
+        print(
+            f"{status:<5}{report.execution_ms:>9.2f}ms {report.buffers:>7} buf  {report.request}"
+            + ("".join(f"\n       - {problem}" for problem in report.problems))
+        )
+        if args.verbose or report.problems:
+            print(f"       {report.statement[:300]}")
+    print(f"{len(reports)} statements checked, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Background scheduler that runs delayed, recurring and retried actions.
+
+Each poll runs, on every shard:
+
+* the reaper, which requeues or fails ``EXECUTING`` actions whose lease expired
+  (see :mod:`app.services.leases`),
+* approved ``READ`` and ``EXECUTE`` actions whose ``run_at`` has passed
+  (recurring ones queue their next occurrence first), and
+* actions waiting in ``RETRYING`` whose ``next_attempt_at`` has passed,
+
+and purges expired entries of the shared handler result cache.
+
+Due actions are claimed in batches with ``FOR UPDATE SKIP LOCKED``, so several
+schedulers can run side by side. A claim is one statement that reads the pending
+actions of each project through its threads and ranks at most a batch of them
+per project (see :func:`app.services.fair_share.fair_claim`), so its cost follows
+the number of projects and of their pending actions, not the size of the backlog's
+history.
+Each action of a batch is then locked again and run and committed on its own, so
+a slow handler does not hold the locks of the rest of the batch and a crash loses
+at most one outcome. Actions of a project that is being moved to another shard,
+or that already left this shard, are left out of the claims (see
+:func:`app.db.sharding.serves_project`). An attempt also commits the ``EXECUTING`` state and lease
+before its handler starts (see :func:`app.services.actions._run_attempt`)::
+
+    python -m app.cli.scheduler --interval 1
+"""
+
+import argparse
+import logging
+import time
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from app.core import env  # noqa: F401
+from app.db import sharding
+from app.db.models import Action, Thread
+from app.services import actions as actions_service
+from app.services import leases, result_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 1.0
+DEFAULT_BATCH_SIZE = 100
+
+
+def run_due(
+    session_local,
+    claim: Callable[..., list[Action]],
+    run: Callable[..., Action],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    still_due: Callable[[Action], bool] | None = None,
+    shard: str = sharding.DEFAULT_SHARD,
+) -> dict[str, int]:
+    """Claim and run due actions batch by batch; returns counts by resulting status.
+
+    ``claim`` is called once per batch and leaves out the projects that are being
+    moved. Every claimed action is then locked and run in a transaction of its own,
+    and skipped if meanwhile another worker locked it, moved it on, or (per
+    ``still_due``) it is no longer due, or if ``shard`` does not serve its project
+    right now; such a project is left out of the following claims as well. The
+    run ends with a short batch, or with a batch of which nothing ran.
+    """
+    outcomes: dict[str, int] = {}
+    excluded = sharding.moving_projects()
+    while True:
+        with session_local() as db:
+            batch = [
+                (action.id, action.status)
+                for action in claim(db, limit=batch_size, exclude_projects=excluded)
+            ]
+        ran = 0
+        for action_id, claimed_status in batch:
+            with session_local() as db:
+                action = db.get(Action, action_id, with_for_update={"skip_locked": True})
+                if action is None or action.status != claimed_status:
+                    continue
+                if still_due is not None and not still_due(action):
+                    continue
+                if sharding.sharding_enabled():
+                    project_id = db.get(Thread, action.thread_id).project_id
+                    if not sharding.serves_project(shard, project_id):
+                        excluded.add(project_id)
+                        continue
+                run(db, action=action)
+                db.commit()
+                ran += 1
+                outcomes[action.status] = outcomes.get(action.status, 0) + 1
+        if len(batch) < batch_size or not ran:
+            return outcomes
+
+
+def run_due_retries(
+    session_local, *, batch_size: int = DEFAULT_BATCH_SIZE, shard: str = sharding.DEFAULT_SHARD
+) -> dict[str, int]:
+    return run_due(
+        session_local,
+        actions_service.due_retries,
+        actions_service.retry_action,
+        batch_size=batch_size,
+        shard=shard,
+    )
+
+
+def run_due_scheduled(
+    session_local, *, batch_size: int = DEFAULT_BATCH_SIZE, shard: str = sharding.DEFAULT_SHARD
+) -> dict[str, int]:
+    return run_due(
+        session_local,
+        actions_service.due_scheduled,
+        actions_service.execute_action,
+        batch_size=batch_size,
+        shard=shard,
+    )
+
+
+def reap_expired_leases(
+    session_local, *, batch_size: int = DEFAULT_BATCH_SIZE, shard: str = sharding.DEFAULT_SHARD
+) -> dict[str, int]:
+    return run_due(
+        session_local,
+        leases.expired_leases,
+        actions_service.reap_action,
+        batch_size=batch_size,
+        # A heartbeat may have extended the lease since the batch was claimed.
+        still_due=leases.lease_expired,
+        shard=shard,
+    )
+
+
+def run_once(*, batch_size: int = DEFAULT_BATCH_SIZE) -> dict[str, int]:
+    outcomes: dict[str, int] = {}
+    for shard in sharding.shard_names():
+        session_local: Callable[[], Session] = sharding.get_shard_sessionmaker(shard)
+        # Reaping first lets requeued attempts run in the same poll once they are due.
+        for step in (reap_expired_leases, run_due_scheduled, run_due_retries):
+            for outcome, count in step(session_local, batch_size=batch_size, shard=shard).items():
+                outcomes[outcome] = outcomes.get(outcome, 0) + count
+        if result_cache.shared_cache_enabled():
+            with session_local() as db:
+                result_cache.purge_expired(db)
+                db.commit()
+    return outcomes
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="seconds between polls")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--once", action="store_true", help="run due actions once and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    while True:
+        outcomes = run_once(batch_size=args.batch_size)
+        if outcomes:
+            logger.info("ran actions: %s", outcomes)
+        if args.once:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
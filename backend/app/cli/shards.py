@@ -0,0 +1,77 @@
+"""Inspect shards, migrate them and move projects between them.
+
+::
+
+    python -m app.cli.shards list
+    python -m app.cli.shards migrate
+    python -m app.cli.shards move <project_id> <shard>
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy import func, select
+
+from app.core import env  # noqa: F401
+from app.db import sharding
+from app.db.models import Project
+from app.services import shard_rebalance
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+
+def list_shards() -> None:
+    for shard in sharding.shard_names():
+        with sharding.get_shard_sessionmaker(shard)() as db:
+            projects = db.execute(select(func.count()).select_from(Project)).scalar_one()
+        print(f"{shard}: {projects} projects")
+
+
+def migrate_shards() -> int:
+    urls = {sharding.DEFAULT_SHARD: os.environ.get("DATABASE_URL", ""), **sharding.shard_urls()}
+    for shard, url in urls.items():
+        print(f"{shard}: alembic upgrade head")
+        completed = subprocess.run(
+            ["alembic", "upgrade", "head"], cwd=BACKEND_DIR, env={**os.environ, "DATABASE_URL": url}
+        )
+        if completed.returncode:
+            return completed.returncode
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="projects per shard")
+    commands.add_parser("migrate", help="run the migrations on every shard")
+    move = commands.add_parser("move", help="move a project to another shard")
+    move.add_argument("project_id", type=UUID)
+    move.add_argument("shard")
+    move.add_argument(
+        "--drain-seconds",
+        type=float,
+        default=None,
+        help="wait for routing caches to expire (default: SHARD_CACHE_TTL_SECONDS)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        list_shards()
+    elif args.command == "migrate":
+        return migrate_shards()
+    else:
+        result = shard_rebalance.move_project(
+            args.project_id, args.shard, drain_seconds=args.drain_seconds
+        )
+        print(f"moved {result.project_id} from {result.source} to {result.target}")
+        for table, rows in result.rows.items():
+            print(f"  {table}: {rows} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Only histograms are needed for request profiling, so this is a small registry
+rather than a dependency on ``prometheus_client``. Values are kept per process;
+scrape every worker.
+"""
+
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from app.db.instrumentation import QueryStats, track_queries
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000)
+BYTE_BUCKETS = (1024, 16384, 131072, 1048576, 8388608, 67108864, 536870912)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (the last slot is +Inf), sum, count.
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self) -> dict[tuple[str, ...], tuple[list[int], float, int]]:
+        with self._lock:
+            return {key: (list(s[0]), s[1], s[2]) for key, s in self._series.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for key, (counts, total, count) in sorted(self.collect().items()):
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = ",".join([*labels, f'le="{_format(bound)}"'])
+                lines.append(f"{self.name}_bucket{{{le}}} {cumulative}")
+            joined = "{" + ",".join(labels) + "}" if labels else ""
+            lines.append(f"{self.name}_sum{joined} {_format(total)}")
+            lines.append(f"{self.name}_count{joined} {count}")
+        return lines
+
+
+REGISTRY: list[Histogram] = []
+
+
+def histogram(name: str, documentation: str, labelnames: tuple[str, ...], **kwargs) -> Histogram:
+    metric = Histogram(name, documentation, labelnames, **kwargs)
+    REGISTRY.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+ROUTE_LABELS = ("method", "route")
+
+REQUEST_LATENCY = histogram(
+    "http_request_duration_seconds",
+    "Time spent handling the request, by route template.",
+    ("method", "route", "status"),
+)
+DB_STATEMENTS = histogram(
+    "http_request_db_statements",
+    "SQL statements executed per request.",
+    ROUTE_LABELS,
+    buckets=COUNT_BUCKETS,
+)
+DB_TIME = histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing SQL statements per request.",
+    ROUTE_LABELS,
+)
+DB_ROWS = histogram(
+    "http_request_db_rows",
+    "Rows returned or affected by SQL statements per request.",
+    ROUTE_LABELS,
+    buckets=COUNT_BUCKETS,
+)
+SERIALIZATION_TIME = histogram(
+    "http_response_serialization_seconds",
+    "Time spent serializing response bodies per request.",
+    ROUTE_LABELS,
+)
+
+EXECUTION_LABELS = ("handler", "outcome")
+
+EXECUTION_LATENCY = histogram(
+    "executor_handler_duration_seconds",
+    "Wall time of executor handler runs.",
+    EXECUTION_LABELS,
+)
+EXECUTION_CPU = histogram(
+    "executor_handler_cpu_seconds",
+    "CPU time of executor handler runs (the running thread only).",
+    EXECUTION_LABELS,
+)
+EXECUTION_DB_STATEMENTS = histogram(
+    "executor_handler_db_statements",
+    "SQL statements executed per executor handler run.",
+    EXECUTION_LABELS,
+    buckets=COUNT_BUCKETS,
+)
+EXECUTION_RSS_GROWTH = histogram(
+    "executor_handler_peak_rss_growth_bytes",
+    "Growth of the process' peak RSS during executor handler runs.",
+    EXECUTION_LABELS,
+    buckets=BYTE_BUCKETS,
+)
+EXECUTION_RESULT_BYTES = histogram(
+    "executor_handler_result_bytes",
+    "Size of executor handler results serialized as JSON.",
+    ("handler",),
+    buckets=BYTE_BUCKETS,
+)
+
+
+@dataclass
+class RequestMetrics:
+    queries: QueryStats = field(default_factory=QueryStats)
+    serialization_seconds: float = 0.0
+    profile: bool = False
+
+
+_current: ContextVar[RequestMetrics | None] = ContextVar("request_metrics", default=None)
+
+
+def current_request_metrics() -> RequestMetrics | None:
+    return _current.get()
+
+
+@contextmanager
+def request_metrics() -> Iterator[RequestMetrics]:
+    with track_queries() as queries:
+        metrics = RequestMetrics(queries=queries)
+        token = _current.set(metrics)
+        try:
+            yield metrics
+        finally:
+            _current.reset(token)
+
+
+def record_serialization(seconds: float) -> None:
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.serialization_seconds += seconds
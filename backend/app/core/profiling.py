@@ -0,0 +1,104 @@
+"""Sampled cProfile dumps of endpoint functions.
+
+A request is profiled when ``PROFILE_SAMPLE_RATE`` selects it or when it sends
+``X-Profile: 1`` while ``PROFILE_ALLOW_HEADER`` is enabled. The endpoint function
+runs under ``cProfile`` in whichever thread executes it (sync endpoints run in the
+threadpool), and the stats are written to ``PROFILE_DIR`` as ``.prof`` files for
+``snakeviz`` / ``pstats``. cProfile is used rather than ``pyinstrument`` so that
+profiling needs no extra dependency.
+"""
+
+import cProfile
+import functools
+import inspect
+import logging
+import os
+import random
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+from app.core.metrics import current_request_metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SAMPLE_RATE_ENV = "PROFILE_SAMPLE_RATE"
+PROFILE_DIR_ENV = "PROFILE_DIR"
+PROFILE_ALLOW_HEADER_ENV = "PROFILE_ALLOW_HEADER"
+PROFILE_HEADER = "x-profile"
+
+DEFAULT_PROFILE_DIR = "/tmp/jack-profiles"
+
+
+def profile_settings_from_env() -> dict:
+    return {
+        "sample_rate": float(os.getenv(PROFILE_SAMPLE_RATE_ENV, "0")),
+        "allow_header": os.getenv(PROFILE_ALLOW_HEADER_ENV, "0").lower() in ("1", "true", "yes"),
+        "directory": Path(os.getenv(PROFILE_DIR_ENV, DEFAULT_PROFILE_DIR)),
+    }
+
+
+def should_profile(sample_rate: float, allow_header: bool, header_value: str | None) -> bool:
+    if allow_header and header_value == "1":
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def dump_path(directory: Path, method: str, route: str) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+    return directory / f"{time.strftime('%Y%m%dT%H%M%S')}-{time.monotonic_ns()}-{method}-{slug}.prof"
+
+
+def _dump(profiler: cProfile.Profile, route: APIRoute, directory: Path) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    method = next(iter(sorted(route.methods or {"GET"})))
+    path = dump_path(directory, method, route.path)
+    profiler.dump_stats(path)
+    logger.info("profile written route=%s path=%s", route.path, path)
+
+
+def _wrap(call: Callable[..., Any], route: APIRoute, directory: Path) -> Callable[..., Any]:
+    if inspect.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def profiled_async(*args: Any, **kwargs: Any) -> Any:
+            metrics = current_request_metrics()
+            if metrics is None or not metrics.profile:
+                return await call(*args, **kwargs)
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                profiler.disable()
+                _dump(profiler, route, directory)
+
+        return profiled_async
+
+    @functools.wraps(call)
+    def profiled(*args: Any, **kwargs: Any) -> Any:
+        metrics = current_request_metrics()
+        if metrics is None or not metrics.profile:
+            return call(*args, **kwargs)
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(call, *args, **kwargs)
+        finally:
+            _dump(profiler, route, directory)
+
+    return profiled
+
+
+def instrument_endpoints(app: FastAPI, directory: Path) -> None:
+    """Wrap every endpoint so that requests marked for profiling are profiled.
+
+    FastAPI calls ``route.dependant.call`` at request time, so wrapping it keeps
+    request parsing, validation and OpenAPI generation unchanged.
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            route.dependant.call = _wrap(route.dependant.call, route, directory)
@@ -2,4 +2,6 @@ from sqlalchemy.orm import DeclarativeBase
 
 
 class Base(DeclarativeBase):
-    pass
+    # Fetch server-generated columns (created_at, updated_at) with RETURNING on flush,
+    # so building a response after a write needs no refresh SELECT.
+    __mapper_args__ = {"eager_defaults": True}
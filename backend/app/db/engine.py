@@ -0,0 +1,34 @@
+"""Engine and session factory of the default database (``DATABASE_URL``).
+
+Kept apart from :mod:`app.db.session` because both it and :mod:`app.db.sharding`,
+which the request sessions there are routed by, need them.
+"""
+
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+_engine = None
+_SessionLocal = None
+
+
+def _get_database_url() -> str:
+    database_url = os.getenv("DATABASE_URL", "")
+    if not database_url:
+        raise RuntimeError("DATABASE_URL environment variable is not set")
+    return database_url
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        _engine = create_engine(_get_database_url(), pool_pre_ping=True)
+    return _engine
+
+
+def get_sessionmaker():
+    global _SessionLocal
+    if _SessionLocal is None:
+        _SessionLocal = sessionmaker(bind=get_engine(), autoflush=False, autocommit=False)
+    return _SessionLocal
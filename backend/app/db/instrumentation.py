@@ -0,0 +1,89 @@
+"""SQLAlchemy cursor hooks that count statements, DB time and rows.
+
+Statistics are collected into every :class:`QueryStats` opened with
+:func:`track_queries` in the current context. Trackers nest (a request and an
+executor run inside it both see the statements), and because the context is
+copied into FastAPI's threadpool, statements issued by sync endpoints are
+attributed to the request that started them.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_active: ContextVar[tuple["QueryStats", ...]] = ContextVar("active_query_stats", default=())
+_installed = False
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    seconds: float = 0.0
+    rows: int = 0
+    commits: int = 0
+    statement_counts: dict[str, int] = field(default_factory=dict)
+
+    def record(self, statement: str, seconds: float, rows: int) -> None:
+        self.statements += 1
+        self.seconds += seconds
+        self.rows += rows
+        self.statement_counts[statement] = self.statement_counts.get(statement, 0) + 1
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def untracked() -> Iterator[None]:
+    """Hide housekeeping statements (e.g. health probes) from the active trackers."""
+    token = _active.set(())
+    try:
+        yield
+    finally:
+        _active.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # Kept on the statement's own execution context rather than the connection, so a
+    # statement that raises leaves nothing behind for the next one to pick up.
+    if _active.get() and context is not None:
+        context.query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    trackers = _active.get()
+    if not trackers:
+        return
+    started = getattr(context, "query_started_at", None)
+    elapsed = time.perf_counter() - started if started is not None else 0.0
+    rows = max(getattr(cursor, "rowcount", 0) or 0, 0)
+    for stats in trackers:
+        stats.record(statement, elapsed, rows)
+
+
+def _commit(conn: Any) -> None:
+    for stats in _active.get():
+        stats.commits += 1
+
+
+def install_query_hooks() -> None:
+    """Attach the hooks to every engine (idempotent)."""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "commit", _commit)
+    _installed = True
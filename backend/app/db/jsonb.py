@@ -0,0 +1,16 @@
+"""JSONB predicates shared by the list endpoints."""
+
+from typing import Any, Iterable
+
+from sqlalchemy import Text, cast
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql.elements import ColumnElement
+
+
+def has_keys(column: Any, keys: Iterable[str]) -> ColumnElement[bool]:
+    """``column`` has every top-level key in ``keys``, whatever the value.
+
+    Written as ``?&``, which the ``jsonb_ops`` GIN indexes serve; the
+    ``jsonb_path_ops`` ones only index values and cannot.
+    """
+    return column.has_all(cast(list(keys), ARRAY(Text)))
@@ -2,7 +2,17 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    CheckConstraint,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
@@ -43,6 +53,17 @@ class Thread(Base):
     messages = relationship("Message", back_populates="thread", cascade="all, delete-orphan")
     actions = relationship("Action", back_populates="thread", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_threads_project_id", "project_id"),
+        Index(
+            "ix_threads_tags_gin",
+            "tags",
+            postgresql_using="gin",
+            postgresql_ops={"tags": "jsonb_path_ops"},
+        ),
+        Index("ix_threads_tags_keys_gin", "tags", postgresql_using="gin"),
+    )
+
 
 class Message(Base):
     __tablename__ = "messages"
@@ -62,6 +83,19 @@ class Message(Base):
     __table_args__ = (
         CheckConstraint("channel IN ('web', 'telegram')", name="ck_messages_channel"),
         CheckConstraint("role IN ('user', 'assistant', 'system')", name="ck_messages_role"),
+        Index("ix_messages_thread_id_created_at", "thread_id", "created_at"),
+        Index(
+            "ix_messages_meta_gin",
+            "meta",
+            postgresql_using="gin",
+            postgresql_ops={"meta": "jsonb_path_ops"},
+        ),
+        Index("ix_messages_meta_keys_gin", "meta", postgresql_using="gin"),
+        Index(
+            "ix_messages_content_fts",
+            text("to_tsvector('simple'::regconfig, content)"),
+            postgresql_using="gin",
+        ),
     )
 
 
@@ -80,6 +114,19 @@ class Action(Base):
     approved_by: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     approved_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     idempotency_key: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    next_attempt_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    run_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    schedule: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
+    # Higher runs first among the due actions of a project.
+    priority: Mapped[int] = mapped_column(SmallInteger, default=0, server_default="0", nullable=False)
+    # Worker running the action and until when; set while the action is EXECUTING.
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
@@ -92,9 +139,72 @@ class Action(Base):
             "policy_mode IN ('READ', 'DRAFT', 'EXECUTE')", name="ck_actions_policy_mode"
         ),
         CheckConstraint(
-            "status IN ('DRAFT', 'APPROVED', 'EXECUTING', 'DONE', 'FAILED', 'CANCELED')",
+            "status IN ('DRAFT', 'APPROVED', 'EXECUTING', 'DONE', 'FAILED', 'CANCELED', "
+            "'RETRYING', 'DEAD_LETTER')",
             name="ck_actions_status",
         ),
+        Index(
+            "ix_actions_retry_due",
+            "next_attempt_at",
+            postgresql_where=text("status = 'RETRYING'"),
+        ),
+        Index(
+            "ix_actions_status_run_at",
+            "status",
+            "run_at",
+            postgresql_where=text("run_at IS NOT NULL"),
+        ),
+        Index(
+            "ix_actions_thread_pending",
+            "thread_id",
+            postgresql_where=text("status IN ('APPROVED', 'RETRYING')"),
+        ),
+        Index(
+            "ix_actions_lease_expiry",
+            "lease_expires_at",
+            postgresql_where=text("status = 'EXECUTING'"),
+        ),
+        Index(
+            "ix_actions_payload_gin",
+            "payload",
+            postgresql_using="gin",
+            postgresql_ops={"payload": "jsonb_path_ops"},
+        ),
+        Index("ix_actions_payload_keys_gin", "payload", postgresql_using="gin"),
+    )
+
+
+class ActionDependency(Base):
+    """``action_id`` may only run once ``depends_on_id`` is DONE (same thread)."""
+
+    __tablename__ = "action_dependencies"
+
+    action_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("actions.id"), primary_key=True
+    )
+    depends_on_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("actions.id"), primary_key=True
+    )
+
+    __table_args__ = (
+        CheckConstraint("action_id <> depends_on_id", name="ck_action_dependencies_not_self"),
+        Index("ix_action_dependencies_depends_on_id", "depends_on_id"),
+    )
+
+
+class HandlerResult(Base):
+    """Shared cache of results of deterministic handlers, keyed by type and payload."""
+
+    __tablename__ = "handler_results"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    action_type: Mapped[str] = mapped_column(String(255), nullable=False)
+    result: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_handler_results_expires_at", "expires_at"),
+        {"prefixes": ["UNLOGGED"]},
     )
 
 
@@ -118,6 +228,16 @@ class Artifact(Base):
     version: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index(
+            "ix_artifacts_metadata_gin",
+            "metadata",
+            postgresql_using="gin",
+            postgresql_ops={"metadata": "jsonb_path_ops"},
+        ),
+        Index("ix_artifacts_metadata_keys_gin", "metadata", postgresql_using="gin"),
+    )
+
 
 class Audit(Base):
     __tablename__ = "audit"
@@ -135,4 +255,57 @@ class Audit(Base):
     actor: Mapped[str] = mapped_column(String(255), nullable=False)
     event_type: Mapped[str] = mapped_column(String(255), nullable=False)
     payload: Mapped[dict] = mapped_column(JSONB, default=dict, nullable=False)
+    # Partition key; the database primary key is (id, created_at).
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_audit_project_id_created_at", "project_id", "created_at"),
+        Index("ix_audit_thread_id_created_at", "thread_id", "created_at"),
+        Index("ix_audit_action_id_created_at", "action_id", "created_at"),
+        Index("ix_audit_created_at", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+class ArchiveSegment(Base):
+    __tablename__ = "archive_segments"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False
+    )
+    thread_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("threads.id"), nullable=True
+    )
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    storage_path: Mapped[str] = mapped_column(String(512), nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    min_created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    max_created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        CheckConstraint("kind IN ('messages', 'audit')", name="ck_archive_segments_kind"),
+        Index("ix_archive_segments_project_id_kind", "project_id", "kind"),
+        Index("ix_archive_segments_thread_id", "thread_id"),
+    )
+
+
+class ProjectShard(Base):
+    """Shard of a project; projects without an entry live on the default shard."""
+
+    __tablename__ = "project_shards"
+
+    project_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    shard: Mapped[str] = mapped_column(String(64), nullable=False)
+    state: Mapped[str] = mapped_column(String(16), nullable=False, server_default="active")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    __table_args__ = (
+        CheckConstraint("state IN ('active', 'moving')", name="ck_project_shards_state"),
+        Index("ix_project_shards_shard", "shard"),
+    )
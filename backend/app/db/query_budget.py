@@ -0,0 +1,100 @@
+"""Per-endpoint SQL statement budgets and N+1 detection.
+
+Endpoints declare how many statements a request may issue with
+:func:`query_budget`. :class:`app.middleware.query_budget.QueryBudgetMiddleware`
+checks every request against its budget and flags statements that repeat with the
+same shape (the usual sign of a query issued per row). ``QUERY_BUDGET_MODE``
+selects what happens on a violation: ``off`` (default), ``warn`` (log, for
+staging) or ``raise`` (used by the test suite).
+"""
+
+import logging
+import os
+import re
+from typing import Any, Callable, TypeVar
+
+from app.db.instrumentation import QueryStats
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_MODE_ENV = "QUERY_BUDGET_MODE"
+QUERY_REPEAT_THRESHOLD_ENV = "QUERY_REPEAT_THRESHOLD"
+
+QUERY_BUDGET_MODES = ("off", "warn", "raise")
+DEFAULT_REPEAT_THRESHOLD = 5
+
+BUDGET_ATTRIBUTE = "__query_budget__"
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanding IN parameters render as ``%(id_1_1)s, %(id_1_2)s, ...``; collapse them so
+# that the same query with a different number of ids has one shape.
+_EXPANDED_PARAMS = re.compile(r"%\((\w+?)_\d+\)s(?:\s*,\s*%\(\1_\d+\)s)*")
+_NUMBERED_PARAM = re.compile(r"%\((\w+?)_\d+\)s")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def query_budget(statements: int) -> Callable[[_F], _F]:
+    """Declare the maximum number of SQL statements one request to an endpoint may issue.
+
+    Apply it below the route decorator so the registered endpoint carries it.
+    """
+
+    def decorator(endpoint: _F) -> _F:
+        setattr(endpoint, BUDGET_ATTRIBUTE, statements)
+        return endpoint
+
+    return decorator
+
+
+def budget_of(endpoint: Any) -> int | None:
+    return getattr(endpoint, BUDGET_ATTRIBUTE, None)
+
+
+def query_budget_settings_from_env() -> dict:
+    mode = os.getenv(QUERY_BUDGET_MODE_ENV, "off").lower()
+    if mode not in QUERY_BUDGET_MODES:
+        raise RuntimeError(f"{QUERY_BUDGET_MODE_ENV} must be one of {', '.join(QUERY_BUDGET_MODES)}")
+    return {
+        "mode": mode,
+        "repeat_threshold": int(os.getenv(QUERY_REPEAT_THRESHOLD_ENV, DEFAULT_REPEAT_THRESHOLD)),
+    }
+
+
+def statement_shape(statement: str) -> str:
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _EXPANDED_PARAMS.sub(lambda match: f"%({match.group(1)})s", shape)
+    return _NUMBERED_PARAM.sub(lambda match: f"%({match.group(1)})s", shape)
+
+
+def repeated_shapes(stats: QueryStats, threshold: int) -> dict[str, int]:
+    shapes: dict[str, int] = {}
+    for statement, count in stats.statement_counts.items():
+        shape = statement_shape(statement)
+        shapes[shape] = shapes.get(shape, 0) + count
+    return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+
+def check_query_budget(
+    label: str,
+    stats: QueryStats,
+    budget: int | None,
+    *,
+    mode: str,
+    repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD,
+) -> None:
+    """Warn about repeated statements and enforce ``budget`` for one request."""
+    if mode == "off":
+        return
+    for shape, count in repeated_shapes(stats, repeat_threshold).items():
+        logger.warning("possible N+1 in %s: %d statements shaped %r", label, count, shape[:200])
+    if budget is None or stats.statements <= budget:
+        return
+    message = f"{label} issued {stats.statements} SQL statements (budget {budget})"
+    if mode == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
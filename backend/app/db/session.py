@@ -1,37 +1,183 @@
+import logging
 import os
+import threading
+import time
+from typing import Iterator
 
-from sqlalchemy import create_engine
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, sessionmaker
 
-_engine = None
-_SessionLocal = None
+from app.db import sharding
+from app.db.instrumentation import untracked
 
+logger = logging.getLogger(__name__)
 
-def _get_database_url() -> str:
-    database_url = os.getenv("DATABASE_URL", "")
-    if not database_url:
-        raise RuntimeError("DATABASE_URL environment variable is not set")
-    return database_url
+READ_DATABASE_URL_ENV = "READ_DATABASE_URL"
+REPLICA_MAX_LAG_ENV = "REPLICA_MAX_LAG_SECONDS"
+REPLICA_LAG_CHECK_INTERVAL_ENV = "REPLICA_LAG_CHECK_INTERVAL_SECONDS"
 
+DEFAULT_REPLICA_MAX_LAG = 5.0
+DEFAULT_REPLICA_LAG_CHECK_INTERVAL = 1.0
 
-def get_engine():
-    global _engine
-    if _engine is None:
-        _engine = create_engine(_get_database_url(), pool_pre_ping=True)
-    return _engine
+# Clients that must see their own writes send this header; write routes also set
+# the cookie so that follow-up reads stay on the primary until the replica caught up.
+READ_PRIMARY_HEADER = "x-read-primary"
+READ_PRIMARY_COOKIE = "read_primary"
 
+# No lag once the replica replayed all the WAL it received, so an idle primary does
+# not make it look lagged; otherwise the age of the last replayed transaction. NULL
+# (not a replica) counts as no lag.
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
 
-def get_sessionmaker():
-    global _SessionLocal
-    if _SessionLocal is None:
-        _SessionLocal = sessionmaker(bind=get_engine(), autoflush=False, autocommit=False)
-    return _SessionLocal
+_read_engine = None
+_ReadSessionLocal = None
+_replica_lag: tuple[float, float] | None = None  # (checked_at, lag seconds)
+_replica_lag_probing = False
+_replica_lag_lock = threading.Lock()
 
+# Seconds a client is asked to wait before retrying a write to a project in transit.
+SHARD_MOVE_RETRY_AFTER = 5
 
-def get_db_session() -> Session:
-    session_local = get_sessionmaker()
-    db = session_local()
+READ_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def project_moving(exc: sharding.ProjectMovingError) -> HTTPException:
+    return HTTPException(
+        status_code=503, detail=str(exc), headers={"Retry-After": str(SHARD_MOVE_RETRY_AFTER)}
+    )
+
+
+def get_db_session(request: Request) -> Session:
+    """Session on the shard of the project the request addresses.
+
+    With a single database this is a plain session; see :mod:`app.db.sharding`.
+    """
+    shard = sharding.DEFAULT_SHARD
+    if sharding.sharding_enabled():
+        params = {**request.query_params, **request.path_params}
+        try:
+            shard = sharding.resolve_shard(params, write=request.method not in READ_METHODS)
+        except sharding.ProjectMovingError as exc:
+            raise project_moving(exc) from exc
+    db = sharding.get_shard_sessionmaker(shard)()
+    db.info["shard"] = shard
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def read_replica_configured() -> bool:
+    return bool(os.getenv(READ_DATABASE_URL_ENV))
+
+
+def get_read_engine():
+    global _read_engine
+    if _read_engine is None and read_replica_configured():
+        _read_engine = create_engine(
+            os.environ[READ_DATABASE_URL_ENV],
+            pool_pre_ping=True,
+            execution_options={"postgresql_readonly": True},
+        )
+    return _read_engine
+
+
+def get_read_sessionmaker():
+    global _ReadSessionLocal
+    if _ReadSessionLocal is None and read_replica_configured():
+        _ReadSessionLocal = sessionmaker(bind=get_read_engine(), autoflush=False, autocommit=False)
+    return _ReadSessionLocal
+
+
+def replica_lag_seconds() -> float:
+    """Replication lag of the read replica, re-measured at most once per check interval.
+
+    One request measures it, outside the lock; the others keep using the previous
+    value meanwhile (infinite before the first measurement). An unreachable replica
+    reports infinite lag so reads fall back to the primary.
+    """
+    global _replica_lag, _replica_lag_probing
+    interval = float(os.getenv(REPLICA_LAG_CHECK_INTERVAL_ENV, DEFAULT_REPLICA_LAG_CHECK_INTERVAL))
+    now = time.monotonic()
+    with _replica_lag_lock:
+        cached = _replica_lag
+        if cached is not None and (now - cached[0] < interval or _replica_lag_probing):
+            return cached[1]
+        if _replica_lag_probing:
+            return float("inf")
+        _replica_lag_probing = True
+    lag = float("inf")
+    try:
+        with untracked(), get_read_engine().connect() as conn:
+            lag = float(conn.execute(REPLICA_LAG_SQL).scalar_one())
+    except SQLAlchemyError:
+        logger.warning("read replica unavailable, routing reads to the primary", exc_info=True)
+    finally:
+        with _replica_lag_lock:
+            _replica_lag = (now, lag)
+            _replica_lag_probing = False
+    return lag
+
+
+def replica_max_lag() -> float:
+    return float(os.getenv(REPLICA_MAX_LAG_ENV, DEFAULT_REPLICA_MAX_LAG))
+
+
+def use_read_replica(request: Request) -> bool:
+    if not read_replica_configured():
+        return False
+    if request.headers.get(READ_PRIMARY_HEADER) == "1" or request.cookies.get(READ_PRIMARY_COOKIE):
+        return False
+    return replica_lag_seconds() <= replica_max_lag()
+
+
+def get_read_db_session(
+    request: Request, primary: Session = Depends(get_db_session)
+) -> Iterator[Session]:
+    """Session for read-only routes: the replica when it is configured and fresh enough.
+
+    Falls back to the primary session when there is no replica, when the replica lags
+    behind by more than ``REPLICA_MAX_LAG_SECONDS`` or when the client asks to read
+    its own writes. The replica mirrors the default shard only.
+    """
+    if primary.info.get("shard", sharding.DEFAULT_SHARD) != sharding.DEFAULT_SHARD or not use_read_replica(request):
+        yield primary
+        return
+    db = get_read_sessionmaker()()
     try:
         yield db
     finally:
         db.close()
+
+
+def mark_read_primary(response: Response) -> None:
+    """Send the client's next reads to the primary until the replica caught up."""
+    if read_replica_configured():
+        response.set_cookie(
+            READ_PRIMARY_COOKIE, "1", max_age=int(replica_max_lag()) + 1, httponly=True
+        )
+
+
+def get_unit_of_work(
+    response: Response, db: Session = Depends(get_db_session)
+) -> Iterator[Session]:
+    """Session for write routes, committed exactly once when the route returns.
+
+    Routes ``flush()`` to get ids and server defaults and build their response from
+    the flushed objects; the commit runs after the response is rendered but before it
+    is sent, so a failed commit still turns into an error response. Any exception
+    rolls the whole request back, including the shard placement of a new project.
+    """
+    mark_read_primary(response)
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        sharding.discard_placements(db)
+        raise
@@ -0,0 +1,319 @@
+"""Placement of projects on shards.
+
+Every row of a project (threads, messages, actions, artifacts, audit, archive
+segments) lives in the database of the project's shard. ``DATABASE_URL`` is the
+``default`` shard and also holds the ``project_shards`` directory; additional
+shards come from ``SHARD_DATABASE_URLS`` (``name=url,name=url``). Without it there
+is a single shard and no routing work is done at all.
+
+Requests are routed by the ids in their path (``project_id``, ``thread_id``,
+``action_id``, ``artifact_id``) or query, or by the projects their body names (see
+:func:`bind_to_projects`); lists that address no project are rejected. Directory
+lookups are cached for ``SHARD_CACHE_TTL_SECONDS`` and the project of a thread,
+action or artifact id is cached for the life of the process (it never changes).
+"""
+
+import heapq
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Mapping
+from uuid import UUID
+
+from sqlalchemy import Executable, Row, create_engine, delete, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db import engine as db_engine
+from app.db.instrumentation import untracked
+from app.db.models import Action, Artifact, Project, ProjectShard, Thread
+
+SHARD_DATABASE_URLS_ENV = "SHARD_DATABASE_URLS"
+SHARD_CACHE_TTL_ENV = "SHARD_CACHE_TTL_SECONDS"
+
+DEFAULT_SHARD = "default"
+DEFAULT_CACHE_TTL = 5.0
+DIRECTORY_CACHE_SIZE = 100_000
+OWNER_CACHE_SIZE = 100_000
+
+# Session.info key of the projects a request session placed on another shard.
+PLACED_PROJECTS = "placed_projects"
+# Session.info key of the shard a request session was bound to by its body.
+BOUND_SHARD = "bound_shard"
+
+# Path/query parameters that identify the owning project, in lookup order.
+ROUTING_KEYS = ("project_id", "thread_id", "action_id", "artifact_id")
+
+_engines: dict[str, Engine] = {}
+_sessionmakers: dict[str, sessionmaker] = {}
+_directory_cache: "OrderedDict[UUID, tuple[float, str, str]]" = OrderedDict()
+_owner_cache: "OrderedDict[tuple[str, UUID], UUID]" = OrderedDict()
+_lock = threading.Lock()
+
+
+class ProjectMovingError(RuntimeError):
+    """Raised for writes to a project that is being moved to another shard."""
+
+
+class CrossShardError(ValueError):
+    """Raised when one request session would have to write to several shards."""
+
+
+def shard_urls() -> dict[str, str]:
+    urls: dict[str, str] = {}
+    for item in os.getenv(SHARD_DATABASE_URLS_ENV, "").split(","):
+        name, sep, url = item.strip().partition("=")
+        if sep and name and url:
+            urls[name.strip()] = url.strip()
+    urls.pop(DEFAULT_SHARD, None)
+    return urls
+
+
+def sharding_enabled() -> bool:
+    return bool(shard_urls())
+
+
+def shard_names() -> list[str]:
+    return [DEFAULT_SHARD, *sorted(shard_urls())]
+
+
+def get_shard_engine(shard: str) -> Engine:
+    if shard == DEFAULT_SHARD:
+        return db_engine.get_engine()
+    with _lock:
+        engine = _engines.get(shard)
+        if engine is None:
+            urls = shard_urls()
+            if shard not in urls:
+                raise LookupError(f"Unknown shard {shard!r}")
+            engine = _engines[shard] = create_engine(urls[shard], pool_pre_ping=True)
+        return engine
+
+
+def get_shard_sessionmaker(shard: str) -> sessionmaker:
+    if shard == DEFAULT_SHARD:
+        return db_engine.get_sessionmaker()
+    with _lock:
+        factory = _sessionmakers.get(shard)
+    if factory is None:
+        factory = sessionmaker(bind=get_shard_engine(shard), autoflush=False, autocommit=False)
+        with _lock:
+            _sessionmakers.setdefault(shard, factory)
+    return factory
+
+
+def choose_shard(project_id: UUID) -> str:
+    """Shard for a new project: a stable spread of project ids over all shards."""
+    names = shard_names()
+    return names[project_id.int % len(names)]
+
+
+def cache_ttl() -> float:
+    return float(os.getenv(SHARD_CACHE_TTL_ENV, DEFAULT_CACHE_TTL))
+
+
+def project_placement(project_id: UUID) -> tuple[str, str]:
+    """``(shard, state)`` of a project from the directory (cached)."""
+    now = time.monotonic()
+    with _lock:
+        cached = _directory_cache.get(project_id)
+    if cached is not None and now - cached[0] < cache_ttl():
+        return cached[1], cached[2]
+    with untracked(), db_engine.get_sessionmaker()() as directory:
+        entry = directory.get(ProjectShard, project_id)
+        placement = (entry.shard, entry.state) if entry else (DEFAULT_SHARD, "active")
+    _cache_placement(project_id, now, *placement)
+    return placement
+
+
+def _cache_placement(project_id: UUID, checked_at: float, shard: str, state: str) -> None:
+    with _lock:
+        _directory_cache[project_id] = (checked_at, shard, state)
+        _directory_cache.move_to_end(project_id)
+        while len(_directory_cache) > DIRECTORY_CACHE_SIZE:
+            _directory_cache.popitem(last=False)
+
+
+def forget_project(project_id: UUID) -> None:
+    with _lock:
+        _directory_cache.pop(project_id, None)
+
+
+def serves_project(shard: str, project_id: UUID) -> bool:
+    """Whether background work (scheduler, plans) may change the project on ``shard``.
+
+    Not while the project is being moved, and not on the shard it left, which keeps
+    a copy of its rows until the move deletes them.
+    """
+    if not sharding_enabled():
+        return True
+    return project_placement(project_id) == (shard, "active")
+
+
+def moving_projects() -> set[UUID]:
+    """Projects that are being moved to another shard, read from the directory."""
+    if not sharding_enabled():
+        return set()
+    with untracked(), db_engine.get_sessionmaker()() as directory:
+        query = select(ProjectShard.project_id).where(ProjectShard.state == "moving")
+        return set(directory.execute(query).scalars().all())
+
+
+def register_project(project_id: UUID, shard: str) -> None:
+    """Record the shard of a new project in the directory (committed immediately)."""
+    with untracked(), db_engine.get_sessionmaker()() as directory:
+        directory.add(ProjectShard(project_id=project_id, shard=shard, state="active"))
+        directory.commit()
+    _cache_placement(project_id, time.monotonic(), shard, "active")
+
+
+def unregister_project(project_id: UUID) -> None:
+    with untracked(), db_engine.get_sessionmaker()() as directory:
+        directory.execute(delete(ProjectShard).where(ProjectShard.project_id == project_id))
+        directory.commit()
+    forget_project(project_id)
+
+
+def _owner_query(kind: str, entity_id: UUID):
+    if kind == "thread_id":
+        return select(Thread.project_id).where(Thread.id == entity_id)
+    if kind == "action_id":
+        return (
+            select(Thread.project_id)
+            .join(Action, Action.thread_id == Thread.id)
+            .where(Action.id == entity_id)
+        )
+    if kind == "artifact_id":
+        return select(Artifact.project_id).where(Artifact.id == entity_id)
+    raise ValueError(kind)
+
+
+def owning_project(kind: str, entity_id: UUID) -> UUID | None:
+    """Project of a thread/action/artifact id, searched across shards and cached."""
+    key = (kind, entity_id)
+    with _lock:
+        if key in _owner_cache:
+            _owner_cache.move_to_end(key)
+            return _owner_cache[key]
+    with untracked():
+        for shard in shard_names():
+            with get_shard_sessionmaker(shard)() as db:
+                project_id = db.execute(_owner_query(kind, entity_id)).scalar()
+            if project_id is not None:
+                break
+        else:
+            return None
+    with _lock:
+        _owner_cache[key] = project_id
+        while len(_owner_cache) > OWNER_CACHE_SIZE:
+            _owner_cache.popitem(last=False)
+    return project_id
+
+
+def _as_uuid(value: Any) -> UUID | None:
+    if isinstance(value, UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def project_for_params(params: Mapping[str, Any]) -> UUID | None:
+    for key in ROUTING_KEYS:
+        entity_id = _as_uuid(params[key]) if params.get(key) else None
+        if entity_id is None:
+            continue
+        return entity_id if key == "project_id" else owning_project(key, entity_id)
+    return None
+
+
+def resolve_shard(params: Mapping[str, Any], *, write: bool) -> str:
+    """Shard serving a request with the given path and query parameters."""
+    project_id = project_for_params(params)
+    if project_id is None:
+        return DEFAULT_SHARD
+    shard, state = project_placement(project_id)
+    if write and state == "moving":
+        raise ProjectMovingError(f"Project {project_id} is being moved to another shard")
+    return shard
+
+
+def bind_to_project(db: Session, project_id: UUID) -> None:
+    """Point a not yet used request session at the shard of ``project_id``."""
+    bind_to_projects(db, [project_id])
+
+
+def bind_to_projects(db: Session, project_ids: Iterable[UUID]) -> None:
+    """Point a request session at the shard of projects named in the request body.
+
+    For requests whose path and query do not identify the project. All projects
+    must live on one shard, and on the one an earlier call bound the session to;
+    otherwise :class:`CrossShardError` is raised.
+    """
+    if not sharding_enabled():
+        return
+    shards = {db.info[BOUND_SHARD]} if BOUND_SHARD in db.info else set()
+    for project_id in project_ids:
+        shard, state = project_placement(project_id)
+        if state == "moving":
+            raise ProjectMovingError(f"Project {project_id} is being moved to another shard")
+        shards.add(shard)
+    if len(shards) > 1:
+        raise CrossShardError(f"The request spans the shards {', '.join(sorted(shards))}")
+    if not shards:
+        return
+    shard = shards.pop()
+    if db.info.get("shard", DEFAULT_SHARD) != shard:
+        db.bind = get_shard_engine(shard)
+        db.info["shard"] = shard
+    db.info[BOUND_SHARD] = shard
+
+
+def place_new_project(db: Session, project: Project) -> None:
+    """Assign a shard to a new project and bind the request session to it.
+
+    On the default shard the directory entry is written in the request's own
+    transaction. Another shard is a different database, so the entry is committed
+    first, for requests routed by it, and :func:`discard_placements` removes it if
+    the project is not created after all.
+    """
+    if not sharding_enabled():
+        return
+    project.id = project.id or uuid.uuid4()
+    shard = choose_shard(project.id)
+    if shard == DEFAULT_SHARD:
+        db.add(ProjectShard(project_id=project.id, shard=shard, state="active"))
+    else:
+        register_project(project.id, shard)
+        db.info.setdefault(PLACED_PROJECTS, []).append(project.id)
+    db.bind = get_shard_engine(shard)
+    db.info["shard"] = shard
+
+
+def discard_placements(db: Session) -> None:
+    """Remove the directory entries of projects placed by a failed request session."""
+    for project_id in db.info.pop(PLACED_PROJECTS, []):
+        unregister_project(project_id)
+
+
+def execute_on_all_shards(
+    db: Session, statement: Executable, *, key: Callable[[Row], Any] | None = None
+) -> list[Row]:
+    """Rows of ``statement`` from every shard, the request session's shard included.
+
+    Each shard returns its rows in the statement's order; ``key`` merges them back
+    into one ordered list, otherwise they are concatenated shard by shard.
+    """
+    results = [list(db.execute(statement).all())]
+    if sharding_enabled():
+        own = db.info.get("shard", DEFAULT_SHARD)
+        for shard in shard_names():
+            if shard != own:
+                with get_shard_sessionmaker(shard)() as other:
+                    results.append(list(other.execute(statement).all()))
+    if key is None:
+        return [row for rows in results for row in rows]
+    return list(heapq.merge(*results, key=key))
@@ -3,11 +3,28 @@ from fastapi import FastAPI
 from app.core import env  # noqa: F401
 
 from app.api.router import api_router
+from app.core.profiling import instrument_endpoints, profile_settings_from_env
+from app.db.instrumentation import install_query_hooks
+from app.db.query_budget import query_budget_settings_from_env
+from app.middleware.compression import CompressionMiddleware, compression_settings_from_env
+from app.middleware.etag import ETagMiddleware
+from app.middleware.query_budget import QueryBudgetMiddleware
+from app.middleware.timing import TimingMiddleware, timing_settings_from_env
 
 
 def create_app() -> FastAPI:
     app = FastAPI(title="Jack API")
     app.include_router(api_router)
+    install_query_hooks()
+    profile = profile_settings_from_env()
+    if profile["sample_rate"] > 0 or profile["allow_header"]:
+        instrument_endpoints(app, profile["directory"])
+    # Last added runs outermost: ETags are computed on the uncompressed body, and
+    # request timing covers compression.
+    app.add_middleware(ETagMiddleware)
+    app.add_middleware(CompressionMiddleware, **compression_settings_from_env())
+    app.add_middleware(QueryBudgetMiddleware, **query_budget_settings_from_env())
+    app.add_middleware(TimingMiddleware, **timing_settings_from_env())
     return app
 
 
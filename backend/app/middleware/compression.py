@@ -0,0 +1,162 @@
+"""Response compression for buffered API responses.
+
+Only responses sent as a single body message (JSON endpoints) are compressed;
+streamed responses such as artifact downloads pass through untouched, as do
+responses that already carry a ``Content-Encoding`` or an incompressible media
+type. ``br`` and ``zstd`` are used when the optional ``brotli`` / ``zstandard``
+packages are installed, otherwise only ``gzip`` is offered.
+"""
+
+import gzip
+import os
+import re
+from typing import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_MIN_SIZE_ENV = "COMPRESSION_MIN_SIZE"
+COMPRESSION_ENCODINGS_ENV = "COMPRESSION_ENCODINGS"
+COMPRESSION_EXCLUDE_PATHS_ENV = "COMPRESSION_EXCLUDE_PATHS"
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_ENCODINGS = ("br", "zstd", "gzip")
+DEFAULT_EXCLUDE_PATHS = r"/download$"
+
+# Media types that are already compressed or are binary blobs we never recompress.
+INCOMPRESSIBLE_PREFIXES = ("image/", "video/", "audio/")
+INCOMPRESSIBLE_TYPES = {
+    "application/gzip",
+    "application/zip",
+    "application/x-7z-compressed",
+    "application/zstd",
+    "application/octet-stream",
+    "application/pdf",
+}
+
+
+def _compressors() -> dict[str, Callable[[bytes], bytes]]:
+    compressors: dict[str, Callable[[bytes], bytes]] = {
+        "gzip": lambda data: gzip.compress(data, compresslevel=6),
+    }
+    if brotli is not None:
+        compressors["br"] = lambda data: brotli.compress(data, quality=4)
+    if zstandard is not None:
+        compressors["zstd"] = zstandard.ZstdCompressor(level=3).compress
+    return compressors
+
+
+def compression_settings_from_env() -> dict:
+    encodings = os.getenv(COMPRESSION_ENCODINGS_ENV)
+    return {
+        "minimum_size": int(os.getenv(COMPRESSION_MIN_SIZE_ENV, DEFAULT_MIN_SIZE)),
+        "encodings": tuple(e.strip() for e in encodings.split(",") if e.strip())
+        if encodings
+        else DEFAULT_ENCODINGS,
+        "exclude_paths": os.getenv(COMPRESSION_EXCLUDE_PATHS_ENV, DEFAULT_EXCLUDE_PATHS),
+    }
+
+
+def parse_accept_encoding(value: str) -> dict[str, float]:
+    accepted: dict[str, float] = {}
+    for part in value.split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        quality = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip().lower()] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = DEFAULT_MIN_SIZE,
+        encodings: tuple[str, ...] = DEFAULT_ENCODINGS,
+        exclude_paths: str | None = DEFAULT_EXCLUDE_PATHS,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        available = _compressors()
+        self.compressors = {name: available[name] for name in encodings if name in available}
+        self.exclude_paths = re.compile(exclude_paths) if exclude_paths else None
+
+    def choose_encoding(self, accept_encoding: str) -> str | None:
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        best, best_quality = None, 0.0
+        for name in self.compressors:
+            quality = accepted.get(name, wildcard)
+            if quality > best_quality:
+                best, best_quality = name, quality
+        return best
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (
+            self.exclude_paths is not None and self.exclude_paths.search(scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
+        encoding = self.choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            response_start, start = start, None
+            headers = MutableHeaders(scope=response_start)
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or not self._compressible(headers)
+            ):
+                await send(response_start)
+                await send(message)
+                return
+
+            compressed = self.compressors[encoding](body)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(response_start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _compressible(headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return not (
+            media_type.startswith(INCOMPRESSIBLE_PREFIXES) or media_type in INCOMPRESSIBLE_TYPES
+        )
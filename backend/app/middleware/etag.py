@@ -0,0 +1,68 @@
+"""Weak ETags and ``If-None-Match`` handling for buffered GET responses."""
+
+import hashlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def weak_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison function (RFC 9110, 13.1.2).
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+class ETagMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start: Message | None = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            response_start, start = start, None
+            headers = MutableHeaders(scope=response_start)
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or response_start["status"] != 200
+                or "etag" in headers
+                or not body
+            ):
+                await send(response_start)
+                await send(message)
+                return
+
+            etag = weak_etag(body)
+            headers["ETag"] = etag
+            if if_none_match and etag_matches(if_none_match, etag):
+                response_start["status"] = 304
+                del headers["Content-Length"]
+                del headers["Content-Type"]
+                await send(response_start)
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(response_start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,36 @@
+"""Enforces the statement budgets declared with :func:`app.db.query_budget.query_budget`."""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.db.instrumentation import track_queries
+from app.db.query_budget import DEFAULT_REPEAT_THRESHOLD, budget_of, check_query_budget
+
+
+class QueryBudgetMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        mode: str = "off",
+        repeat_threshold: int = DEFAULT_REPEAT_THRESHOLD,
+    ) -> None:
+        self.app = app
+        self.mode = mode
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.mode == "off":
+            await self.app(scope, receive, send)
+            return
+        with track_queries() as stats:
+            await self.app(scope, receive, send)
+        route = scope.get("route")
+        if route is None:
+            return
+        check_query_budget(
+            f"{scope['method']} {route.path}",
+            stats,
+            budget_of(getattr(route, "endpoint", None)),
+            mode=self.mode,
+            repeat_threshold=self.repeat_threshold,
+        )
@@ -0,0 +1,106 @@
+"""Per-request latency, DB and serialization metrics.
+
+Every HTTP request runs inside :func:`app.core.metrics.request_metrics`, so the
+SQLAlchemy hooks and the list serializer attribute their work to it. Histograms
+are labelled with the route template (``/v1/threads/{thread_id}``), never the raw
+path. With ``SERVER_TIMING_ALLOW_HEADER=1`` a ``Server-Timing`` header is added
+when the client asks for it with ``X-Server-Timing: 1``; it is off by default
+since it discloses DB timings and statement counts to any client.
+"""
+
+import os
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+from app.core.profiling import PROFILE_HEADER, profile_settings_from_env, should_profile
+
+SERVER_TIMING_ALLOW_HEADER_ENV = "SERVER_TIMING_ALLOW_HEADER"
+SERVER_TIMING_HEADER = "x-server-timing"
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def timing_settings_from_env() -> dict:
+    profile = profile_settings_from_env()
+    return {
+        "server_timing": os.getenv(SERVER_TIMING_ALLOW_HEADER_ENV, "0").lower()
+        in ("1", "true", "yes"),
+        "profile_sample_rate": profile["sample_rate"],
+        "profile_allow_header": profile["allow_header"],
+    }
+
+
+def server_timing(elapsed: float, stats: metrics.RequestMetrics) -> str:
+    queries = stats.queries
+    return ", ".join(
+        [
+            f"app;dur={elapsed * 1000:.3f}",
+            f'db;dur={queries.seconds * 1000:.3f};desc="{queries.statements} statements, '
+            f'{queries.rows} rows"',
+            f"ser;dur={stats.serialization_seconds * 1000:.3f}",
+        ]
+    )
+
+
+def route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class TimingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        server_timing: bool = False,
+        profile_sample_rate: float = 0.0,
+        profile_allow_header: bool = False,
+    ) -> None:
+        self.app = app
+        self.server_timing = server_timing
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_allow_header = profile_allow_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        want_timing = self.server_timing and request_headers.get(SERVER_TIMING_HEADER) == "1"
+        started = time.perf_counter()
+        status = 500
+
+        with metrics.request_metrics() as stats:
+            stats.profile = should_profile(
+                self.profile_sample_rate,
+                self.profile_allow_header,
+                request_headers.get(PROFILE_HEADER),
+            )
+
+            async def send_wrapper(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    if want_timing:
+                        headers = MutableHeaders(scope=message)
+                        headers.append(
+                            "Server-Timing", server_timing(time.perf_counter() - started, stats)
+                        )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                self._observe(scope, status, time.perf_counter() - started, stats)
+
+    @staticmethod
+    def _observe(scope: Scope, status: int, elapsed: float, stats: metrics.RequestMetrics) -> None:
+        labels = {"method": scope["method"], "route": route_template(scope)}
+        metrics.REQUEST_LATENCY.observe(elapsed, status=str(status), **labels)
+        metrics.DB_STATEMENTS.observe(stats.queries.statements, **labels)
+        metrics.DB_TIME.observe(stats.queries.seconds, **labels)
+        metrics.DB_ROWS.observe(stats.queries.rows, **labels)
+        metrics.SERIALIZATION_TIME.observe(stats.serialization_seconds, **labels)
@@ -1,7 +1,15 @@
 from app.schemas.actions import ActionApproveRequest, ActionCreate, ActionResponse
 from app.schemas.artifacts import ArtifactCreate, ArtifactResponse
 from app.schemas.audit import AuditResponse
-from app.schemas.messages import MessageCreate, MessageResponse
+from app.schemas.messages import (
+    MessageBulkChunk,
+    MessageBulkResponse,
+    MessageBulkRow,
+    MessageBulkThreadRow,
+    MessageCreate,
+    MessageResponse,
+    MessageSearchHit,
+)
 from app.schemas.projects import ProjectCreate, ProjectResponse
 from app.schemas.threads import ThreadCreate, ThreadResponse
 
@@ -12,8 +20,13 @@ __all__ = [
     "ArtifactCreate",
     "ArtifactResponse",
     "AuditResponse",
+    "MessageBulkChunk",
+    "MessageBulkResponse",
+    "MessageBulkRow",
+    "MessageBulkThreadRow",
     "MessageCreate",
     "MessageResponse",
+    "MessageSearchHit",
     "ProjectCreate",
     "ProjectResponse",
     "ThreadCreate",
@@ -1,8 +1,10 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from app.services.schedules import validate_schedule
 
 
 class ActionCreate(BaseModel):
@@ -10,6 +12,28 @@ class ActionCreate(BaseModel):
     policy_mode: Literal["READ", "DRAFT", "EXECUTE"]
     payload: dict = Field(default_factory=dict)
     idempotency_key: str
+    # Once approved, the scheduler runs the action at ``run_at`` (UTC when naive);
+    # with a cron ``schedule`` (UTC) every run also queues the next occurrence.
+    run_at: Optional[datetime] = None
+    schedule: Optional[str] = Field(default=None, max_length=128)
+    # Actions of the same thread that must be DONE before this one may run.
+    depends_on: list[UUID] = Field(default_factory=list)
+    # Higher runs first among the project's due actions (see app.services.fair_share).
+    priority: int = Field(default=0, ge=-10, le=10)
+
+    @field_validator("schedule")
+    @classmethod
+    def _check_schedule(cls, value: str | None) -> str | None:
+        return validate_schedule(value) if value is not None else None
+
+    @field_validator("run_at")
+    @classmethod
+    def _check_run_at(cls, value: datetime | None) -> datetime | None:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
 
 
 class ActionApproveRequest(BaseModel):
@@ -30,5 +54,26 @@ class ActionResponse(BaseModel):
     approved_by: Optional[str]
     approved_at: Optional[datetime]
     idempotency_key: str
+    attempts: int = 0
+    next_attempt_at: Optional[datetime] = None
+    run_at: Optional[datetime] = None
+    schedule: Optional[str] = None
+    priority: int = 0
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime]
+
+
+class PlanStep(BaseModel):
+    id: UUID
+    type: str
+    status: str
+    depends_on: list[UUID]
+
+
+class PlanResponse(BaseModel):
+    thread_id: UUID
+    status: Literal["PENDING", "RUNNING", "DONE", "FAILED"]
+    counts: dict[str, int]
+    actions: list[PlanStep]
@@ -15,6 +15,17 @@ class ArtifactCreate(BaseModel):
     content_base64: str
 
 
+class ArtifactStorePayload(BaseModel):
+    """Payload of ``artifact.store`` actions; ids default to the action's thread."""
+
+    project_id: Optional[UUID] = None
+    thread_id: Optional[UUID] = None
+    type: str
+    filename: str
+    metadata: dict = Field(default_factory=dict)
+    content_base64: str
+
+
 class ArtifactResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -1,5 +1,20 @@
-from pydantic import BaseModel
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class HandlerStats(BaseModel):
+    count: int
+    errors: int
+    error_rate: float
+    # Over the handler's most recent runs in this process.
+    p50_seconds: Optional[float] = None
+    p95_seconds: Optional[float] = None
 
 
 class ExecutorHandlersResponse(BaseModel):
     handlers: list[str]
+    # Handlers that ran in the serving process; unregistered types count as "default".
+    stats: dict[str, HandlerStats] = Field(default_factory=dict)
+    # JSON Schemas of the payloads of handlers that declare one.
+    payload_schemas: dict[str, dict] = Field(default_factory=dict)
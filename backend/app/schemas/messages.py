@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Literal
+from typing import Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -12,6 +12,25 @@ class MessageCreate(BaseModel):
     meta: dict = Field(default_factory=dict)
 
 
+class MessageBulkRow(MessageCreate):
+    created_at: Optional[datetime] = None
+
+
+class MessageBulkThreadRow(MessageBulkRow):
+    thread_id: UUID
+
+
+class MessageBulkChunk(BaseModel):
+    index: int
+    rows: int
+    elapsed_ms: float
+
+
+class MessageBulkResponse(BaseModel):
+    inserted: int
+    chunks: list[MessageBulkChunk]
+
+
 class MessageResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -22,3 +41,9 @@ class MessageResponse(BaseModel):
     content: str
     meta: dict
     created_at: datetime
+
+
+class MessageSearchHit(MessageResponse):
+    rank: float
+    # HTML-escaped excerpt of the content with the matches wrapped in <mark>.
+    snippet: str
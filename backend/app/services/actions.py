@@ -1,22 +1,45 @@
-from typing import Any
+from datetime import datetime, timedelta, timezone
+from typing import Any, Collection
 from uuid import UUID
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from pydantic import ValidationError
+from sqlalchemy import and_, exists, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 
-from app.db.models import Action, Thread
+from app.db.models import Action, ActionDependency, Thread
 from app.services import audit as audit_service
 from app.services import executor as executor_service
+from app.services import fair_share
+from app.services import leases
+from app.services import result_offload
+from app.services import schedules
 
 
 ALLOWED_TRANSITIONS = {
     "DRAFT": {"APPROVED", "CANCELED"},
     "APPROVED": {"EXECUTING", "CANCELED"},
-    "EXECUTING": {"DONE", "FAILED"},
+    "EXECUTING": {"DONE", "FAILED", "RETRYING", "DEAD_LETTER"},
+    "RETRYING": {"EXECUTING", "CANCELED"},
 }
 
+# Policy modes of actions that may run; DRAFT actions are never executed.
+RUNNABLE_POLICY_MODES = ("READ", "EXECUTE")
+
+# Outcomes that cancel every action depending on the action, transitively.
+BLOCKING_STATUSES = frozenset({"FAILED", "DEAD_LETTER", "CANCELED"})
+
+_upstream = aliased(Action)
+# Correlated to the outer Action: some dependency is not DONE yet.
+HAS_UNFINISHED_DEPENDENCY = exists(
+    select(1)
+    .select_from(ActionDependency)
+    .join(_upstream, _upstream.id == ActionDependency.depends_on_id)
+    .where(ActionDependency.action_id == Action.id, _upstream.status != "DONE")
+)
+
 
 def create_action(
     db: Session,
@@ -27,7 +50,21 @@ def create_action(
     payload: dict[str, Any],
     idempotency_key: str,
     actor: str = "system",
+    run_at: datetime | None = None,
+    schedule: str | None = None,
+    depends_on: list[UUID] | None = None,
+    priority: int = 0,
 ) -> tuple[Action, bool]:
+    try:
+        executor_service.validate_payload(action_type, payload)
+    except ValidationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "message": f"Invalid payload for {action_type}",
+                "errors": exc.errors(include_url=False, include_input=False, include_context=False),
+            },
+        ) from exc
     existing = _get_action_by_idempotency_key(db, idempotency_key)
     if existing:
         return _validate_idempotent_request(
@@ -38,6 +75,18 @@ def create_action(
             payload=payload,
         ), False
 
+    depends_on = list(dict.fromkeys(depends_on or ()))
+    if depends_on:
+        found = db.execute(
+            select(Action.id).where(Action.id.in_(depends_on), Action.thread_id == thread.id)
+        ).scalars().all()
+        if len(found) != len(depends_on):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="depends_on must reference existing actions of the same thread",
+            )
+    if schedule and run_at is None:
+        run_at = schedules.next_run(schedule, datetime.now(timezone.utc))
     action = Action(
         thread_id=thread.id,
         type=action_type,
@@ -45,6 +94,9 @@ def create_action(
         status="DRAFT",
         payload=payload,
         idempotency_key=idempotency_key,
+        run_at=run_at,
+        schedule=schedule,
+        priority=priority,
     )
     db.add(action)
     try:
@@ -62,11 +114,16 @@ def create_action(
             ), False
         raise
 
+    # Dependencies can only point at existing actions, so the graph stays acyclic.
+    db.add_all(ActionDependency(action_id=action.id, depends_on_id=dep) for dep in depends_on)
+    created_payload: dict[str, Any] = {"status": action.status}
+    if depends_on:
+        created_payload["depends_on"] = [str(dep) for dep in depends_on]
     audit_service.log_audit_event(
         db,
         actor=actor,
         event_type="action.created",
-        payload={"status": action.status},
+        payload=created_payload,
         project_id=thread.project_id,
         thread_id=thread.id,
         action_id=action.id,
@@ -124,53 +181,331 @@ def cancel_action(db: Session, *, action: Action, actor: str = "system") -> Acti
 
 
 def execute_action(db: Session, *, action: Action) -> Action:
+    """Run an approved action; a recurring one first queues its next occurrence.
+
+    The next occurrence is queued before the run so that a failing run does not end
+    the series. After downtime the missed occurrences are skipped rather than
+    replayed one by one.
+    """
     if action.status != "APPROVED":
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Action must be APPROVED before execution.",
         )
-    if action.policy_mode != "EXECUTE":
+    if action.policy_mode not in RUNNABLE_POLICY_MODES:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
-            detail="Action policy_mode must be EXECUTE to run.",
+            detail="Action policy_mode must be READ or EXECUTE to run.",
         )
+    if action.run_at is not None and action.run_at > datetime.now(timezone.utc):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Action is scheduled to run at {action.run_at.isoformat()}.",
+        )
+    if action.schedule:
+        _queue_next_occurrence(db, action)
+    return _run_attempt(db, action)
+
+
+def retry_action(db: Session, *, action: Action) -> Action:
+    """Run the next attempt of an action that is waiting in ``RETRYING``."""
+    if action.status != "RETRYING":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only RETRYING actions can be retried.",
+        )
+    return _run_attempt(db, action)
+
+
+def due_retries(
+    db: Session,
+    *,
+    now: datetime | None = None,
+    limit: int = 100,
+    exclude_projects: Collection[UUID] = (),
+) -> list[Action]:
+    """Lock up to ``limit`` due RETRYING actions in fair-share order, skipping locked ones."""
+    due = and_(
+        Action.status == "RETRYING",
+        Action.next_attempt_at <= (now or datetime.now(timezone.utc)),
+    )
+    return fair_share.fair_claim(
+        db, due, Action.next_attempt_at, limit=limit, exclude_projects=exclude_projects
+    )
+
+
+def unfinished_dependencies(db: Session, action_id: UUID) -> list[UUID]:
+    query = (
+        select(ActionDependency.depends_on_id)
+        .join(Action, Action.id == ActionDependency.depends_on_id)
+        .where(ActionDependency.action_id == action_id, Action.status != "DONE")
+    )
+    return list(db.execute(query).scalars().all())
+
+
+def _cancel_dependents(db: Session, action: Action) -> None:
+    """Cancel the not yet finished actions that depend on ``action``.
+
+    Each cancellation goes through :func:`_transition_action` again, which carries
+    it further downstream.
+    """
+    dependents = (
+        db.execute(
+            select(Action)
+            .join(ActionDependency, ActionDependency.action_id == Action.id)
+            .where(
+                ActionDependency.depends_on_id == action.id,
+                Action.status.in_(("DRAFT", "APPROVED", "RETRYING")),
+            )
+        )
+        .scalars()
+        .all()
+    )
+    for dependent in dependents:
+        _transition_action(db, dependent, "CANCELED", actor="system")
+
+
+def due_scheduled(
+    db: Session,
+    *,
+    now: datetime | None = None,
+    limit: int = 100,
+    exclude_projects: Collection[UUID] = (),
+) -> list[Action]:
+    """Lock up to ``limit`` approved actions whose ``run_at`` has passed, in fair-share order."""
+    due = and_(
+        Action.status == "APPROVED",
+        Action.run_at <= (now or datetime.now(timezone.utc)),
+        Action.policy_mode.in_(RUNNABLE_POLICY_MODES),
+        ~HAS_UNFINISHED_DEPENDENCY,
+    )
+    return fair_share.fair_claim(
+        db, due, Action.run_at, limit=limit, exclude_projects=exclude_projects
+    )
+
+
+# Separates an occurrence's idempotency key from the key of the series.
+OCCURRENCE_KEY_SEPARATOR = "#run:"
+
+
+def _queue_next_occurrence(db: Session, action: Action) -> UUID | None:
+    """Insert the series' next occurrence; ``None`` if it is queued already."""
+    now = datetime.now(timezone.utc)
+    after = max(action.run_at, now) if action.run_at else now
+    run_at = schedules.next_run(action.schedule, after)
+    series_key = action.idempotency_key.split(OCCURRENCE_KEY_SEPARATOR, 1)[0]
+    # The key names the occurrence's time, so a second run of the series (say the
+    # same occurrence executed by hand and by the scheduler) finds it taken.
+    occurrence_id = db.execute(
+        insert(Action)
+        .values(
+            thread_id=action.thread_id,
+            type=action.type,
+            policy_mode=action.policy_mode,
+            # Occurrences inherit the approval of the series.
+            status="APPROVED",
+            payload=action.payload,
+            approved_by=action.approved_by,
+            approved_at=action.approved_at,
+            idempotency_key=f"{series_key}{OCCURRENCE_KEY_SEPARATOR}{run_at:%Y%m%dT%H%MZ}",
+            run_at=run_at,
+            schedule=action.schedule,
+            priority=action.priority,
+        )
+        .on_conflict_do_nothing(index_elements=[Action.idempotency_key])
+        .returning(Action.id)
+    ).scalar()
+    if occurrence_id is None:
+        return None
+    thread = db.get(Thread, action.thread_id)
+    audit_service.log_audit_event(
+        db,
+        actor="system",
+        event_type="action.scheduled",
+        payload={"status": "APPROVED", "run_at": run_at.isoformat(), "previous": str(action.id)},
+        project_id=thread.project_id if thread else None,
+        thread_id=action.thread_id,
+        action_id=occurrence_id,
+    )
+    return occurrence_id
+
+
+def _run_attempt(db: Session, action: Action) -> Action:
+    """Run one attempt of ``action`` so that no connection idles during the handler.
+
+    1. Mark the action ``EXECUTING``, lease it to this worker and commit ``db``.
+    2. Run the handler in a session of its own, which checks out a connection only
+       once the handler queries.
+    3. In that same session lock the action again and, if this worker still holds
+       the lease, record the outcome and commit it together with the handler's
+       writes. ``db`` is refreshed to the committed state.
+
+    If the lease was lost in between (the reaper requeued the attempt, or another
+    worker took it over) the handler's writes and its result are discarded. If
+    recording a success fails (say offloading the result), its transaction is
+    rolled back and the attempt recorded as failed with that error instead, so the
+    action does not stay ``EXECUTING`` under a live lease.
+    """
     thread = db.get(Thread, action.thread_id)
     project_id = thread.project_id if thread else None
     audit_service.log_audit_event(
         db,
         actor="system",
         event_type="action.execute_attempt",
-        payload={"status": action.status},
+        payload={"status": action.status, "attempt": (action.attempts or 0) + 1},
         project_id=project_id,
         thread_id=action.thread_id,
         action_id=action.id,
     )
     _transition_action(db, action, "EXECUTING", actor="system")
+    action.attempts = (action.attempts or 0) + 1
+    action.next_attempt_at = None
+    leases.acquire(action)
+    _commit_keeping_state(db)
+
+    handler_db = _handler_session(db)
     try:
-        result = executor_service.execute(db, action)
-        action.result = result
-        _transition_action(db, action, "DONE", actor="system")
+        try:
+            result, cache_hit = executor_service.execute_cached(
+                handler_db, action, project_id=project_id
+            )
+            error = None
+        except Exception as exc:  # noqa: BLE001
+            handler_db.rollback()
+            result, cache_hit, error = None, False, exc
+        try:
+            _finish_attempt(handler_db, action, result, cache_hit, error, project_id=project_id)
+        except Exception as exc:  # noqa: BLE001
+            if error is not None:
+                raise
+            handler_db.rollback()
+            _finish_attempt(handler_db, action, None, False, exc, project_id=project_id)
+    finally:
+        handler_db.close()
+    db.refresh(action)
+    return action
+
+
+def _finish_attempt(
+    db: Session,
+    action: Action,
+    result: dict[str, Any] | None,
+    cache_hit: bool,
+    error: Exception | None,
+    *,
+    project_id: UUID | None,
+) -> None:
+    """Record the outcome of an attempt in the handler's session and commit it."""
+    # The handler's own transaction may hold locks on rows referencing the
+    # action (e.g. a new artifact), so the action is locked through it as well.
+    current = db.get(Action, action.id, with_for_update=True, populate_existing=True)
+    if current.status != "EXECUTING" or current.lease_owner != leases.WORKER_ID:
+        db.rollback()
         audit_service.log_audit_event(
             db,
             actor="system",
-            event_type="action.execute_succeeded",
-            payload={"status": action.status},
+            event_type="action.lease_lost",
+            payload={"status": current.status, "lease_owner": current.lease_owner},
             project_id=project_id,
             thread_id=action.thread_id,
             action_id=action.id,
         )
-    except Exception as exc:  # noqa: BLE001
-        action.result = {"error": str(exc)}
-        _transition_action(db, action, "FAILED", actor="system")
-        audit_service.log_audit_event(
-            db,
-            actor="system",
-            event_type="action.execute_failed",
-            payload={"status": action.status, "error": str(exc)},
-            project_id=project_id,
-            thread_id=action.thread_id,
-            action_id=action.id,
+    elif error is None:
+        _record_success(db, current, result, cache_hit=cache_hit, project_id=project_id)
+    else:
+        _record_failure(db, current, error, project_id=project_id)
+    db.commit()
+
+
+def _record_success(
+    db: Session, action: Action, result: dict[str, Any], *, cache_hit: bool, project_id: UUID | None
+) -> None:
+    if project_id is not None:
+        result = result_offload.offload_result(db, action, result, project_id=project_id)
+    action.result = result
+    leases.release(action)
+    _transition_action(db, action, "DONE", actor="system")
+    audit_service.log_audit_event(
+        db,
+        actor="system",
+        event_type="action.execute_succeeded",
+        payload={"status": action.status, "cache_hit": cache_hit},
+        project_id=project_id,
+        thread_id=action.thread_id,
+        action_id=action.id,
+    )
+
+
+def _record_failure(db: Session, action: Action, error: Exception, *, project_id: UUID | None) -> None:
+    action.result = {"error": str(error)}
+    leases.release(action)
+    policy = executor_service.retry_policy(action.type)
+    payload: dict[str, Any] = {"error": str(error), "attempt": action.attempts}
+    if not policy.retryable(error):
+        new_status = "FAILED"
+    elif action.attempts >= policy.max_attempts:
+        new_status = "DEAD_LETTER" if policy.max_attempts > 1 else "FAILED"
+    else:
+        new_status = "RETRYING"
+        delay = policy.delay(action.attempts)
+        action.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        payload["retry_in_seconds"] = round(delay, 3)
+    _transition_action(db, action, new_status, actor="system")
+    audit_service.log_audit_event(
+        db,
+        actor="system",
+        event_type="action.execute_failed",
+        payload={"status": action.status, **payload},
+        project_id=project_id,
+        thread_id=action.thread_id,
+        action_id=action.id,
+    )
+
+
+def _handler_session(db: Session) -> Session:
+    return Session(bind=db.get_bind(), autoflush=False)
+
+
+def _commit_keeping_state(db: Session) -> None:
+    """Commit without expiring loaded objects, so the handler reads them without a query."""
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+
+
+def reap_action(db: Session, *, action: Action) -> Action:
+    """Requeue or fail an EXECUTING action whose lease expired, per handler policy."""
+    policy = executor_service.retry_policy(action.type)
+    payload: dict[str, Any] = {
+        "lease_owner": action.lease_owner,
+        "lease_expires_at": action.lease_expires_at.isoformat() if action.lease_expires_at else None,
+        "attempt": action.attempts,
+    }
+    action.result = {"error": "lease expired: the worker stopped before the handler finished"}
+    leases.release(action)
+    if policy.on_lease_expiry == "fail" or policy.max_attempts <= 1:
+        new_status = "FAILED"
+    elif action.attempts >= policy.max_attempts:
+        new_status = "DEAD_LETTER"
+    else:
+        new_status = "RETRYING"
+        action.next_attempt_at = datetime.now(timezone.utc) + timedelta(
+            seconds=policy.delay(action.attempts)
         )
+    thread = db.get(Thread, action.thread_id)
+    audit_service.log_audit_event(
+        db,
+        actor="system",
+        event_type="action.lease_expired",
+        payload={"status": new_status, **payload},
+        project_id=thread.project_id if thread else None,
+        thread_id=action.thread_id,
+        action_id=action.id,
+    )
+    _transition_action(db, action, new_status, actor="system")
     return action
 
 
@@ -193,3 +528,5 @@ def _transition_action(db: Session, action: Action, new_status: str, *, actor: s
         thread_id=action.thread_id,
         action_id=action.id,
     )
+    if new_status in BLOCKING_STATUSES:
+        _cancel_dependents(db, action)
@@ -0,0 +1,323 @@
+"""Cold archival of old messages and audit rows.
+
+Rows older than ``Project.settings["archive_after_days"]`` are deleted from the hot
+tables and written to gzip-compressed NDJSON segments under the artifact storage
+root. Each segment is recorded in ``archive_segments`` so list endpoints can page
+into the archive once they run past the hot rows.
+"""
+
+import gzip
+import heapq
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+from uuid import UUID
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.db.models import ArchiveSegment, Audit, Message, Project, Thread
+from app.services.artifacts import get_storage_root
+
+ARCHIVE_SETTING = "archive_after_days"
+ARCHIVE_BATCH_SIZE = 5000
+# Session.info key of the segment files replaced in the current transaction.
+REPLACED_FILES = "archive_replaced_files"
+
+MESSAGE_FIELDS = ("id", "thread_id", "channel", "role", "content", "meta", "created_at")
+AUDIT_FIELDS = (
+    "id",
+    "project_id",
+    "thread_id",
+    "action_id",
+    "actor",
+    "event_type",
+    "payload",
+    "created_at",
+)
+
+
+def get_archive_cutoff(project: Project, now: datetime | None = None) -> datetime | None:
+    days = (project.settings or {}).get(ARCHIVE_SETTING)
+    if days is None:
+        return None
+    return (now or datetime.now(timezone.utc)) - timedelta(days=int(days))
+
+
+def build_segment_path(project_id: UUID, kind: str, segment_id: UUID, thread_id: UUID | None) -> Path:
+    base = Path("archive") / str(project_id) / kind
+    if thread_id:
+        base = base / str(thread_id)
+    return base / f"{segment_id}.ndjson.gz"
+
+
+def archive_project(
+    db: Session,
+    project: Project,
+    *,
+    now: datetime | None = None,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+) -> list[ArchiveSegment]:
+    """Move the project's rows older than its cutoff into archive segments.
+
+    Rows are removed with ``DELETE ... RETURNING`` so exactly the deleted rows end up
+    in the file. The caller commits; on failure the rollback restores the rows and at
+    worst leaves an unreferenced file behind.
+
+    Bulk ingest accepts ``created_at``, so a thread can gain hot messages older than
+    ones it already archived. Those are archived as well, whatever the cutoff, and
+    merged with the segments they overlap into a new segment, which keeps the archive
+    of a thread older than all of its hot rows. The replaced segments' files are
+    removed by :func:`remove_replaced_files` once the caller committed.
+    """
+    cutoff = get_archive_cutoff(project, now)
+    if cutoff is None:
+        return []
+
+    segments: list[ArchiveSegment] = []
+    archived_until = (
+        select(ArchiveSegment.thread_id, func.max(ArchiveSegment.max_created_at).label("until"))
+        .where(ArchiveSegment.project_id == project.id, ArchiveSegment.kind == "messages")
+        .group_by(ArchiveSegment.thread_id)
+        .subquery()
+    )
+    threads = db.execute(
+        select(Thread.id, archived_until.c.until)
+        .outerjoin(archived_until, archived_until.c.thread_id == Thread.id)
+        .where(Thread.project_id == project.id)
+        .where(
+            select(Message.id)
+            .where(
+                Message.thread_id == Thread.id,
+                or_(Message.created_at < cutoff, Message.created_at <= archived_until.c.until),
+            )
+            .exists()
+        )
+    ).all()
+    for thread_id, until in threads:
+        due = Message.created_at < cutoff
+        if until is not None:
+            due = or_(due, Message.created_at <= until)
+        condition = (Message.thread_id == thread_id) & due
+        segment = _archive_messages(db, project.id, thread_id, condition, batch_size)
+        if segment:
+            segments.append(segment)
+
+    condition = (Audit.project_id == project.id) & (Audit.created_at < cutoff)
+    rows = _deleted_rows(db, Audit, AUDIT_FIELDS, condition, batch_size)
+    segment = _write_segment(db, project.id, "audit", rows)
+    if segment:
+        segments.append(segment)
+    return segments
+
+
+def remove_replaced_files(db: Session) -> None:
+    """Delete the files of segments :func:`archive_project` replaced; call after the commit."""
+    root = get_storage_root()
+    for path in db.info.pop(REPLACED_FILES, []):
+        (root / path).unlink(missing_ok=True)
+
+
+def _archive_messages(
+    db: Session, project_id: UUID, thread_id: UUID, condition: Any, batch_size: int
+) -> ArchiveSegment | None:
+    oldest = db.execute(select(func.min(Message.created_at)).where(condition)).scalar()
+    if oldest is None:
+        return None
+    replaced = [
+        segment
+        for segment in _segments(db, "messages", thread_id=thread_id)
+        if segment.max_created_at >= oldest
+    ]
+    rows: Iterable[dict[str, Any]]
+    rows = _deleted_rows(db, Message, MESSAGE_FIELDS, condition, batch_size)
+    if replaced:
+        rows = heapq.merge(_segment_rows(replaced), rows, key=itemgetter("created_at"))
+    segment = _write_segment(db, project_id, "messages", rows, thread_id)
+    for old in replaced:
+        db.delete(old)
+        db.info.setdefault(REPLACED_FILES, []).append(old.storage_path)
+    db.flush()
+    return segment
+
+
+def _deleted_rows(
+    db: Session, model: type, fields: tuple[str, ...], condition: Any, batch_size: int
+) -> Iterator[dict[str, Any]]:
+    columns = [getattr(model, field) for field in fields]
+    while True:
+        batch = select(model.id).where(condition).order_by(model.created_at).limit(batch_size)
+        rows = db.execute(
+            delete(model).where(model.id.in_(batch.scalar_subquery())).returning(*columns)
+        ).all()
+        if not rows:
+            return
+        for row in sorted(rows, key=lambda r: r.created_at):
+            yield dict(zip(fields, row))
+
+
+def _segment_rows(segments: list[ArchiveSegment]) -> Iterator[dict[str, Any]]:
+    for segment in segments:
+        for row in read_segment(segment):
+            yield {**row, "created_at": datetime.fromisoformat(row["created_at"])}
+
+
+def _write_segment(
+    db: Session,
+    project_id: UUID,
+    kind: str,
+    rows: Iterable[dict[str, Any]],
+    thread_id: UUID | None = None,
+) -> ArchiveSegment | None:
+    segment_id = uuid.uuid4()
+    relative_path = build_segment_path(project_id, kind, segment_id, thread_id)
+    target_path = get_storage_root() / relative_path
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+
+    row_count = 0
+    min_created_at: datetime | None = None
+    max_created_at: datetime | None = None
+    with gzip.open(target_path, "wt", encoding="utf-8") as fh:
+        for row in rows:
+            fh.write(json.dumps(row, default=str) + "\n")
+            row_count += 1
+            # Rows arrive in created_at order.
+            min_created_at = min_created_at or row["created_at"]
+            max_created_at = row["created_at"]
+
+    if not row_count:
+        target_path.unlink()
+        return None
+
+    segment = ArchiveSegment(
+        id=segment_id,
+        project_id=project_id,
+        thread_id=thread_id,
+        kind=kind,
+        storage_path=relative_path.as_posix(),
+        row_count=row_count,
+        min_created_at=min_created_at,
+        max_created_at=max_created_at,
+    )
+    db.add(segment)
+    db.flush()
+    return segment
+
+
+def read_segment(segment: ArchiveSegment) -> Iterator[dict[str, Any]]:
+    with gzip.open(get_storage_root() / segment.storage_path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def jsonb_contains(document: Any, pattern: Any) -> bool:
+    """Python equivalent of the JSONB ``@>`` operator, for filtering archived rows."""
+    if isinstance(pattern, dict):
+        return isinstance(document, dict) and all(
+            key in document and jsonb_contains(document[key], value)
+            for key, value in pattern.items()
+        )
+    if isinstance(pattern, list):
+        if not isinstance(document, list):
+            return False
+        return all(any(jsonb_contains(item, wanted) for item in document) for wanted in pattern)
+    return document == pattern
+
+
+def jsonb_has_keys(document: Any, keys: Iterable[str]) -> bool:
+    """Python equivalent of :func:`app.db.jsonb.has_keys`, for filtering archived rows."""
+    return isinstance(document, dict) and all(key in document for key in keys)
+
+
+def _segments(db: Session, kind: str, **filters: Any) -> list[ArchiveSegment]:
+    q = select(ArchiveSegment).where(ArchiveSegment.kind == kind)
+    for name, value in filters.items():
+        q = q.where(getattr(ArchiveSegment, name) == value)
+    return list(db.execute(q.order_by(ArchiveSegment.min_created_at)).scalars().all())
+
+
+def count_archived_messages(db: Session, thread_id: UUID) -> int:
+    total = db.execute(
+        select(func.coalesce(func.sum(ArchiveSegment.row_count), 0)).where(
+            ArchiveSegment.kind == "messages", ArchiveSegment.thread_id == thread_id
+        )
+    ).scalar_one()
+    return int(total)
+
+
+def read_archived_messages(
+    db: Session,
+    thread_id: UUID,
+    *,
+    offset: int = 0,
+    limit: int | None = None,
+    meta: dict[str, Any] | None = None,
+    meta_has: tuple[str, ...] | None = None,
+    newest_first: bool = False,
+) -> list[dict[str, Any]]:
+    """Archived messages of a thread in ``created_at`` order, or newest first.
+
+    Without a ``meta`` or ``meta_has`` filter whole segments before ``offset`` are
+    skipped using their row counts, so only the files that overlap the requested page
+    are read; with a ``limit`` reading stops once the page is full.
+    """
+    out: list[dict[str, Any]] = []
+    skip = offset
+    filtered = meta is not None or meta_has is not None
+    segments = _segments(db, "messages", thread_id=thread_id)
+    for segment in reversed(segments) if newest_first else segments:
+        if limit is not None and len(out) >= limit:
+            break
+        if not filtered and skip >= segment.row_count:
+            skip -= segment.row_count
+            continue
+        rows = read_segment(segment)
+        for row in reversed(list(rows)) if newest_first else rows:
+            if meta is not None and not jsonb_contains(row.get("meta"), meta):
+                continue
+            if meta_has is not None and not jsonb_has_keys(row.get("meta"), meta_has):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            out.append(row)
+            if limit is not None and len(out) >= limit:
+                break
+    return out
+
+
+def read_archived_audit(
+    db: Session,
+    project_id: UUID,
+    *,
+    offset: int = 0,
+    limit: int = 100,
+    thread_id: UUID | None = None,
+    action_id: UUID | None = None,
+) -> list[dict[str, Any]]:
+    """Archived audit rows of a project, newest first (matching ``/v1/audit``)."""
+    out: list[dict[str, Any]] = []
+    skip = offset
+    filtered = thread_id is not None or action_id is not None
+    for segment in reversed(_segments(db, "audit", project_id=project_id)):
+        if len(out) >= limit:
+            break
+        if not filtered and skip >= segment.row_count:
+            skip -= segment.row_count
+            continue
+        for row in reversed(list(read_segment(segment))):
+            if thread_id is not None and row.get("thread_id") != str(thread_id):
+                continue
+            if action_id is not None and row.get("action_id") != str(action_id):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            out.append(row)
+            if len(out) >= limit:
+                break
+    return out
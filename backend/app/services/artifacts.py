@@ -1,13 +1,16 @@
 import base64
 import binascii
 import os
+import uuid
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Iterable, Sequence
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import Row, Select, select
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
 
+from app.db.jsonb import has_keys
 from app.db.models import Action, Artifact, Project, Thread
 from app.schemas.artifacts import ArtifactCreate
 
@@ -44,43 +47,108 @@ def create_artifact(db: Session, payload: ArtifactCreate) -> Artifact:
     if payload.action_id and not db.get(Action, payload.action_id):
         raise LookupError("Action not found")
 
-    artifact = Artifact(
+    return store_artifact(
+        db,
         project_id=payload.project_id,
         thread_id=payload.thread_id,
         action_id=payload.action_id,
         type=payload.type,
-        storage_path="",
         filename=payload.filename,
-        metadata_=payload.metadata,
+        metadata=payload.metadata,
+        content=decode_content(payload.content_base64),
+    )
+
+
+def store_artifact(
+    db: Session,
+    *,
+    project_id: UUID,
+    thread_id: UUID | None,
+    action_id: UUID | None,
+    type: str,
+    filename: str,
+    metadata: dict[str, Any],
+    content: bytes,
+) -> Artifact:
+    """Insert an artifact row and write its content; references are not checked."""
+    # The id is assigned up front so the row is inserted once, with its storage path.
+    artifact_id = uuid.uuid4()
+    relative_path = build_storage_path(project_id, artifact_id, filename)
+    artifact = Artifact(
+        id=artifact_id,
+        project_id=project_id,
+        thread_id=thread_id,
+        action_id=action_id,
+        type=type,
+        storage_path=relative_path.as_posix(),
+        filename=filename,
+        metadata_=metadata,
         version=1,
     )
     db.add(artifact)
     db.flush()
 
-    relative_path = build_storage_path(payload.project_id, artifact.id, payload.filename)
-    write_artifact_bytes(get_storage_root(), relative_path, decode_content(payload.content_base64))
-    artifact.storage_path = relative_path.as_posix()
-
-    db.commit()
-    db.refresh(artifact)
+    write_artifact_bytes(get_storage_root(), relative_path, content)
     return artifact
 
 
+def download_url(artifact_id: UUID) -> str:
+    return f"/v1/artifacts/{artifact_id}/download"
+
+
 def list_artifacts(
     db: Session,
     project_id: UUID | None = None,
     thread_id: UUID | None = None,
     action_id: UUID | None = None,
+    metadata: dict[str, Any] | None = None,
     limit: int = 100,
+    metadata_has: tuple[str, ...] | None = None,
 ) -> Iterable[Artifact]:
-    query = select(Artifact).order_by(Artifact.created_at.desc()).limit(limit)
+    query = _filter_artifacts(
+        select(Artifact), project_id, thread_id, action_id, metadata, metadata_has, limit
+    )
+    return db.execute(query).scalars().all()
+
+
+def list_artifact_rows(
+    db: Session,
+    columns: Sequence[ColumnElement],
+    project_id: UUID | None = None,
+    thread_id: UUID | None = None,
+    action_id: UUID | None = None,
+    metadata: dict[str, Any] | None = None,
+    limit: int = 100,
+    metadata_has: tuple[str, ...] | None = None,
+) -> list[Row]:
+    """Like :func:`list_artifacts` but selects only ``columns`` as plain rows."""
+    query = _filter_artifacts(
+        select(*columns), project_id, thread_id, action_id, metadata, metadata_has, limit
+    )
+    return list(db.execute(query).all())
+
+
+def _filter_artifacts(
+    query: Select,
+    project_id: UUID | None,
+    thread_id: UUID | None,
+    action_id: UUID | None,
+    metadata: dict[str, Any] | None,
+    metadata_has: tuple[str, ...] | None,
+    limit: int,
+) -> Select:
+    query = query.order_by(Artifact.created_at.desc()).limit(limit)
     if project_id:
         query = query.where(Artifact.project_id == project_id)
     if thread_id:
         query = query.where(Artifact.thread_id == thread_id)
     if action_id:
         query = query.where(Artifact.action_id == action_id)
-    return db.execute(query).scalars().all()
+    if metadata is not None:
+        query = query.where(Artifact.metadata_.contains(metadata))
+    if metadata_has is not None:
+        query = query.where(has_keys(Artifact.metadata_, metadata_has))
+    return query
 
 
 def get_artifact(db: Session, artifact_id: UUID) -> Artifact | None:
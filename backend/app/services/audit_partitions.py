@@ -0,0 +1,173 @@
+"""Maintenance of the monthly range partitions of the ``audit`` table.
+
+Partitions are named ``audit_pYYYY_MM`` and cover ``[month, next month)``. Rows that
+fall outside every monthly partition land in ``audit_default`` so inserts never fail
+when the maintenance job has not run; creating a month's partition later moves its
+rows out of the default partition, and retention purges old rows from it as well.
+"""
+
+import re
+from datetime import date, datetime, timezone
+from typing import Literal
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+PARTITION_PREFIX = "audit_p"
+DEFAULT_PARTITION = "audit_default"
+ARCHIVE_PREFIX = "audit_archive_"
+_PARTITION_RE = re.compile(r"^audit_p(\d{4})_(\d{2})$")
+
+RetentionMode = Literal["drop", "detach"]
+
+AUDIT_COLUMNS = "id, project_id, thread_id, action_id, actor, event_type, payload, created_at"
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(value: datetime | date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def list_audit_partitions(db: Session) -> dict[date, str]:
+    """Return attached monthly partitions keyed by the first day of their month."""
+    rows = db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'audit'"
+        )
+    ).scalars()
+    partitions: dict[date, str] = {}
+    for name in rows:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def ensure_audit_partitions(
+    db: Session,
+    *,
+    months_ahead: int = 3,
+    months_back: int = 0,
+    now: datetime | None = None,
+) -> list[str]:
+    """Create missing partitions from ``months_back`` before the current month up to
+    ``months_ahead`` ahead."""
+    current = month_start(now or datetime.now(timezone.utc))
+    existing = list_audit_partitions(db)
+    created: list[str] = []
+    for offset in range(-months_back, months_ahead + 1):
+        month = add_months(current, offset)
+        if month in existing:
+            continue
+        name = partition_name(month)
+        bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        if _default_rows(db, month, add_months(month, 1)):
+            # Postgres refuses a partition whose rows already sit in the default one:
+            # build it as a plain table from those rows and attach it afterwards.
+            db.execute(text(f"CREATE TABLE {name} (LIKE audit INCLUDING DEFAULTS)"))
+            _move_default_rows(db, name, month, add_months(month, 1))
+            db.execute(text(f"ALTER TABLE audit ATTACH PARTITION {name} {bounds}"))
+        else:
+            db.execute(text(f"CREATE TABLE {name} PARTITION OF audit {bounds}"))
+        created.append(name)
+    return created
+
+
+def _default_rows(db: Session, lower: date | None, upper: date) -> bool:
+    return db.execute(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+            "WHERE created_at < :upper AND (CAST(:lower AS date) IS NULL OR created_at >= :lower))"
+        ),
+        {"lower": lower, "upper": upper},
+    ).scalar_one()
+
+
+def _move_default_rows(db: Session, table: str | None, lower: date | None, upper: date) -> int:
+    """Delete the default partition's rows in ``[lower, upper)``, copying them to ``table``."""
+    moved = (
+        f"DELETE FROM {DEFAULT_PARTITION} "
+        "WHERE created_at < :upper AND (CAST(:lower AS date) IS NULL OR created_at >= :lower) "
+        f"RETURNING {AUDIT_COLUMNS}"
+    )
+    if table is not None:
+        moved = (
+            f"WITH moved AS ({moved}) "
+            f"INSERT INTO {table} ({AUDIT_COLUMNS}) SELECT {AUDIT_COLUMNS} FROM moved"
+        )
+    return db.execute(text(moved), {"lower": lower, "upper": upper}).rowcount
+
+
+def apply_audit_retention(
+    db: Session,
+    *,
+    keep_months: int,
+    mode: RetentionMode = "drop",
+    now: datetime | None = None,
+) -> list[str]:
+    """Remove partitions that end before the retention window.
+
+    ``drop`` discards the partition outright. ``detach`` keeps its rows in a standalone
+    ``audit_archive_YYYY_MM`` table that can be dumped or moved elsewhere. Rows of the
+    default partition older than the window are deleted or moved to those tables too,
+    and reported as ``audit_default``.
+    """
+    if keep_months < 1:
+        raise ValueError("keep_months must be at least 1")
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -(keep_months - 1))
+    removed: list[str] = []
+    for month, name in sorted(list_audit_partitions(db).items()):
+        if add_months(month, 1) > cutoff:
+            continue
+        if mode == "drop":
+            db.execute(text(f"DROP TABLE {name}"))
+        else:
+            db.execute(text(f"ALTER TABLE audit DETACH PARTITION {name}"))
+            archive = f"{ARCHIVE_PREFIX}{month:%Y_%m}"
+            db.execute(text(f"ALTER TABLE {name} RENAME TO {archive}"))
+            _drop_foreign_keys(db, archive)
+        removed.append(name)
+    if _purge_default(db, cutoff, mode):
+        removed.append(DEFAULT_PARTITION)
+    return removed
+
+
+def _purge_default(db: Session, cutoff: date, mode: RetentionMode) -> int:
+    if mode == "drop":
+        return _move_default_rows(db, None, None, cutoff)
+    oldest = db.execute(text(f"SELECT min(created_at) FROM {DEFAULT_PARTITION}")).scalar()
+    if oldest is None:
+        return 0
+    purged = 0
+    month = month_start(oldest)
+    while month < cutoff:
+        if _default_rows(db, month, add_months(month, 1)):
+            archive = f"{ARCHIVE_PREFIX}{month:%Y_%m}"
+            db.execute(text(f"CREATE TABLE IF NOT EXISTS {archive} (LIKE audit INCLUDING DEFAULTS)"))
+            purged += _move_default_rows(db, archive, month, add_months(month, 1))
+        month = add_months(month, 1)
+    return purged
+
+
+def _drop_foreign_keys(db: Session, table: str) -> None:
+    # Archived rows must not pin projects/threads/actions that are deleted later.
+    constraints = db.execute(
+        text(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"
+        ),
+        {"table": table},
+    ).scalars()
+    for constraint in list(constraints):
+        db.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{constraint}"'))
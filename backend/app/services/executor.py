@@ -1,39 +1,213 @@
 from __future__ import annotations
 
-from typing import Any, Callable
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Literal
 from uuid import UUID
 
+from pydantic import TypeAdapter
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from app.core import metrics
+from app.db.instrumentation import track_queries
 from app.db.models import Action, Thread
-from app.schemas.artifacts import ArtifactCreate
+from app.schemas.artifacts import ArtifactCreate, ArtifactStorePayload
 from app.services import artifacts as artifact_service
-from app.services.executor_contract import ExecutorResult
+from app.services import result_cache
+from app.services.executor_contract import ExecutionUsage, ExecutorResult
 
 ExecutorHandler = Callable[[Session, Action], ExecutorResult]
 
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often and when a failed handler is retried.
+
+    Attempt ``n`` (counting from 1) that raises one of ``retry_on`` is retried after
+    ``base_delay * 2 ** (n - 1)`` seconds, capped at ``max_delay`` and shortened by
+    up to ``jitter`` of itself so that failures of many actions do not retry in
+    lockstep. Once ``max_attempts`` attempts failed the action is dead-lettered.
+
+    ``on_lease_expiry`` decides what the reaper does with an attempt whose worker
+    vanished: ``requeue`` treats it like a retryable failure, ``fail`` fails the
+    action. Without retries an attempt is never re-run automatically, since the
+    handler may already have had side effects.
+    """
+
+    max_attempts: int = 1
+    base_delay: float = 1.0
+    max_delay: float = 300.0
+    jitter: float = 0.5
+    # Timeouts, dropped connections, lock timeouts and deadlocks.
+    retry_on: tuple[type[BaseException], ...] = (TimeoutError, ConnectionError, OperationalError)
+    on_lease_expiry: Literal["requeue", "fail"] = "requeue"
+
+    def retryable(self, exc: BaseException) -> bool:
+        return isinstance(exc, self.retry_on)
+
+    def delay(self, attempt: int, rng: random.Random | None = None) -> float:
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return backoff * (1 - self.jitter * (rng or random).random())
+
+
+# A single attempt, failures are final.
+NO_RETRY = RetryPolicy()
+
 # Registry of action handlers by action.type
 HANDLERS: dict[str, ExecutorHandler] = {}
+RETRY_POLICIES: dict[str, RetryPolicy] = {}
+# Seconds results of deterministic handlers may be reused for identical payloads.
+CACHE_TTLS: dict[str, float] = {}
+# Validators of handler payloads, built once at registration.
+PAYLOAD_ADAPTERS: dict[str, TypeAdapter] = {}
+
+# Label of runs of unregistered action types, which all use the default stub.
+DEFAULT_HANDLER_LABEL = "default"
+# Recent runs per handler that the latency percentiles are computed over.
+STATS_WINDOW = 1000
+
+
+class HandlerStats:
+    """Run and error counts of a handler plus its latencies over the last runs.
+
+    Kept per process, like :mod:`app.core.metrics`.
+    """
+
+    def __init__(self, window: int = STATS_WINDOW) -> None:
+        self.count = 0
+        self.errors = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, *, failed: bool) -> None:
+        with self._lock:
+            self.count += 1
+            self.errors += failed
+            self._latencies.append(seconds)
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            count, errors, latencies = self.count, self.errors, sorted(self._latencies)
+        return {
+            "count": count,
+            "errors": errors,
+            "error_rate": errors / count if count else 0.0,
+            "p50_seconds": _percentile(latencies, 0.5),
+            "p95_seconds": _percentile(latencies, 0.95),
+        }
+
+
+def _percentile(ordered: list[float], fraction: float) -> float | None:
+    if not ordered:
+        return None
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+HANDLER_STATS: dict[str, HandlerStats] = {}
+_stats_lock = threading.Lock()
+
 
+def _stats_for(label: str) -> HandlerStats:
+    with _stats_lock:
+        return HANDLER_STATS.setdefault(label, HandlerStats())
 
-def register_handler(action_type: str, handler: ExecutorHandler) -> None:
+
+def register_handler(
+    action_type: str,
+    handler: ExecutorHandler,
+    *,
+    retry: RetryPolicy = NO_RETRY,
+    cache_ttl: float | None = None,
+    payload_schema: Any = None,
+) -> None:
     HANDLERS[action_type] = handler
+    RETRY_POLICIES[action_type] = retry
+    if cache_ttl:
+        CACHE_TTLS[action_type] = cache_ttl
+    else:
+        CACHE_TTLS.pop(action_type, None)
+    if payload_schema is not None:
+        PAYLOAD_ADAPTERS[action_type] = TypeAdapter(payload_schema)
+    else:
+        PAYLOAD_ADAPTERS.pop(action_type, None)
+    _payload_json_schema.cache_clear()
+
+
+def register(
+    action_type: str,
+    *,
+    retry: RetryPolicy = NO_RETRY,
+    cache_ttl: float | None = None,
+    payload_schema: Any = None,
+) -> Callable[[ExecutorHandler], ExecutorHandler]:
+    """Register executor handler for a given action_type.
 
+    ``cache_ttl`` declares the handler deterministic: its result for a ``READ``
+    action's payload is reused within the project for that many seconds instead of
+    running it again.
 
-def register(action_type: str) -> Callable[[ExecutorHandler], ExecutorHandler]:
-    """Register executor handler for a given action_type."""
+    ``payload_schema`` (a pydantic model or any type pydantic can validate) is
+    checked against the payload when an action is created, see
+    :func:`validate_payload`.
+    """
 
     def _decorator(fn: ExecutorHandler) -> ExecutorHandler:
-        register_handler(action_type, fn)
+        register_handler(
+            action_type, fn, retry=retry, cache_ttl=cache_ttl, payload_schema=payload_schema
+        )
         return fn
 
     return _decorator
 
 
+def validate_payload(action_type: str, payload: dict[str, Any]) -> None:
+    """Raise :class:`pydantic.ValidationError` if ``payload`` does not fit the handler's schema.
+
+    Action types without a registered schema accept any payload.
+    """
+    adapter = PAYLOAD_ADAPTERS.get(action_type)
+    if adapter is not None:
+        adapter.validate_python(payload)
+
+
+@lru_cache(maxsize=None)
+def _payload_json_schema(action_type: str) -> dict[str, Any]:
+    return PAYLOAD_ADAPTERS[action_type].json_schema()
+
+
+def payload_schemas() -> dict[str, dict[str, Any]]:
+    """JSON Schemas of the handlers that registered a payload schema."""
+    return {action_type: _payload_json_schema(action_type) for action_type in sorted(PAYLOAD_ADAPTERS)}
+
+
+def retry_policy(action_type: str) -> RetryPolicy:
+    return RETRY_POLICIES.get(action_type, NO_RETRY)
+
+
 def list_handlers() -> list[str]:
     return sorted(HANDLERS.keys())
 
 
+def handler_stats() -> dict[str, dict[str, Any]]:
+    """Aggregate run statistics by handler, for handlers that ran in this process."""
+    with _stats_lock:
+        stats = dict(HANDLER_STATS)
+    return {label: stats[label].summary() for label in sorted(stats)}
+
+
 @register("stub.echo")
 def _stub_echo(db: Session, action: Action) -> ExecutorResult:
     return {
@@ -43,20 +217,20 @@ def _stub_echo(db: Session, action: Action) -> ExecutorResult:
         "data": {"echo": action.payload},
     }
 
-@register("artifact.store")
+
+@register("artifact.store", retry=RetryPolicy(max_attempts=3), payload_schema=ArtifactStorePayload)
 def _artifact_store(db: Session, action: Action) -> ExecutorResult:
-    payload: dict[str, Any] = dict(action.payload or {})
-    project_id = _resolve_project_id(db, action, payload)
-    thread_id = payload.get("thread_id") or action.thread_id
+    payload = ArtifactStorePayload.model_validate(action.payload or {})
+    project_id = payload.project_id or _resolve_project_id(db, action)
 
     artifact_payload = ArtifactCreate(
         project_id=project_id,
-        thread_id=thread_id,
+        thread_id=payload.thread_id or action.thread_id,
         action_id=action.id,
-        type=payload["type"],
-        filename=payload["filename"],
-        content_base64=payload["content_base64"],
-        metadata=payload.get("metadata") or {},
+        type=payload.type,
+        filename=payload.filename,
+        content_base64=payload.content_base64,
+        metadata=payload.metadata,
     )
     artifact = artifact_service.create_artifact(db, artifact_payload)
     return {
@@ -79,15 +253,73 @@ def _default_stub(db: Session, action: Action) -> ExecutorResult:
     }
 
 
+def _peak_rss_bytes() -> int:
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
 def execute(db: Session, action: Action) -> ExecutorResult:
+    """Run the handler of ``action`` and attach the resources it used as ``usage``.
+
+    Every run is also recorded in the per-handler metrics and in
+    :data:`HANDLER_STATS`, whether it succeeded or raised.
+    """
     handler = HANDLERS.get(action.type, _default_stub)
-    return handler(db, action)
+    label = action.type if action.type in HANDLERS else DEFAULT_HANDLER_LABEL
+    started, cpu_started, rss_started = time.perf_counter(), time.thread_time(), _peak_rss_bytes()
+    outcome = "error"
+    try:
+        with track_queries() as queries:
+            result = handler(db, action)
+        outcome = "ok"
+    finally:
+        wall_seconds = time.perf_counter() - started
+        cpu_seconds = time.thread_time() - cpu_started
+        rss_delta = max(_peak_rss_bytes() - rss_started, 0)
+        labels = {"handler": label, "outcome": outcome}
+        metrics.EXECUTION_LATENCY.observe(wall_seconds, **labels)
+        metrics.EXECUTION_CPU.observe(cpu_seconds, **labels)
+        metrics.EXECUTION_DB_STATEMENTS.observe(queries.statements, **labels)
+        metrics.EXECUTION_RSS_GROWTH.observe(rss_delta, **labels)
+        _stats_for(label).record(wall_seconds, failed=outcome == "error")
+    result_bytes = len(json.dumps(result, default=str).encode())
+    metrics.EXECUTION_RESULT_BYTES.observe(result_bytes, handler=label)
+    usage: ExecutionUsage = {
+        "wall_seconds": round(wall_seconds, 6),
+        "cpu_seconds": round(cpu_seconds, 6),
+        "peak_rss_delta_bytes": rss_delta,
+        "db_statements": queries.statements,
+        "result_bytes": result_bytes,
+    }
+    return {**result, "usage": usage}
+
+
+def execute_cached(
+    db: Session, action: Action, *, project_id: UUID | None
+) -> tuple[ExecutorResult, bool]:
+    """Like :func:`execute`, but serves ``READ`` actions of cacheable handlers from the result cache.
+
+    Results are only shared between actions of ``project_id``. Returns the result
+    and whether it was a cache hit.
+    """
+    ttl = CACHE_TTLS.get(action.type) if action.type in HANDLERS else None
+    if not ttl or action.policy_mode != "READ" or project_id is None:
+        return execute(db, action), False
+    key = result_cache.result_key(project_id, action.type, action.payload)
+    cached = result_cache.lookup(db, key)
+    if cached is not None:
+        return {**cached, "action_id": str(action.id)}, True
+    result = execute(db, action)
+    # A hit uses no resources worth reporting; the original run's usage would mislead.
+    cacheable = {name: value for name, value in result.items() if name != "usage"}
+    result_cache.store(db, key, action.type, cacheable, ttl)
+    return result, False
 
 
-def _resolve_project_id(db: Session, action: Action, payload: dict[str, Any]) -> UUID:
-    project_id = payload.get("project_id")
-    if project_id:
-        return project_id
+def _resolve_project_id(db: Session, action: Action) -> UUID:
     thread = db.get(Thread, action.thread_id)
     if not thread:
         raise LookupError("Thread not found")
@@ -7,12 +7,24 @@ from sqlalchemy.orm import Session
 from app.db.models import Action
 
 
+class ExecutionUsage(TypedDict):
+    """Resources one handler run consumed, measured by the executor."""
+
+    wall_seconds: float
+    cpu_seconds: float
+    # Growth of the process' peak RSS; concurrent runs share the process.
+    peak_rss_delta_bytes: int
+    db_statements: int
+    result_bytes: int
+
+
 class ExecutorResult(TypedDict, total=False):
     type: str
     action_id: str
     status: str
     data: dict[str, Any]
     error: str
+    usage: ExecutionUsage
 
 
 class Executor(Protocol):
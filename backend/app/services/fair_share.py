@@ -0,0 +1,93 @@
+"""Priorities and fair sharing of action execution between projects.
+
+Claimers take the due actions of a project by ``priority`` (higher first) and
+interleave projects by weighted fair queuing: the ``k``-th due action of a
+project is ranked at ``k / weight``. With equal weights projects take turns, so a
+project that queued thousands of actions delays another project's next action by
+at most one turn; a project of weight 2 gets two turns for every one of a project
+of weight 1.
+
+Projects configure their share in ``Project.settings``:
+
+* ``execution_weight``: the project's weight, 1 by default.
+* ``max_concurrent_actions``: how many of its actions may be ``EXECUTING`` at
+  once, unlimited by default. Claimers leave the excess due; concurrent claimers
+  may overshoot the cap by the size of a claim.
+"""
+
+from typing import Any, Collection
+from uuid import UUID
+
+from sqlalchemy import ColumnElement, func, select, true
+from sqlalchemy.orm import Session
+
+from app.db.models import Action, Project, Thread
+
+WEIGHT_SETTING = "execution_weight"
+CONCURRENCY_SETTING = "max_concurrent_actions"
+DEFAULT_WEIGHT = 1.0
+# Keeps a zero or negative weight from dividing by zero or jumping the queue.
+MIN_WEIGHT = 0.01
+
+
+def project_weight(settings: dict[str, Any] | None) -> float:
+    return max(float((settings or {}).get(WEIGHT_SETTING, DEFAULT_WEIGHT)), MIN_WEIGHT)
+
+
+def project_concurrency(settings: dict[str, Any] | None) -> int | None:
+    cap = (settings or {}).get(CONCURRENCY_SETTING)
+    return None if cap is None else int(cap)
+
+
+def fair_claim(
+    db: Session,
+    due: ColumnElement[bool],
+    due_at: ColumnElement,
+    *,
+    limit: int,
+    exclude_projects: Collection[UUID] = (),
+) -> list[Action]:
+    """Lock up to ``limit`` actions matching ``due`` in fair-share order, skipping locked ones.
+
+    Within a project ``due_at`` breaks ties between actions of equal priority.
+    Actions of ``exclude_projects`` are not claimed.
+
+    The ``EXECUTING`` actions are counted once per project, and every project then
+    contributes at most ``limit`` (or its free slots, if fewer) of its due actions,
+    read through its threads. Only those candidates are ranked against each other,
+    never the whole backlog.
+    """
+    running = (
+        select(Thread.project_id.label("project_id"), func.count().label("running"))
+        .join(Action, Action.thread_id == Thread.id)
+        .where(Action.status == "EXECUTING")
+        .group_by(Thread.project_id)
+        .subquery("running")
+    )
+    free = Project.settings[CONCURRENCY_SETTING].as_integer() - func.coalesce(running.c.running, 0)
+    order = (Action.priority.desc(), due_at, Action.created_at)
+    top = (
+        select(Action.id.label("id"), func.row_number().over(order_by=order).label("rank"))
+        .join(Thread, Thread.id == Action.thread_id)
+        .where(Thread.project_id == Project.id, due)
+        .order_by(*order)
+        .limit(func.greatest(func.least(free, limit), 0))
+        .correlate(Project)
+        .lateral("top")
+    )
+    weight = func.greatest(
+        func.coalesce(Project.settings[WEIGHT_SETTING].as_float(), DEFAULT_WEIGHT), MIN_WEIGHT
+    )
+    query = (
+        select(Action)
+        .select_from(Project)
+        .outerjoin(running, running.c.project_id == Project.id)
+        .join(top, true())
+        .join(Action, Action.id == top.c.id)
+        .order_by(top.c.rank / weight, Action.priority.desc(), due_at)
+        .limit(limit)
+        .with_for_update(of=Action, skip_locked=True)
+    )
+    if exclude_projects:
+        query = query.where(Project.id.not_in(exclude_projects))
+    return list(db.execute(query).scalars().all())
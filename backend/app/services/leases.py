@@ -0,0 +1,105 @@
+"""Leases on executing actions.
+
+An action entering ``EXECUTING`` is leased to the worker running it for
+``ACTION_LEASE_SECONDS`` and the lease is committed before the handler starts. Handlers that run longer call :func:`heartbeat` to
+extend the lease. :func:`expired_leases` finds attempts whose worker stopped
+heartbeating (it crashed or was killed during a deploy). The reaper then hands
+them to :func:`app.services.actions.reap_action`.
+"""
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Collection
+from uuid import UUID
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models import Action, Thread
+
+ACTION_LEASE_SECONDS_ENV = "ACTION_LEASE_SECONDS"
+DEFAULT_LEASE_SECONDS = 300.0
+
+# Identifies this process as lease owner; unique across restarts.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseLost(RuntimeError):
+    """The action was reaped or taken over while this worker was running it."""
+
+
+def lease_seconds() -> float:
+    return float(os.getenv(ACTION_LEASE_SECONDS_ENV, DEFAULT_LEASE_SECONDS))
+
+
+def acquire(action: Action, *, seconds: float | None = None) -> None:
+    action.lease_owner = WORKER_ID
+    action.lease_expires_at = datetime.now(timezone.utc) + timedelta(
+        seconds=seconds or lease_seconds()
+    )
+
+
+def release(action: Action) -> None:
+    action.lease_owner = None
+    action.lease_expires_at = None
+
+
+def heartbeat(db: Session, action: Action, *, seconds: float | None = None) -> datetime:
+    """Extend this worker's lease on ``action``; raises :class:`LeaseLost` if it is gone.
+
+    The extension commits in a short transaction of its own on ``db``'s database,
+    so the reaper sees it while the handler's own transaction is still open.
+    """
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=seconds or lease_seconds())
+    with Session(bind=db.get_bind()) as lease_db, lease_db.begin():
+        extended = lease_db.execute(
+            update(Action)
+            .where(
+                Action.id == action.id,
+                Action.status == "EXECUTING",
+                Action.lease_owner == WORKER_ID,
+            )
+            .values(lease_expires_at=expires_at)
+            .returning(Action.lease_expires_at)
+        ).scalar()
+    if extended is None:
+        raise LeaseLost(f"Lease on action {action.id} was lost")
+    action.lease_expires_at = extended
+    return extended
+
+
+def lease_expired(action: Action, *, now: datetime | None = None) -> bool:
+    expires_at = action.lease_expires_at
+    return expires_at is None or expires_at < (now or datetime.now(timezone.utc))
+
+
+def expired_leases(
+    db: Session,
+    *,
+    now: datetime | None = None,
+    limit: int = 100,
+    exclude_projects: Collection[UUID] = (),
+) -> list[Action]:
+    """Lock up to ``limit`` EXECUTING actions whose lease ran out, skipping locked ones.
+
+    Committed EXECUTING rows without a lease predate leases and are orphans too.
+    """
+    query = (
+        select(Action)
+        .where(
+            Action.status == "EXECUTING",
+            or_(
+                Action.lease_expires_at < (now or datetime.now(timezone.utc)),
+                Action.lease_expires_at.is_(None),
+            ),
+        )
+        .order_by(Action.lease_expires_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if exclude_projects:
+        excluded_threads = select(Thread.id).where(Thread.project_id.in_(exclude_projects))
+        query = query.where(Action.thread_id.not_in(excluded_threads))
+    return list(db.execute(query).scalars().all())
@@ -0,0 +1,236 @@
+import html
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Iterable, Sequence
+from uuid import UUID
+
+from psycopg.types.json import Jsonb
+from sqlalchemy import Row, Select, func, insert, literal_column, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.jsonb import has_keys
+from app.db.models import Message, Thread
+from app.services import archive as archive_service
+
+BULK_COLUMNS = ("id", "thread_id", "channel", "role", "content", "meta", "created_at")
+
+# Must match the expression of ix_messages_content_fts for the GIN index to be used.
+SEARCH_CONFIG = literal_column("'simple'::regconfig")
+# ts_headline copies the content verbatim, so matches are delimited with private-use
+# characters and the snippet is HTML-escaped before they become <mark> tags.
+SNIPPET_START, SNIPPET_STOP = "\ue000", "\ue001"
+SNIPPET_OPTIONS = (
+    f"StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, MaxWords=35, MinWords=15, MaxFragments=2"
+)
+
+
+def highlight_snippet(headline: str) -> str:
+    """HTML-escape a ``ts_headline`` result and mark its matches with ``<mark>``."""
+    escaped = html.escape(headline, quote=False)
+    return escaped.replace(SNIPPET_START, "<mark>").replace(SNIPPET_STOP, "</mark>")
+
+
+def build_message_row(thread_id: UUID, row: Any) -> dict[str, Any]:
+    return {
+        "id": uuid.uuid4(),
+        "thread_id": thread_id,
+        "channel": row.channel,
+        "role": row.role,
+        "content": row.content,
+        "meta": row.meta,
+        "created_at": row.created_at or datetime.now(timezone.utc),
+    }
+
+
+def missing_thread_ids(db: Session, thread_ids: Iterable[UUID]) -> set[UUID]:
+    wanted = set(thread_ids)
+    if not wanted:
+        return set()
+    found = db.execute(select(Thread.id).where(Thread.id.in_(wanted))).scalars().all()
+    return wanted - set(found)
+
+
+def insert_messages(db: Session, rows: list[dict[str, Any]]) -> int:
+    """Load a chunk of message rows in one round-trip.
+
+    Uses ``COPY ... FROM STDIN`` when the session runs on psycopg and falls back to a
+    multi-row INSERT for other drivers. The caller owns the transaction.
+    """
+    if not rows:
+        return 0
+    connection = db.connection()
+    if connection.dialect.driver == "psycopg":
+        raw = connection.connection.driver_connection
+        columns = ", ".join(BULK_COLUMNS)
+        with raw.cursor() as cursor:
+            with cursor.copy(f"COPY messages ({columns}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(
+                        (
+                            row["id"],
+                            row["thread_id"],
+                            row["channel"],
+                            row["role"],
+                            row["content"],
+                            Jsonb(row["meta"]),
+                            row["created_at"],
+                        )
+                    )
+    else:
+        db.execute(insert(Message), rows)
+    return len(rows)
+
+
+def list_thread_messages(
+    db: Session,
+    thread_id: UUID,
+    columns: Sequence[ColumnElement],
+    *,
+    meta: dict[str, Any] | None = None,
+    meta_has: tuple[str, ...] | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    newest_first: bool = False,
+) -> tuple[list[dict[str, Any]], list[Row]]:
+    """Archived and hot messages of a thread, both in ``created_at`` order or both
+    newest first.
+
+    The archive only holds rows older than every hot row of the thread (see
+    :func:`app.services.archive.archive_project`), so a page is served from the
+    archive, the hot table, or the seam between the two. Newest first, the hot rows
+    come first and the archive is only read for pages that run past them. Archived
+    rows come back as decoded JSON dicts, hot rows as ``columns`` tuples.
+    """
+    if newest_first:
+        return _list_newest_first(db, thread_id, columns, meta, meta_has, limit, offset)
+
+    archived: list[dict[str, Any]] = []
+    hot_offset = offset
+    archived_total = archive_service.count_archived_messages(db, thread_id)
+    if archived_total:
+        if meta is None and meta_has is None:
+            if offset < archived_total:
+                archived = archive_service.read_archived_messages(
+                    db, thread_id, offset=offset, limit=limit
+                )
+            hot_offset = max(0, offset - archived_total)
+        else:
+            # Matches up to the end of the page; fewer means the archive ran out.
+            matching = archive_service.read_archived_messages(
+                db,
+                thread_id,
+                meta=meta,
+                meta_has=meta_has,
+                limit=None if limit is None else offset + limit,
+            )
+            archived = matching[offset:]
+            hot_offset = max(0, offset - len(matching))
+
+    remaining = None if limit is None else limit - len(archived)
+    if remaining == 0:
+        return archived, []
+    rows = db.execute(_hot_messages(columns, thread_id, meta, meta_has, hot_offset, remaining)).all()
+    return archived, list(rows)
+
+
+def _list_newest_first(
+    db: Session,
+    thread_id: UUID,
+    columns: Sequence[ColumnElement],
+    meta: dict[str, Any] | None,
+    meta_has: tuple[str, ...] | None,
+    limit: int | None,
+    offset: int,
+) -> tuple[list[dict[str, Any]], list[Row]]:
+    q = _hot_messages(columns, thread_id, meta, meta_has, offset, limit, newest_first=True)
+    rows = list(db.execute(q).all())
+    remaining = None if limit is None else limit - len(rows)
+    if remaining == 0:
+        return [], rows
+    if rows or not offset:
+        archive_offset = 0
+    else:
+        # The page starts past the hot rows; skip the rest of the offset in the archive.
+        hot_total = db.execute(
+            select(func.count()).select_from(q.order_by(None).offset(None).limit(None).subquery())
+        ).scalar_one()
+        archive_offset = offset - hot_total
+    archived = archive_service.read_archived_messages(
+        db,
+        thread_id,
+        offset=archive_offset,
+        limit=remaining,
+        meta=meta,
+        meta_has=meta_has,
+        newest_first=True,
+    )
+    return archived, rows
+
+
+def _hot_messages(
+    columns: Sequence[ColumnElement],
+    thread_id: UUID,
+    meta: dict[str, Any] | None,
+    meta_has: tuple[str, ...] | None,
+    offset: int,
+    limit: int | None,
+    *,
+    newest_first: bool = False,
+) -> Select:
+    order = Message.created_at.desc() if newest_first else Message.created_at
+    q = select(*columns).where(Message.thread_id == thread_id).order_by(order)
+    if meta is not None:
+        q = q.where(Message.meta.contains(meta))
+    if meta_has is not None:
+        q = q.where(has_keys(Message.meta, meta_has))
+    if offset:
+        q = q.offset(offset)
+    if limit is not None:
+        q = q.limit(limit)
+    return q
+
+
+def search_messages(
+    db: Session,
+    *,
+    project_id: UUID,
+    query: str,
+    channel: str | None = None,
+    role: str | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> list[tuple[Message, float, str]]:
+    """Rank messages of a project against a web-search style query.
+
+    Matching and ranking run on the page-sized inner query; snippets are only
+    highlighted for the rows that are returned.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    tsvector = func.to_tsvector(SEARCH_CONFIG, Message.content)
+    rank = func.ts_rank_cd(tsvector, tsquery).label("rank")
+
+    hits = (
+        select(Message.id.label("id"), rank)
+        .join(Thread, Thread.id == Message.thread_id)
+        .where(Thread.project_id == project_id, tsvector.op("@@")(tsquery))
+        .order_by(rank.desc(), Message.created_at.desc(), Message.id)
+        .limit(limit)
+        .offset(offset)
+    )
+    if channel:
+        hits = hits.where(Message.channel == channel)
+    if role:
+        hits = hits.where(Message.role == role)
+    hits = hits.subquery()
+
+    snippet = func.ts_headline(SEARCH_CONFIG, Message.content, tsquery, SNIPPET_OPTIONS)
+    stmt = (
+        select(Message, hits.c.rank, snippet.label("snippet"))
+        .join(hits, hits.c.id == Message.id)
+        .order_by(hits.c.rank.desc(), Message.created_at.desc(), Message.id)
+    )
+    return [
+        (message, rank, highlight_snippet(headline))
+        for message, rank, headline in db.execute(stmt).tuples()
+    ]
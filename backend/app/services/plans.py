@@ -0,0 +1,178 @@
+"""Plans: the dependency graph of the actions of one thread.
+
+:func:`run_plan` executes every approved action whose dependencies are ``DONE``,
+up to ``max_parallel`` at a time. A new action is started as soon as its last
+dependency finishes, so a plan takes as long as its critical path. Each action
+runs in a session of its own and commits on its own. Its handler runs without
+holding a pooled connection (see :func:`app.services.actions._run_attempt`), so
+``max_parallel`` may exceed the pool size for handlers that do not query.
+Failure and cancellation of an action cancel its dependents (see
+:func:`app.services.actions._cancel_dependents`). Actions are not started while
+the project is being moved to another shard.
+
+An action that is left in ``RETRYING`` ends the run for its branch. The
+scheduler retries it later, and calling :func:`run_plan` again picks up the
+branch from there.
+
+:func:`run_plan` reads the graph once and follows the outcomes of the actions it
+starts in memory, so it issues a fixed number of statements on the caller's
+session however large the plan is. It ends the caller's transaction before the
+first action starts, so a request that runs a plan does not keep a connection
+idle in a transaction for as long as the plan takes.
+"""
+
+import os
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Row, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db import sharding
+from app.db.models import Action, ActionDependency, Project, Thread
+from app.services import actions as actions_service
+from app.services import fair_share
+
+PLAN_MAX_PARALLEL_ENV = "PLAN_MAX_PARALLEL"
+DEFAULT_PLAN_MAX_PARALLEL = 8
+
+TERMINAL_STATUSES = frozenset({"DONE", "CANCELED"})
+FAILED_STATUSES = frozenset({"FAILED", "DEAD_LETTER"})
+
+
+def plan_max_parallel() -> int:
+    return int(os.getenv(PLAN_MAX_PARALLEL_ENV, DEFAULT_PLAN_MAX_PARALLEL))
+
+
+def plan_status(statuses: list[str]) -> str:
+    """Overall status of a plan from the statuses of its actions."""
+    if any(status in FAILED_STATUSES for status in statuses):
+        return "FAILED"
+    if all(status in TERMINAL_STATUSES for status in statuses):
+        return "DONE"
+    if any(status in ("EXECUTING", "RETRYING") for status in statuses):
+        return "RUNNING"
+    # Some actions are DONE and the rest wait for approval, their run_at or a run.
+    return "PENDING"
+
+
+def _plan_graph(db: Session, thread_id: UUID) -> tuple[list[Row], dict[UUID, list[UUID]]]:
+    """The thread's actions in creation order and the dependencies of each."""
+    actions = db.execute(
+        select(
+            Action.id,
+            Action.type,
+            Action.status,
+            Action.policy_mode,
+            Action.run_at,
+            Action.priority,
+        )
+        .where(Action.thread_id == thread_id)
+        .order_by(Action.created_at)
+    ).all()
+    edges = db.execute(
+        select(ActionDependency.action_id, ActionDependency.depends_on_id)
+        .join(Action, Action.id == ActionDependency.action_id)
+        .where(Action.thread_id == thread_id)
+    ).all()
+    depends_on: dict[UUID, list[UUID]] = {}
+    for action_id, depends_on_id in edges:
+        depends_on.setdefault(action_id, []).append(depends_on_id)
+    return list(actions), depends_on
+
+
+def describe_plan(db: Session, thread_id: UUID) -> dict[str, Any]:
+    actions, depends_on = _plan_graph(db, thread_id)
+    statuses = [row.status for row in actions]
+    return {
+        "thread_id": thread_id,
+        "status": plan_status(statuses),
+        "counts": dict(Counter(statuses)),
+        "actions": [
+            {
+                "id": row.id,
+                "type": row.type,
+                "status": row.status,
+                "depends_on": depends_on.get(row.id, []),
+            }
+            for row in actions
+        ],
+    }
+
+
+def ready_actions(
+    actions: list[Row], depends_on: dict[UUID, list[UUID]], statuses: dict[UUID, str]
+) -> list[UUID]:
+    """Approved actions that may run now, by priority, then oldest first.
+
+    ``statuses`` holds the current status of every action of the plan.
+    """
+    now = datetime.now(timezone.utc)
+    ready = [
+        row
+        for row in actions
+        if statuses[row.id] == "APPROVED"
+        and row.policy_mode in actions_service.RUNNABLE_POLICY_MODES
+        and (row.run_at is None or row.run_at <= now)
+        and all(statuses.get(dep) == "DONE" for dep in depends_on.get(row.id, ()))
+    ]
+    # ``actions`` is in creation order and the sort is stable.
+    return [row.id for row in sorted(ready, key=lambda row: -row.priority)]
+
+
+def _run_action(
+    session_factory: sessionmaker, action_id: UUID, shard: str, project_id: UUID | None
+) -> str | None:
+    with session_factory() as db:
+        action = db.get(Action, action_id, with_for_update={"skip_locked": True})
+        # Someone else (the scheduler, another plan run) got to it first.
+        if action is None or action.status != "APPROVED":
+            return None
+        # The project started moving to another shard since the plan was started.
+        if project_id is not None and not sharding.serves_project(shard, project_id):
+            return None
+        actions_service.execute_action(db, action=action)
+        db.commit()
+        return action.status
+
+
+def run_plan(db: Session, thread_id: UUID, *, max_parallel: int | None = None) -> dict[str, Any]:
+    """Run the ready actions of a thread until none are left; returns the plan.
+
+    The project's ``max_concurrent_actions`` setting caps ``max_parallel``. Commits
+    ``db`` before the first action starts; the plan is described with it at the end.
+    """
+    session_factory = sessionmaker(bind=db.get_bind(), autoflush=False, autocommit=False)
+    shard = db.info.get("shard", sharding.DEFAULT_SHARD)
+    project_id, settings = db.execute(
+        select(Project.id, Project.settings)
+        .join(Thread, Thread.project_id == Project.id)
+        .where(Thread.id == thread_id)
+    ).one_or_none() or (None, None)
+    max_parallel = max_parallel or plan_max_parallel()
+    cap = fair_share.project_concurrency(settings)
+    if cap is not None:
+        max_parallel = max(min(max_parallel, cap), 1)
+    actions, depends_on = _plan_graph(db, thread_id)
+    db.commit()
+    statuses = {row.id: row.status for row in actions}
+    submitted: set[UUID] = set()
+    running: dict[Future, UUID] = {}
+    with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+        while True:
+            for action_id in ready_actions(actions, depends_on, statuses):
+                if action_id not in submitted:
+                    submitted.add(action_id)
+                    future = pool.submit(_run_action, session_factory, action_id, shard, project_id)
+                    running[future] = action_id
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                action_id = running.pop(future)
+                # None: someone else ran it; its dependents are left to them.
+                statuses[action_id] = future.result() or statuses[action_id]
+    return describe_plan(db, thread_id)
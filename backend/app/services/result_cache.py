@@ -0,0 +1,123 @@
+"""Memoized results of deterministic handlers.
+
+Handlers opt in with ``register(..., cache_ttl=seconds)``; only ``READ`` actions
+are served from the cache. Results are keyed by the project, the action type and
+a canonical hash of the payload, so one project never sees another's results. They are kept in a bounded
+in-process LRU (``RESULT_CACHE_SIZE`` entries) and, with ``RESULT_CACHE_SHARED=1``,
+also in the unlogged ``handler_results`` table so that all API processes and
+schedulers share hits. Only successful results are cached.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.models import HandlerResult
+
+RESULT_CACHE_SIZE_ENV = "RESULT_CACHE_SIZE"
+RESULT_CACHE_SHARED_ENV = "RESULT_CACHE_SHARED"
+
+DEFAULT_RESULT_CACHE_SIZE = 1024
+
+
+def result_key(project_id: UUID, action_type: str, payload: dict[str, Any] | None) -> str:
+    canonical = json.dumps(
+        [str(project_id), action_type, payload or {}],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def shared_cache_enabled() -> bool:
+    return os.getenv(RESULT_CACHE_SHARED_ENV, "0").lower() in ("1", "true", "yes")
+
+
+class LocalResultCache:
+    """Thread-safe LRU of results with a per-entry expiry."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, result: dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+LOCAL_CACHE = LocalResultCache(
+    int(os.getenv(RESULT_CACHE_SIZE_ENV, DEFAULT_RESULT_CACHE_SIZE))
+)
+
+
+def lookup(db: Session, key: str) -> dict[str, Any] | None:
+    result = LOCAL_CACHE.get(key)
+    if result is not None or not shared_cache_enabled():
+        return result
+    row = db.execute(
+        select(HandlerResult.result, HandlerResult.expires_at).where(
+            HandlerResult.key == key, HandlerResult.expires_at > datetime.now(timezone.utc)
+        )
+    ).first()
+    if row is None:
+        return None
+    remaining = (row.expires_at - datetime.now(timezone.utc)).total_seconds()
+    LOCAL_CACHE.put(key, row.result, remaining)
+    return row.result
+
+
+def store(db: Session, key: str, action_type: str, result: dict[str, Any], ttl: float) -> None:
+    LOCAL_CACHE.put(key, result, ttl)
+    if not shared_cache_enabled():
+        return
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+    statement = insert(HandlerResult).values(
+        key=key, action_type=action_type, result=result, expires_at=expires_at
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[HandlerResult.key],
+            set_={"result": statement.excluded.result, "expires_at": statement.excluded.expires_at},
+        )
+    )
+
+
+def purge_expired(db: Session) -> int:
+    """Delete expired rows of the shared cache; returns how many were removed."""
+    deleted = db.execute(
+        delete(HandlerResult).where(HandlerResult.expires_at <= datetime.now(timezone.utc))
+    )
+    return deleted.rowcount
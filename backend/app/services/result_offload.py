@@ -0,0 +1,85 @@
+"""Offload of large action results to artifacts.
+
+A result whose JSON exceeds ``RESULT_INLINE_MAX_BYTES`` (64 KiB by default) is
+written to an artifact of the action. ``action.result`` then keeps its small
+top-level fields and replaces ``data`` with a reference and a summary::
+
+    {"status": "executed", ..., "offloaded": {"artifact_id": ..., "bytes": ...,
+     "download_url": ..., "summary": {"keys": [...], "preview": "..."}}}
+
+This keeps big results out of the ``actions`` row, its TOAST and WAL, and out of
+action listings. ``GET /v1/actions/{id}?result=inline`` returns the full result.
+"""
+
+import json
+import os
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.db.models import Action, Artifact
+from app.services import artifacts as artifact_service
+
+RESULT_INLINE_MAX_BYTES_ENV = "RESULT_INLINE_MAX_BYTES"
+DEFAULT_INLINE_MAX_BYTES = 64 * 1024
+OFFLOAD_KEY = "offloaded"
+RESULT_ARTIFACT_TYPE = "application/json"
+SUMMARY_MAX_KEYS = 50
+PREVIEW_CHARS = 512
+
+
+def inline_max_bytes() -> int:
+    return int(os.getenv(RESULT_INLINE_MAX_BYTES_ENV, DEFAULT_INLINE_MAX_BYTES))
+
+
+def summarize(data: Any, encoded: str) -> dict[str, Any]:
+    summary: dict[str, Any] = {"preview": encoded[:PREVIEW_CHARS]}
+    if isinstance(data, dict):
+        summary["keys"] = sorted(data)[:SUMMARY_MAX_KEYS]
+    elif isinstance(data, list):
+        summary["items"] = len(data)
+    return summary
+
+
+def offload_result(
+    db: Session, action: Action, result: dict[str, Any], *, project_id: UUID
+) -> dict[str, Any]:
+    """Return ``result``, or its inline stand-in once it was written to an artifact."""
+    limit = inline_max_bytes()
+    measured = (result.get("usage") or {}).get("result_bytes")
+    if measured is not None and measured <= limit:
+        return result
+    encoded = json.dumps(result, default=str)
+    content = encoded.encode()
+    if len(content) <= limit:
+        return result
+    artifact = artifact_service.store_artifact(
+        db,
+        project_id=project_id,
+        thread_id=action.thread_id,
+        action_id=action.id,
+        type=RESULT_ARTIFACT_TYPE,
+        filename=f"result-{action.id}.json",
+        metadata={"kind": "action_result", "attempt": action.attempts},
+        content=content,
+    )
+    inline = {name: value for name, value in result.items() if name != "data"}
+    inline[OFFLOAD_KEY] = {
+        "artifact_id": str(artifact.id),
+        "bytes": len(content),
+        "download_url": artifact_service.download_url(artifact.id),
+        "summary": summarize(result.get("data"), encoded),
+    }
+    return inline
+
+
+def offloaded_artifact_id(result: dict[str, Any] | None) -> UUID | None:
+    reference = (result or {}).get(OFFLOAD_KEY)
+    if not isinstance(reference, dict) or "artifact_id" not in reference:
+        return None
+    return UUID(reference["artifact_id"])
+
+
+def load_result(artifact: Artifact) -> dict[str, Any]:
+    return json.loads(artifact_service.get_artifact_file_path(artifact).read_bytes())
@@ -0,0 +1,113 @@
+"""Five-field cron expressions (``minute hour day-of-month month day-of-week``, UTC).
+
+Fields accept ``*``, numbers, ranges (``1-5``), steps (``*/15``, ``10-50/10``) and
+comma-separated lists of those. Day of week runs from 0 (Sunday) to 6, 7 is also
+Sunday. As in cron, a restricted day of month and day of week match when either
+one matches.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+FIELD_NAMES = ("minute", "hour", "day of month", "month", "day of week")
+
+# Enough to find the next match of any valid expression (Feb 29 on a given weekday
+# can be up to 28 years away).
+SEARCH_YEARS = 30
+
+
+class InvalidSchedule(ValueError):
+    pass
+
+
+def _parse_field(raw: str, name: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in raw.split(","):
+        base, _, step_raw = part.partition("/")
+        try:
+            step = int(step_raw) if step_raw else 1
+            if base == "*":
+                start, end = low, high
+            elif "-" in base:
+                start, end = (int(bound) for bound in base.split("-", 1))
+            else:
+                start = end = int(base)
+                if step_raw:
+                    end = high
+        except ValueError as exc:
+            raise InvalidSchedule(f"Invalid {name} field {raw!r}") from exc
+        if step < 1 or not low <= start <= end <= high:
+            raise InvalidSchedule(f"Invalid {name} field {raw!r}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@dataclass(frozen=True)
+class Schedule:
+    minutes: frozenset[int]
+    hours: frozenset[int]
+    days: frozenset[int]
+    months: frozenset[int]
+    weekdays: frozenset[int]
+    any_day: bool
+    any_weekday: bool
+
+    @classmethod
+    def parse(cls, expression: str) -> "Schedule":
+        fields = expression.split()
+        if len(fields) != 5:
+            raise InvalidSchedule("A schedule needs 5 fields: minute hour day month weekday")
+        minutes, hours, days, months, weekdays = (
+            _parse_field(raw, name, low, high)
+            for raw, name, (low, high) in zip(fields, FIELD_NAMES, FIELD_RANGES)
+        )
+        return cls(
+            minutes=minutes,
+            hours=hours,
+            days=days,
+            months=months,
+            weekdays=frozenset(day % 7 for day in weekdays),
+            any_day=fields[2] == "*",
+            any_weekday=fields[4] == "*",
+        )
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after ``moment``."""
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        candidate = moment.astimezone(timezone.utc).replace(second=0, microsecond=0)
+        candidate += timedelta(minutes=1)
+        limit = candidate.year + SEARCH_YEARS
+        while candidate.year <= limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(
+                    year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise InvalidSchedule("Schedule never matches")
+
+
+def next_run(expression: str, after: datetime) -> datetime:
+    return Schedule.parse(expression).next_after(after)
+
+
+def validate_schedule(expression: str) -> str:
+    schedule = Schedule.parse(expression)
+    schedule.next_after(datetime.now(timezone.utc))
+    return " ".join(expression.split())
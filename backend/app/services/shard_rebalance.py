@@ -0,0 +1,165 @@
+"""Move a project, with all of its rows, from one shard to another.
+
+The move keeps the project readable throughout:
+
+1. the directory entry is marked ``moving``; writes to the project now get a 503
+   with ``Retry-After`` while reads still go to the source shard;
+2. after the routing caches expire, every table is streamed from the source to the
+   target with ``COPY`` and the row counts are compared;
+3. the directory entry is flipped to the target shard and marked ``active``;
+4. once the caches expired again the rows are deleted from the source.
+
+A failed copy rolls the target back and re-activates the project on the source.
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable
+from uuid import UUID
+
+from sqlalchemy import Table, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db import sharding
+from app.db.engine import get_sessionmaker
+from app.db.models import (
+    Action,
+    ActionDependency,
+    ArchiveSegment,
+    Artifact,
+    Audit,
+    Message,
+    Project,
+    ProjectShard,
+    Thread,
+)
+from app.services import audit_partitions
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MoveResult:
+    project_id: UUID
+    source: str
+    target: str
+    rows: dict[str, int] = field(default_factory=dict)
+
+
+def _project_rows(project_id: UUID) -> list[tuple[Table, ColumnElement]]:
+    """Tables of a project with the condition selecting its rows, in FK order."""
+    threads = select(Thread.id).where(Thread.project_id == project_id)
+    return [
+        (Project.__table__, Project.id == project_id),
+        (Thread.__table__, Thread.project_id == project_id),
+        (Message.__table__, Message.thread_id.in_(threads)),
+        (Action.__table__, Action.thread_id.in_(threads)),
+        (
+            ActionDependency.__table__,
+            ActionDependency.action_id.in_(select(Action.id).where(Action.thread_id.in_(threads))),
+        ),
+        (Artifact.__table__, Artifact.project_id == project_id),
+        (Audit.__table__, Audit.project_id == project_id),
+        (ArchiveSegment.__table__, ArchiveSegment.project_id == project_id),
+    ]
+
+
+def copy_table(source: Session, target: Session, table: Table, condition: ColumnElement) -> int:
+    """Stream the rows of ``table`` matching ``condition`` from ``source`` to ``target``."""
+    columns = [column.name for column in table.columns]
+    query = select(*table.columns).where(condition)
+    source_conn = source.connection()
+    compiled = query.compile(source_conn, compile_kwargs={"literal_binds": True})
+    reader = source_conn.connection.driver_connection.cursor()
+    writer = target.connection().connection.driver_connection.cursor()
+    with reader, writer:
+        with reader.copy(f"COPY ({compiled}) TO STDOUT") as copy_out:
+            with writer.copy(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN") as copy_in:
+                for data in copy_out:
+                    copy_in.write(data)
+    return _count(target, table, condition)
+
+
+def _count(db: Session, table: Table, condition: ColumnElement) -> int:
+    return db.execute(select(func.count()).select_from(table).where(condition)).scalar_one()
+
+
+def _set_placement(project_id: UUID, shard: str, state: str) -> None:
+    with get_sessionmaker()() as directory:
+        entry = directory.get(ProjectShard, project_id)
+        if entry is None:
+            directory.add(ProjectShard(project_id=project_id, shard=shard, state=state))
+        else:
+            entry.shard = shard
+            entry.state = state
+        directory.commit()
+    sharding.forget_project(project_id)
+
+
+def _ensure_audit_partitions(source: Session, target: Session, project_id: UUID) -> None:
+    oldest = source.execute(
+        select(func.min(Audit.created_at)).where(Audit.project_id == project_id)
+    ).scalar()
+    if oldest is None:
+        return
+    now = datetime.now(timezone.utc)
+    months_back = (now.year - oldest.year) * 12 + now.month - oldest.month
+    audit_partitions.ensure_audit_partitions(target, months_back=months_back, now=now)
+
+
+def move_project(
+    project_id: UUID,
+    target: str,
+    *,
+    drain_seconds: float | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> MoveResult:
+    """Move ``project_id`` to the ``target`` shard; see the module docstring."""
+    if target not in sharding.shard_names():
+        raise LookupError(f"Unknown shard {target!r}")
+    sharding.forget_project(project_id)
+    source, state = sharding.project_placement(project_id)
+    if state != "active":
+        raise RuntimeError(f"Project {project_id} is already being moved")
+    result = MoveResult(project_id=project_id, source=source, target=target)
+    if source == target:
+        return result
+    drain = sharding.cache_ttl() if drain_seconds is None else drain_seconds
+    tables = _project_rows(project_id)
+
+    with sharding.get_shard_sessionmaker(source)() as source_db:
+        if source_db.get(Project, project_id) is None:
+            raise LookupError("Project not found")
+
+    _set_placement(project_id, source, "moving")
+    sleep(drain)
+    try:
+        with (
+            sharding.get_shard_sessionmaker(source)() as source_db,
+            sharding.get_shard_sessionmaker(target)() as target_db,
+        ):
+            _ensure_audit_partitions(source_db, target_db, project_id)
+            for table, condition in tables:
+                copied = copy_table(source_db, target_db, table, condition)
+                expected = _count(source_db, table, condition)
+                if copied != expected:
+                    raise RuntimeError(
+                        f"{table.name}: copied {copied} rows to {target}, expected {expected}"
+                    )
+                result.rows[table.name] = copied
+            target_db.commit()
+    except Exception:
+        _set_placement(project_id, source, "active")
+        raise
+
+    _set_placement(project_id, target, "active")
+    logger.info("project %s moved from %s to %s: %s", project_id, source, target, result.rows)
+    sleep(drain)
+    with sharding.get_shard_sessionmaker(source)() as source_db:
+        for table, condition in reversed(tables):
+            source_db.execute(table.delete().where(condition))
+        source_db.commit()
+    return result
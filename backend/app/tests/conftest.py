@@ -0,0 +1,4 @@
+import os
+
+# Fail tests whose requests go over an endpoint's declared SQL statement budget.
+os.environ.setdefault("QUERY_BUDGET_MODE", "raise")
@@ -0,0 +1,283 @@
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.cli import scheduler
+from app.db.models import Action, Thread
+from app.db.session import get_db_session
+from app.main import app
+from app.services import executor as executor_service
+from app.services import leases
+from app.services import result_offload
+from app.services.executor import RetryPolicy
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+@pytest.mark.integration
+def test_reaper_requeues_or_fails_expired_leases_and_heartbeats_extend_them(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.setenv("ACTION_LEASE_SECONDS", "30")
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    heartbeats = []
+
+    def long_running(db, action):
+        heartbeats.append(leases.heartbeat(db, action, seconds=600))
+        return {"action_id": str(action.id), "type": action.type, "status": "executed"}
+
+    def noop(db, action):
+        return {"action_id": str(action.id), "type": action.type, "status": "executed"}
+
+    monkeypatch.setitem(executor_service.HANDLERS, "test.long", long_running)
+    for action_type, policy in (
+        ("test.requeue", RetryPolicy(max_attempts=3, base_delay=0, jitter=0)),
+        ("test.fail", RetryPolicy(max_attempts=3, on_lease_expiry="fail")),
+        ("test.once", RetryPolicy()),
+    ):
+        monkeypatch.setitem(executor_service.HANDLERS, action_type, noop)
+        monkeypatch.setitem(executor_service.RETRY_POLICIES, action_type, policy)
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        client = TestClient(app)
+        project = client.post("/v1/projects", json={"slug": "lease", "name": "Lease", "settings": {}}).json()
+        thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "L", "tags": {}}).json()
+
+        def create(key: str, action_type: str) -> str:
+            action = client.post(
+                f"/v1/threads/{thread['id']}/actions",
+                json={"type": action_type, "policy_mode": "EXECUTE", "payload": {}, "idempotency_key": key},
+            ).json()
+            client.post(f"/v1/actions/{action['id']}/approve", json={"approved_by": "t"}).raise_for_status()
+            return action["id"]
+
+        long_id = create("long", "test.long")
+        before = datetime.now(timezone.utc)
+        done = client.post(f"/v1/actions/{long_id}/execute").json()
+        assert done["status"] == "DONE"
+        assert done["lease_owner"] is None and done["lease_expires_at"] is None
+        assert heartbeats[0] > before + timedelta(seconds=500)
+
+        # Simulate workers that died mid-handler.
+        now = datetime.now(timezone.utc)
+        crashed = {
+            "requeue": create("requeue", "test.requeue"),
+            "exhausted": create("exhausted", "test.requeue"),
+            "fail": create("fail", "test.fail"),
+            "once": create("once", "test.once"),
+            "orphan": create("orphan", "test.once"),
+            "alive": create("alive", "test.requeue"),
+        }
+        dependent = client.post(
+            f"/v1/threads/{thread['id']}/actions",
+            json={
+                "type": "test.once",
+                "policy_mode": "EXECUTE",
+                "payload": {},
+                "idempotency_key": "dependent",
+                "depends_on": [crashed["once"]],
+            },
+        ).json()
+        with SessionLocal() as db:
+            for name, action_id in crashed.items():
+                db.execute(
+                    update(Action)
+                    .where(Action.id == action_id)
+                    .values(
+                        status="EXECUTING",
+                        attempts=3 if name == "exhausted" else 1,
+                        lease_owner=None if name == "orphan" else "dead-worker",
+                        lease_expires_at=(
+                            None
+                            if name == "orphan"
+                            else now + timedelta(minutes=5 if name == "alive" else -1)
+                        ),
+                    )
+                )
+            db.commit()
+
+        with SessionLocal() as db:
+            stolen = db.get(Action, crashed["alive"])
+            with pytest.raises(leases.LeaseLost):
+                leases.heartbeat(db, stolen)
+
+        outcomes = scheduler.reap_expired_leases(SessionLocal, batch_size=2)
+        assert outcomes == {"RETRYING": 1, "DEAD_LETTER": 1, "FAILED": 3}
+
+        def get(name: str) -> dict:
+            return client.get(f"/v1/actions/{crashed[name]}").json()
+
+        assert get("requeue")["status"] == "RETRYING"
+        assert get("requeue")["lease_owner"] is None
+        assert get("exhausted")["status"] == "DEAD_LETTER"
+        assert get("fail")["status"] == "FAILED"
+        assert get("once")["status"] == "FAILED"
+        assert get("orphan")["status"] == "FAILED"
+        assert get("alive")["status"] == "EXECUTING"
+        assert client.get(f"/v1/actions/{dependent['id']}").json()["status"] == "CANCELED"
+
+        audit = client.get(f"/v1/audit?action_id={crashed['requeue']}&limit=50").json()
+        (expired,) = [row for row in audit if row["event_type"] == "action.lease_expired"]
+        assert expired["payload"]["lease_owner"] == "dead-worker"
+
+        # The requeued attempt is due immediately and runs on the next poll.
+        assert scheduler.run_due_retries(SessionLocal) == {"DONE": 1}
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.integration
+def test_handler_runs_after_claim_commits_and_lost_lease_discards_result(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    seen = {}
+
+    def observed(db, action):
+        # A separate connection sees the committed claim while the handler runs.
+        with SessionLocal() as other:
+            row = other.get(Action, action.id)
+            seen["status"], seen["lease_owner"] = row.status, row.lease_owner
+        return {"action_id": str(action.id), "type": action.type, "status": "executed"}
+
+    def reaped_meanwhile(db, action):
+        db.execute(update(Thread).where(Thread.id == action.thread_id).values(title="written"))
+        with SessionLocal() as other:
+            other.execute(
+                update(Action)
+                .where(Action.id == action.id)
+                .values(status="RETRYING", lease_owner=None, lease_expires_at=None)
+            )
+            other.commit()
+        return {"action_id": str(action.id), "type": action.type, "status": "executed"}
+
+    monkeypatch.setitem(executor_service.HANDLERS, "test.observed", observed)
+    monkeypatch.setitem(executor_service.HANDLERS, "test.reaped", reaped_meanwhile)
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        client = TestClient(app)
+        project = client.post("/v1/projects", json={"slug": "split", "name": "Split", "settings": {}}).json()
+        thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "S", "tags": {}}).json()
+
+        def create(key: str, action_type: str) -> str:
+            action = client.post(
+                f"/v1/threads/{thread['id']}/actions",
+                json={"type": action_type, "policy_mode": "EXECUTE", "payload": {}, "idempotency_key": key},
+            ).json()
+            client.post(f"/v1/actions/{action['id']}/approve", json={"approved_by": "t"}).raise_for_status()
+            return action["id"]
+
+        observed_id = create("observed", "test.observed")
+        assert client.post(f"/v1/actions/{observed_id}/execute").json()["status"] == "DONE"
+        assert seen == {"status": "EXECUTING", "lease_owner": leases.WORKER_ID}
+
+        reaped_id = create("reaped", "test.reaped")
+        reaped = client.post(f"/v1/actions/{reaped_id}/execute").json()
+        assert reaped["status"] == "RETRYING"
+        assert reaped["result"] is None
+        # The handler's own writes were rolled back with its result.
+        with SessionLocal() as db:
+            assert db.get(Thread, thread["id"]).title == "S"
+
+        audit = client.get(f"/v1/audit?action_id={reaped_id}&limit=50").json()
+        assert [row for row in audit if row["event_type"] == "action.lease_lost"]
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.integration
+def test_failure_to_record_a_success_fails_the_attempt_and_releases_the_lease(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def writes(db, action):
+        db.execute(update(Thread).where(Thread.id == action.thread_id).values(title="written"))
+        return {"action_id": str(action.id), "type": action.type, "status": "executed"}
+
+    def offload_fails(db, action, result, *, project_id):
+        raise OSError("artifact store unavailable")
+
+    monkeypatch.setitem(executor_service.HANDLERS, "test.writes", writes)
+    monkeypatch.setattr(result_offload, "offload_result", offload_fails)
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        client = TestClient(app)
+        project = client.post("/v1/projects", json={"slug": "record", "name": "Record", "settings": {}}).json()
+        thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "R", "tags": {}}).json()
+        action = client.post(
+            f"/v1/threads/{thread['id']}/actions",
+            json={"type": "test.writes", "policy_mode": "EXECUTE", "payload": {}, "idempotency_key": "record"},
+        ).json()
+        client.post(f"/v1/actions/{action['id']}/approve", json={"approved_by": "t"}).raise_for_status()
+
+        executed = client.post(f"/v1/actions/{action['id']}/execute").json()
+        assert executed["status"] == "FAILED"
+        assert executed["result"] == {"error": "artifact store unavailable"}
+        with SessionLocal() as db:
+            row = db.get(Action, action["id"])
+            assert (row.lease_owner, row.lease_expires_at) == (None, None)
+            # The handler's writes went with the success that could not be recorded.
+            assert db.get(Thread, thread["id"]).title == "R"
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import get_db_session
+from app.main import app
+from app.services import executor as executor_service
+from app.services.plans import plan_status, ready_actions
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+def test_plan_status_summarizes_action_statuses():
+    assert plan_status(["APPROVED", "DRAFT"]) == "PENDING"
+    assert plan_status(["DONE", "APPROVED"]) == "PENDING"
+    assert plan_status(["DONE", "EXECUTING", "APPROVED"]) == "RUNNING"
+    assert plan_status(["DONE", "RETRYING"]) == "RUNNING"
+    assert plan_status(["DONE", "CANCELED"]) == "DONE"
+    assert plan_status(["DONE", "DEAD_LETTER", "CANCELED"]) == "FAILED"
+
+
+def test_ready_actions_follow_statuses_in_memory():
+    def row(priority=0, run_at=None, policy_mode="EXECUTE"):
+        return SimpleNamespace(id=uuid.uuid4(), priority=priority, run_at=run_at, policy_mode=policy_mode)
+
+    a, b, c, later, draft = (
+        row(),
+        row(),
+        row(priority=5),
+        row(run_at=datetime.now(timezone.utc) + timedelta(hours=1)),
+        row(policy_mode="DRAFT"),
+    )
+    actions = [a, b, c, later, draft]
+    depends_on = {b.id: [a.id], c.id: [a.id]}
+    statuses = {action.id: "APPROVED" for action in actions}
+    assert ready_actions(actions, depends_on, statuses) == [a.id]
+    statuses[a.id] = "DONE"
+    assert ready_actions(actions, depends_on, statuses) == [c.id, b.id]
+    statuses[a.id] = "RETRYING"
+    assert ready_actions(actions, depends_on, statuses) == []
+
+
+@pytest.mark.integration
+def test_plan_runs_independent_branches_in_parallel_and_cancels_downstream(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    request_sessions = []
+
+    def override_db_session():
+        db = SessionLocal()
+        request_sessions.append(db)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    lock = threading.Lock()
+    state = {"running": 0, "peak": 0, "order": [], "held_transaction": False}
+
+    def step(db, action):
+        with lock:
+            # The request running the plan does not keep its transaction open meanwhile.
+            state["held_transaction"] |= request_sessions[-1].in_transaction()
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            state["order"].append(action.payload["name"])
+        time.sleep(0.2)
+        with lock:
+            state["running"] -= 1
+        if action.payload.get("fail"):
+            raise ValueError("step failed")
+        return {"action_id": str(action.id), "type": action.type, "status": "executed"}
+
+    monkeypatch.setitem(executor_service.HANDLERS, "test.step", step)
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        client = TestClient(app)
+        project = client.post("/v1/projects", json={"slug": "plan", "name": "Plan", "settings": {}}).json()
+        thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "P", "tags": {}}).json()
+        other = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "O", "tags": {}}).json()
+
+        def create(name: str, depends_on=(), fail=False, thread_id=None) -> str:
+            response = client.post(
+                f"/v1/threads/{thread_id or thread['id']}/actions",
+                json={
+                    "type": "test.step",
+                    "policy_mode": "EXECUTE",
+                    "payload": {"name": name, "fail": fail},
+                    "idempotency_key": f"plan-{name}",
+                    "depends_on": list(depends_on),
+                },
+            )
+            assert response.status_code == 201, response.text
+            action_id = response.json()["id"]
+            client.post(
+                f"/v1/actions/{action_id}/approve", json={"approved_by": "tester"}
+            ).raise_for_status()
+            return action_id
+
+        #     a
+        #   / | \
+        #  b  c  e (fails)
+        #   \ |  |
+        #     d  f
+        a = create("a")
+        b = create("b", [a])
+        c = create("c", [a])
+        e = create("e", [a], fail=True)
+        d = create("d", [b, c])
+        f = create("f", [e])
+
+        foreign = create("x", thread_id=other["id"])
+        rejected = client.post(
+            f"/v1/threads/{thread['id']}/actions",
+            json={"type": "test.step", "policy_mode": "EXECUTE", "idempotency_key": "plan-bad", "depends_on": [foreign]},
+        )
+        assert rejected.status_code == 422
+
+        blocked = client.post(f"/v1/actions/{d}/execute")
+        assert blocked.status_code == 409
+
+        plan = client.get(f"/v1/threads/{thread['id']}/plan").json()
+        assert plan["status"] == "PENDING"
+        assert {step["id"]: set(step["depends_on"]) for step in plan["actions"]}[d] == {b, c}
+
+        executed = client.post(f"/v1/threads/{thread['id']}/plan/execute")
+        assert executed.status_code == 200
+        plan = executed.json()
+        statuses = {step["id"]: step["status"] for step in plan["actions"]}
+        assert statuses == {
+            a: "DONE",
+            b: "DONE",
+            c: "DONE",
+            d: "DONE",
+            e: "FAILED",
+            f: "CANCELED",
+        }
+        assert plan["status"] == "FAILED"
+        assert plan["counts"] == {"DONE": 4, "FAILED": 1, "CANCELED": 1}
+        # b, c and e ran side by side once a was done; d waited for b and c.
+        assert state["peak"] == 3
+        assert state["order"][0] == "a" and state["order"][-1] == "d"
+        assert "f" not in state["order"]
+        assert not state["held_transaction"]
+    finally:
+        app.dependency_overrides.clear()
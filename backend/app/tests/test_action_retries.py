@@ -0,0 +1,139 @@
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from app.cli import scheduler
+from app.db.models import Action
+from app.db.session import get_db_session
+from app.main import app
+from app.services import executor as executor_service
+from app.services.executor import RetryPolicy
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+def test_retry_policy_backs_off_exponentially_with_jitter():
+    policy = RetryPolicy(max_attempts=5, base_delay=2.0, max_delay=10.0, jitter=0.5)
+    rng = random.Random(1)
+    delays = [policy.delay(attempt, rng) for attempt in (1, 2, 3, 4)]
+    for delay, backoff in zip(delays, (2.0, 4.0, 8.0, 10.0)):
+        assert backoff * 0.5 <= delay <= backoff
+    assert RetryPolicy(jitter=0).delay(3) == 4.0
+    assert policy.retryable(TimeoutError()) and not policy.retryable(ValueError())
+
+
+@pytest.mark.integration
+def test_transient_failures_are_retried_then_dead_lettered(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    calls = {"flaky": 0, "down": 0}
+
+    def flaky(db, action):
+        calls["flaky"] += 1
+        if calls["flaky"] < 2:
+            raise TimeoutError("upstream timed out")
+        return {"action_id": str(action.id), "type": action.type, "status": "executed"}
+
+    def down(db, action):
+        calls["down"] += 1
+        raise ConnectionError("upstream unreachable")
+
+    policy = RetryPolicy(max_attempts=3, base_delay=60, jitter=0)
+    monkeypatch.setitem(executor_service.HANDLERS, "test.flaky", flaky)
+    monkeypatch.setitem(executor_service.RETRY_POLICIES, "test.flaky", policy)
+    monkeypatch.setitem(executor_service.HANDLERS, "test.down", down)
+    monkeypatch.setitem(executor_service.RETRY_POLICIES, "test.down", policy)
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        client = TestClient(app)
+        project = client.post("/v1/projects", json={"slug": "retry", "name": "Retry", "settings": {}}).json()
+        thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "R", "tags": {}}).json()
+
+        def run(action_type: str) -> dict:
+            action = client.post(
+                f"/v1/threads/{thread['id']}/actions",
+                json={
+                    "type": action_type,
+                    "policy_mode": "EXECUTE",
+                    "payload": {},
+                    "idempotency_key": f"retry-{action_type}",
+                },
+            ).json()
+            client.post(
+                f"/v1/actions/{action['id']}/approve", json={"approved_by": "tester"}
+            ).raise_for_status()
+            return client.post(f"/v1/actions/{action['id']}/execute").json()
+
+        def make_due() -> None:
+            with SessionLocal() as db:
+                db.execute(
+                    update(Action)
+                    .where(Action.status == "RETRYING")
+                    .values(next_attempt_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+                )
+                db.commit()
+
+        flaky_action = run("test.flaky")
+        down_action = run("test.down")
+        for body in (flaky_action, down_action):
+            assert body["status"] == "RETRYING"
+            assert body["attempts"] == 1
+            assert body["result"]["error"]
+        retry_at = datetime.fromisoformat(flaky_action["next_attempt_at"])
+        assert retry_at > datetime.now(timezone.utc) + timedelta(seconds=50)
+
+        # Nothing is due yet.
+        assert scheduler.run_due_retries(SessionLocal) == {}
+
+        make_due()
+        assert scheduler.run_due_retries(SessionLocal) == {"DONE": 1, "RETRYING": 1}
+        flaky_done = client.get(f"/v1/actions/{flaky_action['id']}").json()
+        assert flaky_done["status"] == "DONE"
+        assert flaky_done["attempts"] == 2
+        assert flaky_done["next_attempt_at"] is None
+
+        make_due()
+        assert scheduler.run_due_retries(SessionLocal) == {"DEAD_LETTER": 1}
+        dead = client.get(f"/v1/actions/{down_action['id']}").json()
+        assert dead["status"] == "DEAD_LETTER"
+        assert dead["attempts"] == 3
+        assert calls == {"flaky": 2, "down": 3}
+
+        audit = client.get(f"/v1/audit?action_id={down_action['id']}&limit=50").json()
+        failures = [row for row in audit if row["event_type"] == "action.execute_failed"]
+        assert sorted(row["payload"]["attempt"] for row in failures) == [1, 2, 3]
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,165 @@
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.cli import scheduler
+from app.db.models import Action
+from app.db.session import get_db_session
+from app.main import app
+from app.services import actions as actions_service
+from app.schemas.actions import ActionCreate
+from app.services.schedules import InvalidSchedule, next_run
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+def test_next_run_follows_cron_semantics():
+    monday = datetime(2026, 10, 19, 10, 7, tzinfo=timezone.utc)
+    assert next_run("*/15 * * * *", monday) == monday.replace(minute=15)
+    assert next_run("0 9 * * 1-5", monday) == datetime(2026, 10, 20, 9, 0, tzinfo=timezone.utc)
+    assert next_run("30 2 1 * *", monday) == datetime(2026, 11, 1, 2, 30, tzinfo=timezone.utc)
+    assert next_run("0 0 29 2 *", monday) == datetime(2028, 2, 29, tzinfo=timezone.utc)
+    # Restricted day of month and day of week: either one matches (Friday the 23rd).
+    assert next_run("0 12 13 * 5", monday) == datetime(2026, 10, 23, 12, 0, tzinfo=timezone.utc)
+    assert next_run("0 0 * * 7", monday) == datetime(2026, 10, 25, tzinfo=timezone.utc)
+    for invalid in ("* * * *", "60 * * * *", "*/0 * * * *", "0 0 31 2 *", "a * * * *"):
+        with pytest.raises(InvalidSchedule):
+            next_run(invalid, monday)
+
+
+def test_run_at_is_normalized_to_utc():
+    fields = {"type": "noop", "policy_mode": "EXECUTE", "idempotency_key": "k"}
+    naive = ActionCreate(**fields, run_at="2026-10-19T10:00:00")
+    assert naive.run_at == datetime(2026, 10, 19, 10, 0, tzinfo=timezone.utc)
+    assert naive.run_at.tzinfo is timezone.utc
+    offset = ActionCreate(**fields, run_at="2026-10-19T12:00:00+02:00")
+    assert offset.run_at.tzinfo is timezone.utc
+    assert offset.run_at.hour == 10
+
+
+@pytest.mark.integration
+def test_scheduler_runs_due_and_recurring_actions(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        client = TestClient(app)
+        project = client.post("/v1/projects", json={"slug": "sched", "name": "Sched", "settings": {}}).json()
+        thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "S", "tags": {}}).json()
+        now = datetime.now(timezone.utc)
+
+        def create(key: str, **extra) -> dict:
+            response = client.post(
+                f"/v1/threads/{thread['id']}/actions",
+                json={
+                    "type": "stub.echo",
+                    "policy_mode": "EXECUTE",
+                    "payload": {"key": key},
+                    "idempotency_key": key,
+                    **extra,
+                },
+            )
+            assert response.status_code == 201, response.text
+            action = response.json()
+            client.post(
+                f"/v1/actions/{action['id']}/approve", json={"approved_by": "tester"}
+            ).raise_for_status()
+            return action
+
+        bad = client.post(
+            f"/v1/threads/{thread['id']}/actions",
+            json={"type": "stub.echo", "policy_mode": "EXECUTE", "idempotency_key": "bad", "schedule": "61 * * * *"},
+        )
+        assert bad.status_code == 422
+
+        due = create("due", run_at=(now - timedelta(minutes=1)).isoformat())
+        later = create("later", run_at=(now + timedelta(hours=1)).isoformat())
+        recurring = create(
+            "every-5", run_at=(now - timedelta(seconds=5)).isoformat(), schedule="*/5 * * * *"
+        )
+        unscheduled = create("manual")
+        upcoming = create("series", schedule="0 3 * * *")
+        assert datetime.fromisoformat(upcoming["run_at"]) > now
+
+        assert scheduler.run_due_scheduled(SessionLocal, batch_size=1) == {"DONE": 2}
+
+        def status(action: dict) -> str:
+            return client.get(f"/v1/actions/{action['id']}").json()["status"]
+
+        assert status(due) == "DONE"
+        assert status(recurring) == "DONE"
+        assert status(later) == "APPROVED"
+        assert status(unscheduled) == "APPROVED"
+
+        with SessionLocal() as db:
+            occurrences = db.execute(
+                select(Action).where(Action.idempotency_key.startswith("every-5#run:"))
+            ).scalars().all()
+        assert len(occurrences) == 1
+        occurrence = occurrences[0]
+        assert occurrence.status == "APPROVED"
+        assert occurrence.approved_by == "tester"
+        assert occurrence.schedule == "*/5 * * * *"
+        assert now < occurrence.run_at <= now + timedelta(minutes=5)
+        assert occurrence.run_at.minute % 5 == 0
+
+        # Nothing else is due.
+        assert scheduler.run_due_scheduled(SessionLocal) == {}
+
+        # Executing by hand waits for run_at like the scheduler does.
+        early = client.post(f"/v1/actions/{upcoming['id']}/execute")
+        assert early.status_code == 409
+        assert status(upcoming) == "APPROVED"
+
+        # A successor that is queued already is left alone rather than failing the run.
+        with SessionLocal() as db:
+            action = db.get(Action, occurrence.id)
+            assert actions_service._queue_next_occurrence(db, action) is not None
+            assert actions_service._queue_next_occurrence(db, action) is None
+            db.rollback()
+
+        # A recurring action executed by hand continues its series.
+        manual_series = create(
+            "by-hand", run_at=(now - timedelta(seconds=5)).isoformat(), schedule="*/5 * * * *"
+        )
+        executed = client.post(f"/v1/actions/{manual_series['id']}/execute")
+        assert executed.status_code == 200
+        assert executed.json()["status"] == "DONE"
+        with SessionLocal() as db:
+            queued = db.execute(
+                select(Action.status).where(Action.idempotency_key.startswith("by-hand#run:"))
+            ).scalars().all()
+        assert queued == ["APPROVED"]
+    finally:
+        app.dependency_overrides.clear()
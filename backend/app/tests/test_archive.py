@@ -0,0 +1,172 @@
+import gzip
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import ArchiveSegment, Project
+from app.db.session import get_db_session
+from app.main import app
+from app.services import archive as archive_service
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+@pytest.mark.integration
+def test_archive_moves_old_rows_and_lists_read_through(monkeypatch, tmp_path):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    client = TestClient(app)
+
+    project = client.post(
+        "/v1/projects", json={"slug": "cold", "name": "Cold", "settings": {"archive_after_days": 30}}
+    ).json()
+    thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "T", "tags": {}}).json()
+    for i in range(5):
+        client.post(
+            f"/v1/threads/{thread['id']}/messages",
+            json={"channel": "web", "role": "user", "content": f"m{i}", "meta": {"even": i % 2 == 0}},
+        ).raise_for_status()
+    client.post(
+        f"/v1/threads/{thread['id']}/actions",
+        json={"type": "t", "policy_mode": "DRAFT", "payload": {}, "idempotency_key": "cold-1"},
+    ).raise_for_status()
+
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "UPDATE messages SET created_at = now() - interval '90 days' "
+                "+ (CAST(substring(content from 2) AS int) * interval '1 day') "
+                "WHERE content IN ('m0', 'm1', 'm2')"
+            )
+        )
+        conn.execute(text("UPDATE audit SET created_at = now() - interval '60 days'"))
+
+    with SessionLocal() as db:
+        segments = archive_service.archive_project(db, db.get(Project, project["id"]))
+        db.commit()
+        assert sorted((s.kind, s.row_count) for s in segments) == [("audit", 1), ("messages", 3)]
+        stored = db.query(ArchiveSegment).filter_by(kind="messages").one()
+        with gzip.open(tmp_path / stored.storage_path, "rt") as fh:
+            assert len(fh.readlines()) == 3
+        assert db.execute(text("SELECT count(*) FROM messages")).scalar() == 2
+        assert db.execute(text("SELECT count(*) FROM audit")).scalar() == 0
+
+    url = f"/v1/threads/{thread['id']}/messages"
+    assert [m["content"] for m in client.get(url).json()] == ["m0", "m1", "m2", "m3", "m4"]
+    assert [m["content"] for m in client.get(url, params={"limit": 2}).json()] == ["m0", "m1"]
+    assert [m["content"] for m in client.get(url, params={"limit": 2, "offset": 2}).json()] == [
+        "m2",
+        "m3",
+    ]
+    assert [m["content"] for m in client.get(url, params={"offset": 4}).json()] == ["m4"]
+    evens = client.get(url, params={"meta": '{"even": true}', "offset": 1}).json()
+    assert [m["content"] for m in evens] == ["m2", "m4"]
+
+    audit = client.get("/v1/audit", params={"project_id": project["id"]}).json()
+    assert [row["event_type"] for row in audit] == ["action.created"]
+    assert client.get("/v1/audit", params={"project_id": project["id"], "offset": 1}).json() == []
+
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.integration
+def test_archive_merges_backdated_rows_and_lists_newest_first(monkeypatch, tmp_path):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    client = TestClient(app)
+
+    project = client.post(
+        "/v1/projects", json={"slug": "late", "name": "Late", "settings": {"archive_after_days": 30}}
+    ).json()
+    thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "T", "tags": {}}).json()
+    url = f"/v1/threads/{thread['id']}/messages"
+
+    def ingest(rows):
+        client.post(
+            f"{url}:bulk",
+            content="\n".join(json.dumps({"channel": "web", "role": "user", **row}) for row in rows),
+        ).raise_for_status()
+
+    def days_ago(days):
+        return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+    ingest([{"content": "a", "created_at": days_ago(100)}, {"content": "c", "created_at": days_ago(60)}])
+    ingest([{"content": "e"}])
+    with SessionLocal() as db:
+        archive_service.archive_project(db, db.get(Project, project["id"]))
+        db.commit()
+
+    # Backdated between archived rows, and before the cutoff of a stricter setting.
+    ingest([{"content": "b", "created_at": days_ago(80)}, {"content": "d", "created_at": days_ago(20)}])
+    with SessionLocal() as db:
+        project_row = db.get(Project, project["id"])
+        project_row.settings = {"archive_after_days": 90}
+        db.commit()
+        segments = archive_service.archive_project(db, project_row)
+        db.commit()
+        archive_service.remove_replaced_files(db)
+        assert [s.row_count for s in segments] == [3]
+        assert db.query(ArchiveSegment).filter_by(kind="messages").count() == 1
+        assert len(list(tmp_path.rglob("*.ndjson.gz"))) == 1
+        assert db.execute(text("SELECT content FROM messages ORDER BY created_at")).scalars().all() == ["d", "e"]
+
+    assert [m["content"] for m in client.get(url).json()] == ["a", "b", "c", "d", "e"]
+    newest = [m["content"] for m in client.get(url, params={"order": "desc"}).json()]
+    assert newest == ["e", "d", "c", "b", "a"]
+    page = client.get(url, params={"order": "desc", "limit": 2, "offset": 1}).json()
+    assert [m["content"] for m in page] == ["d", "c"]
+    page = client.get(url, params={"order": "desc", "limit": 2, "offset": 3}).json()
+    assert [m["content"] for m in page] == ["b", "a"]
+
+    app.dependency_overrides.clear()
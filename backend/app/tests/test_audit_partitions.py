@@ -0,0 +1,132 @@
+import os
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.services import audit_partitions
+from app.services.audit import log_audit_event
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def _config(database_url: str) -> Config:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    return config
+
+
+@pytest.fixture()
+def SessionLocal(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    config = _config(database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "0004_jsonb_path_indexes")
+
+    engine = create_engine(database_url)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO audit (id, actor, event_type, payload, created_at) "
+                "VALUES (:id, 'system', 'legacy.event', '{}'::jsonb, '2021-06-15T00:00:00+00:00')"
+            ),
+            {"id": uuid.uuid4()},
+        )
+    command.upgrade(config, "head")
+    yield sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    engine.dispose()
+
+
+def _partitions(db) -> list[str]:
+    return sorted(audit_partitions.list_audit_partitions(db).values())
+
+
+@pytest.mark.integration
+def test_migration_moves_rows_into_monthly_partitions(SessionLocal):
+    with SessionLocal() as db:
+        partitions = _partitions(db)
+        assert partitions[0] == "audit_p2021_06"
+        assert db.execute(text("SELECT count(*) FROM audit_p2021_06")).scalar() == 1
+
+        log_audit_event(db, actor="system", event_type="test.event", payload={})
+        db.commit()
+        current = audit_partitions.partition_name(
+            audit_partitions.month_start(datetime.now(timezone.utc))
+        )
+        assert db.execute(text(f"SELECT count(*) FROM {current}")).scalar() == 1
+        assert db.execute(text("SELECT count(*) FROM audit_default")).scalar() == 0
+
+
+@pytest.mark.integration
+def test_ensure_and_retention(SessionLocal):
+    future = datetime(2100, 1, 10, tzinfo=timezone.utc)
+    with SessionLocal() as db:
+        created = audit_partitions.ensure_audit_partitions(db, months_ahead=2, now=future)
+        assert created == ["audit_p2100_01", "audit_p2100_02", "audit_p2100_03"]
+        assert audit_partitions.ensure_audit_partitions(db, months_ahead=2, now=future) == []
+
+        removed = audit_partitions.apply_audit_retention(
+            db, keep_months=1, mode="detach", now=datetime(2021, 8, 1, tzinfo=timezone.utc)
+        )
+        assert removed == ["audit_p2021_06", "audit_p2021_07"]
+        assert db.execute(text("SELECT count(*) FROM audit_archive_2021_06")).scalar() == 1
+        assert db.execute(text("SELECT count(*) FROM audit")).scalar() == 0
+
+        removed = audit_partitions.apply_audit_retention(db, keep_months=2, now=future)
+        assert "audit_p2099_12" not in removed
+        assert _partitions(db) == ["audit_p2100_01", "audit_p2100_02", "audit_p2100_03"]
+        db.execute(text("DROP TABLE audit_archive_2021_06, audit_archive_2021_07"))
+        db.commit()
+
+
+def _log_at(db, created_at: str) -> None:
+    db.execute(
+        text(
+            "INSERT INTO audit (id, actor, event_type, payload, created_at) "
+            "VALUES (:id, 'system', 'test.event', '{}'::jsonb, :created_at)"
+        ),
+        {"id": uuid.uuid4(), "created_at": created_at},
+    )
+
+
+@pytest.mark.integration
+def test_default_partition_rows_are_moved_and_purged(SessionLocal):
+    with SessionLocal() as db:
+        _log_at(db, "2100-05-20T00:00:00+00:00")
+        _log_at(db, "2020-03-01T00:00:00+00:00")
+        _log_at(db, "2020-04-01T00:00:00+00:00")
+        db.commit()
+        assert db.execute(text("SELECT count(*) FROM audit_default")).scalar() == 3
+
+        created = audit_partitions.ensure_audit_partitions(
+            db, months_ahead=0, now=datetime(2100, 5, 1, tzinfo=timezone.utc)
+        )
+        assert created == ["audit_p2100_05"]
+        assert db.execute(text("SELECT count(*) FROM audit_p2100_05")).scalar() == 1
+        assert db.execute(text("SELECT count(*) FROM audit_default")).scalar() == 2
+        # Attaching gives the partition the indexes of the parent.
+        indexes = db.execute(
+            text("SELECT count(*) FROM pg_indexes WHERE tablename = 'audit_p2100_05'")
+        ).scalar()
+        assert indexes == db.execute(
+            text("SELECT count(*) FROM pg_indexes WHERE tablename = 'audit_p2021_06'")
+        ).scalar()
+
+        cutoff = datetime(2020, 5, 1, tzinfo=timezone.utc)
+        removed = audit_partitions.apply_audit_retention(db, keep_months=1, mode="detach", now=cutoff)
+        assert removed == ["audit_default"]
+        assert db.execute(text("SELECT count(*) FROM audit_archive_2020_03")).scalar() == 1
+        assert db.execute(text("SELECT count(*) FROM audit_default")).scalar() == 0
+        db.execute(text("DROP TABLE audit_archive_2020_03, audit_archive_2020_04"))
+        db.commit()
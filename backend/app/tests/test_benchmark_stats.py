@@ -0,0 +1,54 @@
+import json
+
+from benchmarks import compare as compare_cli
+from benchmarks.stats import compare, format_table, load_results, percentile, summarize, write_results
+
+
+def test_summarize_uses_nearest_rank_percentiles():
+    samples = [float(n) for n in range(100, 0, -1)]
+    summary = summarize(samples, wall_seconds=2.0)
+    assert summary["count"] == 100
+    assert summary["throughput"] == 50.0
+    assert (summary["p50"], summary["p95"], summary["p99"]) == (50.0, 95.0, 99.0)
+    assert percentile([], 0.5) == 0.0
+    assert summarize([], 0.0)["throughput"] == 0.0
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    baseline = {
+        "list": {"count": 10, "throughput": 100.0, "p50": 0.010, "p95": 0.020, "p99": 0.030},
+        "gone": {"count": 10, "throughput": 1.0, "p50": 1.0},
+    }
+    current = {
+        "list": {"count": 10, "throughput": 85.0, "p50": 0.0105, "p95": 0.025, "p99": 0.030},
+        "new": {"count": 10, "throughput": 1.0, "p50": 9.0},
+    }
+    assert compare(current, baseline, tolerance=0.10) == [
+        "list p95: 25.00ms vs 20.00ms",
+        "list throughput: 85.0/s vs 100.0/s",
+    ]
+    assert compare(current, baseline, tolerance=0.50) == []
+    assert "list" in format_table(current).splitlines()[1]
+
+
+def test_load_results_reads_own_and_pytest_benchmark_files(tmp_path):
+    scenarios = {"list": {"count": 3, "throughput": 10.0, "p50": 0.1, "p95": 0.2, "p99": 0.3}}
+    own = tmp_path / "own.json"
+    write_results(own, scenarios, users=2)
+    assert load_results(own) == scenarios
+    assert json.loads(own.read_text())["meta"]["users"] == 2
+
+    pytest_benchmark = tmp_path / "bench.json"
+    pytest_benchmark.write_text(
+        json.dumps(
+            {"benchmarks": [{"name": "test_list", "stats": {"rounds": 5, "ops": 40.0, "mean": 0.025, "median": 0.02}}]}
+        )
+    )
+    assert load_results(pytest_benchmark) == {
+        "test_list": {"count": 5, "throughput": 40.0, "mean": 0.025, "p50": 0.02}
+    }
+
+    slower = tmp_path / "slower.json"
+    write_results(slower, {"list": {**scenarios["list"], "p99": 0.6}})
+    assert compare_cli.main([str(own), "--baseline", str(own)]) == 0
+    assert compare_cli.main([str(slower), "--baseline", str(own)]) == 1
@@ -0,0 +1,73 @@
+import os
+import random
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.cli.datagen import DatagenConfig, generate, skewed_counts
+from app.cli.plan_check import check_plans, plan_problems
+from app.db.models import Audit, Message
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+def test_skewed_counts_keep_total_and_skew():
+    counts = skewed_counts(10_000, 100, 1.2, random.Random(1))
+    assert sum(counts) == 10_000
+    assert max(counts) > 20 * sorted(counts)[50]
+
+    assert skewed_counts(1000, 10, 0, random.Random(1)) == [100] * 10
+
+
+def test_plan_problems_flags_seq_scans_and_buffers():
+    plan = {
+        "Node Type": "Limit",
+        "Shared Hit Blocks": 90,
+        "Shared Read Blocks": 20,
+        "Plans": [{"Node Type": "Seq Scan", "Relation Name": "messages"}],
+    }
+    assert plan_problems(plan, {"messages": 50_000}, max_buffers=100, min_seq_scan_rows=10_000) == [
+        "seq scan on messages (~50000 rows)",
+        "110 buffers (budget 100)",
+    ]
+    assert plan_problems(plan, {"messages": 50}, max_buffers=200, min_seq_scan_rows=10_000) == []
+
+
+@pytest.mark.integration
+def test_generate_dataset_and_check_plans(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    config = DatagenConfig(projects=2, threads=20, messages=2000, actions=50, artifacts=10, days=90)
+    with SessionLocal() as db:
+        counts = generate(db, config, log=lambda line: None)
+        assert counts["messages"] == 2000
+        assert counts["audit"] == 200
+        assert db.execute(select(func.count()).select_from(Message)).scalar_one() == 2000
+        assert db.execute(select(func.count()).select_from(Audit)).scalar_one() == 200
+
+    reports = check_plans(max_buffers=100_000, min_seq_scan_rows=100_000)
+    assert {report.request for report in reports} >= {
+        "/v1/threads/{thread_id}/messages?limit=50",
+        "/v1/audit?project_id={project_id}&limit=50",
+    }
+    assert all(report.problems == [] for report in reports)
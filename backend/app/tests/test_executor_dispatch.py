@@ -9,13 +9,18 @@ from app.services import executor as executor_service
 
 
 class _StubDB:
-    def __init__(self, thread: Thread | None = None):
+    expire_on_commit = True
+
+    def __init__(self, thread: Thread | None = None, action: Action | None = None):
         self._thread = thread
+        self._action = action
         self.added = []
 
-    def get(self, model, _id):
+    def get(self, model, _id, **_kwargs):
         if model is Thread:
             return self._thread
+        if model is Action:
+            return self._action
         return None
 
     def add(self, obj):
@@ -27,7 +32,16 @@ class _StubDB:
     def commit(self):
         return None
 
-    def refresh(self, _obj):
+    def rollback(self):
+        return None
+
+    def close(self):
+        return None
+
+    def get_bind(self):
+        return None
+
+    def refresh(self, _obj, **_kwargs):
         return None
 
 
@@ -117,13 +131,46 @@ def test_execute_action_blocks_non_approved():
     assert exc.value.status_code == 409
 
 
-def test_execute_action_persists_result_and_done():
+def test_execute_action_persists_result_and_done(monkeypatch):
     thread = Thread(id=uuid.uuid4(), project_id=uuid.uuid4(), title="T", tags={})
     action = _make_action(status="APPROVED", policy_mode="EXECUTE", action_type="stub.echo")
     action.thread_id = thread.id
-    db = _StubDB(thread)
+    db = _StubDB(thread, action)
+    monkeypatch.setattr(actions_service, "_handler_session", lambda _db: db)
 
     result_action = actions_service.execute_action(db, action=action)
 
     assert result_action.status == "DONE"
     assert result_action.result is not None
+
+
+def test_execute_attaches_usage_and_records_handler_stats(monkeypatch):
+    monkeypatch.setattr(executor_service, "HANDLER_STATS", {})
+
+    def handler(_db, _action: Action):
+        return {"action_id": str(_action.id), "type": _action.type, "status": "executed"}
+
+    def broken(_db, _action: Action):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(executor_service.HANDLERS, "unit.measured", handler)
+    monkeypatch.setitem(executor_service.HANDLERS, "unit.broken", broken)
+
+    def run(action_type: str):
+        action = _make_action(status="APPROVED", policy_mode="EXECUTE", action_type=action_type)
+        return executor_service.execute(_StubDB(), action)
+
+    result = run("unit.measured")
+    usage = result["usage"]
+    assert usage["wall_seconds"] > 0 and usage["cpu_seconds"] >= 0
+    assert usage["db_statements"] == 0
+    assert usage["result_bytes"] > 0
+    with pytest.raises(RuntimeError):
+        run("unit.broken")
+    run("unit.unregistered")
+
+    stats = executor_service.handler_stats()
+    assert stats["unit.measured"]["count"] == 1 and stats["unit.measured"]["error_rate"] == 0.0
+    assert stats["unit.broken"]["errors"] == 1 and stats["unit.broken"]["error_rate"] == 1.0
+    assert stats["default"]["count"] == 1
+    assert stats["unit.measured"]["p50_seconds"] == stats["unit.measured"]["p95_seconds"] > 0
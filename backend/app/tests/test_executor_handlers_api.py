@@ -12,3 +12,7 @@ def test_list_executor_handlers():
     assert handlers == sorted(handlers)
     assert "artifact.store" in handlers
     assert "stub.echo" in handlers
+    for stats in body["stats"].values():
+        assert set(stats) == {"count", "errors", "error_rate", "p50_seconds", "p95_seconds"}
+    schema = body["payload_schemas"]["artifact.store"]
+    assert {"type", "filename", "content_base64"} <= set(schema["required"])
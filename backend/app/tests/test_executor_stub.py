@@ -139,4 +139,20 @@ def test_execute_artifact_store_creates_artifact(monkeypatch, tmp_path):
     stored_path = tmp_path / artifacts[0]["storage_path"]
     assert stored_path.exists()
 
+    # A payload the handler cannot use is rejected before it is stored.
+    invalid = client.post(
+        f"/v1/threads/{thread['id']}/actions",
+        json={
+            "type": "artifact.store",
+            "policy_mode": "EXECUTE",
+            "payload": {"filename": "note.txt"},
+            "idempotency_key": "idem-artifact-2",
+        },
+    )
+    assert invalid.status_code == 422
+    missing = {tuple(error["loc"]) for error in invalid.json()["detail"]["errors"]}
+    assert missing == {("type",), ("content_base64",)}
+    listed = client.get(f"/v1/threads/{thread['id']}/actions").json()
+    assert [row["idempotency_key"] for row in listed] == ["idem-artifact-1"]
+
     app.dependency_overrides.clear()
@@ -0,0 +1,167 @@
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text, update
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Action
+from app.db.session import get_db_session
+from app.main import app
+from app.services import actions as actions_service
+from app.services.fair_share import project_concurrency, project_weight
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+def test_project_settings_fall_back_to_defaults():
+    assert project_weight({}) == 1.0
+    assert project_weight({"execution_weight": 0}) > 0
+    assert project_concurrency(None) is None
+    assert project_concurrency({"max_concurrent_actions": "3"}) == 3
+
+
+@pytest.mark.integration
+def test_due_actions_are_claimed_by_priority_and_fair_share(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        client = TestClient(app)
+        past = (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat()
+
+        def queue(slug: str, count: int, settings: dict, priorities: dict[int, int] | None = None) -> list[str]:
+            project = client.post("/v1/projects", json={"slug": slug, "name": slug, "settings": settings}).json()
+            thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": slug, "tags": {}}).json()
+            ids = []
+            for i in range(count):
+                action = client.post(
+                    f"/v1/threads/{thread['id']}/actions",
+                    json={
+                        "type": "stub.echo",
+                        "policy_mode": "EXECUTE",
+                        "payload": {"i": i},
+                        "idempotency_key": f"{slug}-{i}",
+                        "run_at": past,
+                        "priority": (priorities or {}).get(i, 0),
+                    },
+                ).json()
+                client.post(f"/v1/actions/{action['id']}/approve", json={"approved_by": "t"}).raise_for_status()
+                ids.append(action["id"])
+            return ids
+
+        # A bursting project, a small one, a heavy-weight one and a capped one.
+        burst = queue("burst", 20, {}, priorities={19: 5})
+        small = queue("small", 1, {})
+        heavy = queue("heavy", 4, {"execution_weight": 2})
+        capped = queue("capped", 3, {"max_concurrent_actions": 2})
+        with SessionLocal() as db:
+            db.execute(update(Action).where(Action.id == capped[0]).values(status="EXECUTING"))
+            db.commit()
+
+        with SessionLocal() as db:
+            claimed = [str(action.id) for action in actions_service.due_scheduled(db, limit=6)]
+        assert len(claimed) == 6
+        # The bursting project's high-priority action goes first; the small project
+        # is served in the first round despite the burst.
+        assert burst[19] in claimed and small[0] in claimed
+        assert sum(action_id in burst for action_id in claimed) == 1
+        # Weight 2: its actions rank at 0.5, 1 and 1.5 against 1 for the others.
+        assert sum(action_id in heavy for action_id in claimed) == 3
+        # One of the capped project's two slots is taken by the executing action.
+        assert sum(action_id in capped for action_id in claimed) == 1
+
+        created = client.post(
+            f"/v1/threads/{client.get(f'/v1/actions/{small[0]}').json()['thread_id']}/actions",
+            json={"type": "stub.echo", "policy_mode": "EXECUTE", "payload": {}, "idempotency_key": "p", "priority": 11},
+        )
+        assert created.status_code == 422
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.integration
+def test_claims_read_the_due_actions_of_each_project_through_its_threads(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    try:
+        with engine.begin() as conn:
+            # 100 projects of 5 threads, with a long history and every 20th action due.
+            conn.execute(
+                text(
+                    "INSERT INTO projects (id, slug, name, settings) "
+                    "SELECT gen_random_uuid(), 'claim-' || i, 'C', '{}' FROM generate_series(1, 100) i"
+                )
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO threads (id, project_id, title, tags) "
+                    "SELECT gen_random_uuid(), p.id, 'T', '{}' FROM projects p, generate_series(1, 5)"
+                )
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO actions (id, thread_id, type, policy_mode, status, payload, "
+                    "idempotency_key, attempts, run_at, priority) "
+                    "SELECT gen_random_uuid(), t.id, 't', 'EXECUTE', "
+                    "CASE WHEN i % 20 = 0 THEN 'APPROVED' ELSE 'DONE' END, '{}', t.id || '-' || i, 0, "
+                    "now() - interval '1 minute', 0 FROM threads t, generate_series(1, 100) i"
+                )
+            )
+            conn.execute(text("ANALYZE"))
+
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        with SessionLocal() as db:
+            claimed = actions_service.due_scheduled(db, limit=10)
+        event.remove(engine, "before_cursor_execute", capture)
+        assert len(claimed) == 10
+        # One statement per claim, however many projects have due actions.
+        ((statement, parameters),) = statements
+
+        with engine.connect() as conn:
+            plan = "\n".join(conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).scalars())
+    finally:
+        engine.dispose()
+    # Executing actions are counted once, not once per due action.
+    assert "SubPlan" not in plan, plan
+    assert "ix_actions_thread_pending" in plan, plan
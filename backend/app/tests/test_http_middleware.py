@@ -0,0 +1,87 @@
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware.compression import CompressionMiddleware, parse_accept_encoding
+from app.middleware.etag import ETagMiddleware, etag_matches
+
+
+def _make_client(minimum_size: int = 100) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/big")
+    def big() -> dict:
+        return {"rows": ["x" * 50] * 20}
+
+    @app.get("/small")
+    def small() -> dict:
+        return {"ok": True}
+
+    @app.get("/files/{name}/download")
+    def download(name: str) -> PlainTextResponse:
+        return PlainTextResponse("y" * 1000)
+
+    @app.get("/stream")
+    def stream() -> StreamingResponse:
+        return StreamingResponse(iter([b"z" * 1000, b"z" * 1000]), media_type="text/plain")
+
+    app.add_middleware(ETagMiddleware)
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size, encodings=("gzip",))
+    return TestClient(app)
+
+
+def test_compresses_large_json_only_when_accepted():
+    client = _make_client()
+
+    resp = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["vary"]
+    assert resp.json()["rows"][0] == "x" * 50
+
+    raw = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in raw.headers
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_skips_downloads_and_streams():
+    client = _make_client()
+
+    download = client.get("/files/a/download", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in download.headers
+    assert download.text == "y" * 1000
+
+    stream = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in stream.headers
+    assert len(stream.content) == 2000
+
+
+def test_etag_and_not_modified():
+    client = _make_client()
+
+    first = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    second = client.get("/big", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+    changed = client.get("/small", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+
+
+def test_header_parsing_helpers():
+    assert parse_accept_encoding("gzip;q=0.5, br, *;q=0") == {"gzip": 0.5, "br": 1.0, "*": 0.0}
+    assert etag_matches('"abc", W/"def"', 'W/"def"')
+    assert etag_matches("*", 'W/"x"')
+    assert not etag_matches('W/"abc"', 'W/"def"')
+
+
+def test_choose_encoding_respects_quality_and_availability():
+    middleware = CompressionMiddleware(None, encodings=("br", "zstd", "gzip"))
+    assert middleware.choose_encoding("gzip, deflate") == "gzip"
+    assert middleware.choose_encoding("gzip;q=0, identity") is None
+    assert middleware.choose_encoding("") is None
@@ -0,0 +1,179 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db.jsonb import has_keys
+from app.db.models import Message
+from app.db.session import get_db_session
+from app.main import app
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+@pytest.mark.integration
+def test_containment_filters_on_list_endpoints(client: TestClient, monkeypatch, tmp_path):
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    project = client.post("/v1/projects", json={"slug": "jsonb", "name": "JSONB", "settings": {}}).json()
+    prod = client.post(
+        f"/v1/projects/{project['id']}/threads", json={"title": "P", "tags": {"env": "prod", "team": "a"}}
+    ).json()
+    client.post(f"/v1/projects/{project['id']}/threads", json={"title": "D", "tags": {"env": "dev"}})
+
+    threads = client.get(
+        f"/v1/projects/{project['id']}/threads", params={"tags": json.dumps({"env": "prod"})}
+    ).json()
+    assert [t["id"] for t in threads] == [prod["id"]]
+
+    for lang in ("en", "ru"):
+        client.post(
+            f"/v1/threads/{prod['id']}/messages",
+            json={"channel": "web", "role": "user", "content": lang, "meta": {"lang": lang}},
+        ).raise_for_status()
+    messages = client.get(
+        f"/v1/threads/{prod['id']}/messages", params={"meta": json.dumps({"lang": "ru"})}
+    ).json()
+    assert [m["content"] for m in messages] == ["ru"]
+
+    for i, payload in enumerate(({"target": {"kind": "repo"}}, {"target": {"kind": "host"}})):
+        client.post(
+            f"/v1/threads/{prod['id']}/actions",
+            json={"type": "t", "policy_mode": "DRAFT", "payload": payload, "idempotency_key": f"jsonb-{i}"},
+        ).raise_for_status()
+    actions = client.get(
+        f"/v1/threads/{prod['id']}/actions",
+        params={"payload": json.dumps({"target": {"kind": "host"}})},
+    ).json()
+    assert [a["payload"]["target"]["kind"] for a in actions] == ["host"]
+
+    client.post(
+        "/v1/artifacts",
+        json={
+            "project_id": project["id"],
+            "type": "text",
+            "filename": "a.txt",
+            "metadata": {"mime": "text/plain"},
+            "content_base64": "YQ==",
+        },
+    ).raise_for_status()
+    artifacts = client.get("/v1/artifacts", params={"metadata": json.dumps({"mime": "image/png"})})
+    assert artifacts.json() == []
+    artifacts = client.get("/v1/artifacts", params={"metadata": json.dumps({"mime": "text/plain"})})
+    assert len(artifacts.json()) == 1
+
+    bad = client.get(f"/v1/projects/{project['id']}/threads", params={"tags": "[1, 2]"})
+    assert bad.status_code == 422
+    bad = client.get(f"/v1/threads/{prod['id']}/messages", params={"meta": "{not json"})
+    assert bad.status_code == 422
+
+
+@pytest.mark.integration
+def test_key_existence_filters_on_list_endpoints(client: TestClient, monkeypatch, tmp_path):
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    project = client.post("/v1/projects", json={"slug": "keys", "name": "Keys", "settings": {}}).json()
+    owned = client.post(
+        f"/v1/projects/{project['id']}/threads", json={"title": "O", "tags": {"owner": None, "env": "prod"}}
+    ).json()
+    client.post(f"/v1/projects/{project['id']}/threads", json={"title": "U", "tags": {"env": "prod"}})
+
+    threads = client.get(f"/v1/projects/{project['id']}/threads", params={"tags_has": "owner"}).json()
+    assert [t["id"] for t in threads] == [owned["id"]]
+    threads = client.get(f"/v1/projects/{project['id']}/threads", params={"tags_has": "owner,missing"})
+    assert threads.json() == []
+
+    for i, meta in enumerate(({"reply_to": 1}, {}, {'we"ird': True})):
+        client.post(
+            f"/v1/threads/{owned['id']}/messages",
+            json={"channel": "web", "role": "user", "content": str(i), "meta": meta},
+        ).raise_for_status()
+    messages = client.get(f"/v1/threads/{owned['id']}/messages", params={"meta_has": "reply_to"}).json()
+    assert [m["content"] for m in messages] == ["0"]
+    messages = client.get(f"/v1/threads/{owned['id']}/messages", params={"meta_has": 'we"ird'}).json()
+    assert [m["content"] for m in messages] == ["2"]
+
+    for i, payload in enumerate(({"target": "repo"}, {"source": "repo"})):
+        client.post(
+            f"/v1/threads/{owned['id']}/actions",
+            json={"type": "t", "policy_mode": "DRAFT", "payload": payload, "idempotency_key": f"keys-{i}"},
+        ).raise_for_status()
+    actions = client.get(f"/v1/threads/{owned['id']}/actions", params={"payload_has": "source"}).json()
+    assert [a["payload"] for a in actions] == [{"source": "repo"}]
+
+    client.post(
+        "/v1/artifacts",
+        json={
+            "project_id": project["id"],
+            "type": "text",
+            "filename": "a.txt",
+            "metadata": {"mime": "text/plain"},
+            "content_base64": "YQ==",
+        },
+    ).raise_for_status()
+    assert len(client.get("/v1/artifacts", params={"metadata_has": "mime"}).json()) == 1
+    assert client.get("/v1/artifacts", params={"metadata_has": "size"}).json() == []
+
+    bad = client.get(f"/v1/threads/{owned['id']}/actions", params={"payload_has": " , "})
+    assert bad.status_code == 422
+
+
+@pytest.mark.integration
+def test_key_existence_filter_uses_the_gin_index(client: TestClient):
+    project = client.post("/v1/projects", json={"slug": "plan-keys", "name": "K", "settings": {}}).json()
+    thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "T", "tags": {}}).json()
+    engine = create_engine(os.environ["DATABASE_URL"])
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO messages (id, thread_id, channel, role, content, meta) "
+                    "SELECT gen_random_uuid(), :thread_id, 'web', 'user', 'm', "
+                    "jsonb_build_object('k' || (i % 1000), i) FROM generate_series(1, 20000) i"
+                ),
+                {"thread_id": thread["id"]},
+            )
+            conn.execute(text("ANALYZE messages"))
+            query = select(Message.id).where(has_keys(Message.meta, ["k5"])).compile(engine)
+            plan = conn.exec_driver_sql(f"EXPLAIN {query}", query.params).scalars().all()
+    finally:
+        engine.dispose()
+    assert any("ix_messages_meta_keys_gin" in line for line in plan), plan
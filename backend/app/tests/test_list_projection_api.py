@@ -0,0 +1,82 @@
+import os
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import get_db_session
+from app.main import app
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+@pytest.mark.integration
+def test_fields_projection_on_list_endpoints(client: TestClient):
+    project = client.post("/v1/projects", json={"slug": "proj", "name": "Proj", "settings": {}}).json()
+    thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "T", "tags": {}}).json()
+    client.post(
+        f"/v1/threads/{thread['id']}/messages",
+        json={"channel": "web", "role": "user", "content": "x" * 1000, "meta": {"big": True}},
+    ).raise_for_status()
+    client.post(
+        f"/v1/threads/{thread['id']}/actions",
+        json={"type": "t", "policy_mode": "DRAFT", "payload": {"blob": "y" * 1000}, "idempotency_key": "p-1"},
+    ).raise_for_status()
+
+    actions = client.get(f"/v1/threads/{thread['id']}/actions", params={"fields": "status"})
+    assert actions.status_code == 200
+    assert list(actions.json()[0]) == ["id", "status"]
+
+    messages = client.get(f"/v1/threads/{thread['id']}/messages", params={"fields": "role,created_at"})
+    assert list(messages.json()[0]) == ["id", "role", "created_at"]
+
+    threads = client.get(f"/v1/projects/{project['id']}/threads", params={"fields": "title"}).json()
+    assert threads == [{"id": thread["id"], "title": "T"}]
+
+    audit = client.get("/v1/audit", params={"project_id": project["id"], "fields": "event_type"}).json()
+    assert audit[0]["event_type"] == "action.created"
+    assert "payload" not in audit[0]
+
+    full = client.get(f"/v1/threads/{thread['id']}/actions").json()
+    assert "payload" in full[0]
+
+    bad = client.get(f"/v1/threads/{thread['id']}/actions", params={"fields": "status,secret"})
+    assert bad.status_code == 422
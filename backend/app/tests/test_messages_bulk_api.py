@@ -0,0 +1,179 @@
+import asyncio
+import json
+import os
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1 import messages as messages_api
+from app.api.v1.messages import LineTooLong, _iter_lines
+from app.db.session import get_db_session
+from app.main import app
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _create_thread(client: TestClient, project_id: str) -> dict:
+    resp = client.post(f"/v1/projects/{project_id}/threads", json={"title": "Import", "tags": {}})
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _ndjson(rows: list[dict]) -> bytes:
+    return ("\n".join(json.dumps(row) for row in rows) + "\n").encode()
+
+
+@pytest.mark.integration
+def test_bulk_messages_single_thread_chunks(client: TestClient):
+    project = client.post("/v1/projects", json={"slug": "bulk", "name": "Bulk", "settings": {}}).json()
+    thread = _create_thread(client, project["id"])
+
+    rows = [
+        {"channel": "telegram", "role": "user", "content": f"msg {i}", "meta": {"n": i}}
+        for i in range(5)
+    ]
+    rows[0]["created_at"] = "2020-01-01T00:00:00+00:00"
+    resp = client.post(
+        f"/v1/threads/{thread['id']}/messages:bulk?chunk_size=2",
+        content=_ndjson(rows),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 201
+    body = resp.json()
+    assert body["inserted"] == 5
+    assert [chunk["rows"] for chunk in body["chunks"]] == [2, 2, 1]
+
+    listed = client.get(f"/v1/threads/{thread['id']}/messages").json()
+    assert len(listed) == 5
+    assert listed[0]["content"] == "msg 0"
+    assert listed[0]["created_at"].startswith("2020-01-01")
+    assert listed[0]["meta"] == {"n": 0}
+
+
+@pytest.mark.integration
+def test_bulk_messages_multi_thread_and_validation(client: TestClient, monkeypatch):
+    project = client.post("/v1/projects", json={"slug": "bulk2", "name": "Bulk", "settings": {}}).json()
+    first = _create_thread(client, project["id"])
+    second = _create_thread(client, project["id"])
+
+    rows = [
+        {"thread_id": first["id"], "channel": "web", "role": "user", "content": "a"},
+        {"thread_id": second["id"], "channel": "web", "role": "assistant", "content": "b"},
+        {"thread_id": second["id"], "channel": "web", "role": "assistant", "content": "c"},
+    ]
+    resp = client.post("/v1/messages:bulk", content=_ndjson(rows))
+    assert resp.status_code == 201
+    assert resp.json()["inserted"] == 3
+    assert len(client.get(f"/v1/threads/{second['id']}/messages").json()) == 2
+
+    bad = client.post(
+        f"/v1/threads/{first['id']}/messages:bulk?chunk_size=1",
+        content=_ndjson(
+            [
+                {"channel": "web", "role": "user", "content": "ok"},
+                {"channel": "fax", "role": "user", "content": "bad"},
+            ]
+        ),
+    )
+    assert bad.status_code == 422
+    assert bad.json()["detail"]["line"] == 2
+    assert bad.json()["detail"]["inserted"] == 1
+    assert bad.json()["detail"]["committed_through_line"] == 1
+
+    atomic = client.post(
+        f"/v1/threads/{second['id']}/messages:bulk?chunk_size=1&atomic=true",
+        content=_ndjson(
+            [
+                {"channel": "web", "role": "user", "content": "kept back"},
+                {"channel": "fax", "role": "user", "content": "bad"},
+            ]
+        ),
+    )
+    assert atomic.status_code == 422
+    assert atomic.json()["detail"]["inserted"] == 0
+    assert len(client.get(f"/v1/threads/{second['id']}/messages").json()) == 2
+
+    missing = client.post(
+        "/v1/messages:bulk",
+        content=_ndjson(
+            [{"thread_id": "00000000-0000-0000-0000-000000000000", "channel": "web", "role": "user", "content": "x"}]
+        ),
+    )
+    assert missing.status_code == 404
+
+    monkeypatch.setattr(messages_api, "BULK_MAX_LINE_BYTES", 64)
+    too_long = client.post(
+        f"/v1/threads/{first['id']}/messages:bulk",
+        content=_ndjson(
+            [
+                {"channel": "web", "role": "user", "content": "short"},
+                {"channel": "web", "role": "user", "content": "x" * 100},
+            ]
+        ),
+    )
+    assert too_long.status_code == 413
+    assert too_long.json()["detail"]["line"] == 2
+    assert too_long.json()["detail"]["inserted"] == 0
+
+
+def test_iter_lines_joins_lines_split_across_chunks():
+    async def stream():
+        for chunk in (b'{"a"', b": 1}\n{", b'"b": 2', b"}\n\nlast"):
+            yield chunk
+
+    async def collect():
+        return [line async for line in _iter_lines(stream())]
+
+    assert asyncio.run(collect()) == [b'{"a": 1}', b'{"b": 2}', b"", b"last"]
+
+
+def test_iter_lines_rejects_lines_over_the_limit():
+    async def stream():
+        yield b'{"a": 1}\n{"b": '
+        yield b"x" * 8
+
+    async def collect():
+        return [line async for line in _iter_lines(stream(), max_line_bytes=12)]
+
+    with pytest.raises(LineTooLong):
+        asyncio.run(collect())
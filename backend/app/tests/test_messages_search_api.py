@@ -0,0 +1,114 @@
+import os
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import get_db_session
+from app.main import app
+from app.services import messages as messages_service
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _seed(client: TestClient) -> tuple[dict, dict]:
+    project = client.post("/v1/projects", json={"slug": "search", "name": "Search", "settings": {}}).json()
+    other = client.post("/v1/projects", json={"slug": "other", "name": "Other", "settings": {}}).json()
+    thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "T", "tags": {}}).json()
+    other_thread = client.post(f"/v1/projects/{other['id']}/threads", json={"title": "O", "tags": {}}).json()
+
+    messages = [
+        (thread, "web", "user", "Please deploy the billing service to staging"),
+        (thread, "telegram", "assistant", "Deploy finished: billing service is live on staging"),
+        (thread, "web", "user", "What is the weather today?"),
+        (other_thread, "web", "user", "deploy billing somewhere else"),
+    ]
+    for target, channel, role, content in messages:
+        client.post(
+            f"/v1/threads/{target['id']}/messages",
+            json={"channel": channel, "role": role, "content": content},
+        ).raise_for_status()
+    return project, thread
+
+
+@pytest.mark.integration
+def test_search_messages_ranked_and_scoped_to_project(client: TestClient):
+    project, thread = _seed(client)
+
+    resp = client.get(f"/v1/projects/{project['id']}/messages/search", params={"q": "billing deploy"})
+    assert resp.status_code == 200
+    hits = resp.json()
+    assert len(hits) == 2
+    assert all(hit["thread_id"] == thread["id"] for hit in hits)
+    assert hits[0]["rank"] >= hits[1]["rank"]
+    assert "<mark>" in hits[0]["snippet"]
+
+    filtered = client.get(
+        f"/v1/projects/{project['id']}/messages/search",
+        params={"q": "billing", "channel": "telegram", "role": "assistant"},
+    ).json()
+    assert [hit["channel"] for hit in filtered] == ["telegram"]
+
+    page = client.get(
+        f"/v1/projects/{project['id']}/messages/search",
+        params={"q": "billing", "limit": 1, "offset": 1},
+    ).json()
+    assert len(page) == 1
+    assert page[0]["id"] == hits[1]["id"]
+
+    weather = client.get(f"/v1/projects/{project['id']}/messages/search", params={"q": "weather"})
+    assert [hit["content"] for hit in weather.json()] == ["What is the weather today?"]
+
+
+@pytest.mark.integration
+def test_search_messages_unknown_project(client: TestClient):
+    resp = client.get(
+        "/v1/projects/00000000-0000-0000-0000-000000000000/messages/search", params={"q": "x"}
+    )
+    assert resp.status_code == 404
+
+
+def test_highlight_snippet_escapes_content():
+    headline = "<img src=x onerror=alert(1)> \ue000billing\ue001 & more"
+    assert messages_service.highlight_snippet(headline) == (
+        "&lt;img src=x onerror=alert(1)&gt; <mark>billing</mark> &amp; more"
+    )
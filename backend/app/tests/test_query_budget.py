@@ -0,0 +1,82 @@
+import logging
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.db import query_budget as query_budget_module
+from app.db.instrumentation import QueryStats, install_query_hooks, track_queries
+from app.db.query_budget import (
+    QueryBudgetExceeded,
+    check_query_budget,
+    query_budget,
+    repeated_shapes,
+    statement_shape,
+)
+from app.middleware.query_budget import QueryBudgetMiddleware
+
+
+def test_statement_shape_collapses_expanded_in_lists():
+    short = "SELECT threads.id FROM threads\nWHERE threads.id IN (%(id_1_1)s)"
+    long = "SELECT threads.id FROM threads WHERE threads.id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)"
+    assert statement_shape(short) == statement_shape(long)
+    assert statement_shape(long) == "SELECT threads.id FROM threads WHERE threads.id IN (%(id)s)"
+
+
+def test_repeated_shapes_and_budget_modes(caplog, monkeypatch):
+    # Alembic's logging config disables existing loggers when migrations run first.
+    monkeypatch.setattr(query_budget_module.logger, "disabled", False)
+    stats = QueryStats()
+    for _ in range(6):
+        stats.record("SELECT * FROM threads WHERE threads.id = %(pk_1)s::UUID", 0.001, 1)
+    stats.record("SELECT * FROM projects", 0.001, 3)
+
+    assert repeated_shapes(stats, 5) == {"SELECT * FROM threads WHERE threads.id = %(pk)s::UUID": 6}
+
+    with caplog.at_level(logging.WARNING, logger="app.db.query_budget"):
+        check_query_budget("GET /x", stats, 10, mode="warn")
+        check_query_budget("GET /x", stats, 3, mode="warn")
+    assert "possible N+1 in GET /x" in caplog.text
+    assert "issued 7 SQL statements (budget 3)" in caplog.text
+
+    check_query_budget("GET /x", stats, 3, mode="off")
+    with pytest.raises(QueryBudgetExceeded):
+        check_query_budget("GET /x", stats, 3, mode="raise")
+
+
+def test_failed_statement_does_not_skew_the_next_timing(tmp_path, monkeypatch):
+    install_query_hooks()
+    engine = create_engine(f"sqlite:///{tmp_path / 'errors.db'}")
+    clock = iter([10.0, 20.0, 21.0])
+    monkeypatch.setattr("app.db.instrumentation.time.perf_counter", lambda: next(clock))
+    with engine.connect() as conn, track_queries() as stats:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing"))
+        conn.execute(text("SELECT 1"))
+    assert stats.statements == 1
+    assert stats.seconds == 1.0
+
+
+def test_middleware_enforces_declared_budget(tmp_path):
+    install_query_hooks()
+    engine = create_engine(f"sqlite:///{tmp_path / 'budget.db'}")
+    app = FastAPI()
+
+    def get_db():
+        with Session(engine) as db:
+            yield db
+
+    @app.get("/items/{n}")
+    @query_budget(2)
+    def items(n: int, db: Session = Depends(get_db)) -> dict:
+        return {"values": [db.execute(text("SELECT :n"), {"n": i}).scalar() for i in range(n)]}
+
+    app.add_middleware(QueryBudgetMiddleware, mode="raise")
+    client = TestClient(app)
+
+    assert client.get("/items/2").json() == {"values": [0, 1]}
+    with pytest.raises(QueryBudgetExceeded, match=r"GET /items/\{n\} issued 3 SQL statements"):
+        client.get("/items/3")
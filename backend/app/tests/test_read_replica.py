@@ -0,0 +1,161 @@
+import os
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.db import session as session_module
+from app.db.session import get_db_session
+from app.main import app
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+@pytest.mark.integration
+def test_reads_go_to_replica_unless_lagging_or_reading_own_writes(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    # The test database doubles as the "replica".
+    monkeypatch.setenv("READ_DATABASE_URL", database_url)
+    monkeypatch.setenv("REPLICA_MAX_LAG_SECONDS", "5")
+    monkeypatch.setattr(session_module, "_read_engine", None)
+    monkeypatch.setattr(session_module, "_ReadSessionLocal", None)
+    monkeypatch.setattr(session_module, "_replica_lag", None)
+
+    replica_sessions = []
+    replica_factory = session_module.get_read_sessionmaker()
+
+    def counting_factory():
+        replica_sessions.append(1)
+        return replica_factory()
+
+    monkeypatch.setattr(session_module, "get_read_sessionmaker", lambda: counting_factory)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        client = TestClient(app)
+        project = client.post("/v1/projects", json={"slug": "rr", "name": "RR", "settings": {}})
+        assert project.cookies.get("read_primary") == "1"
+        project_id = project.json()["id"]
+
+        # The write set the read-your-writes cookie: this read stays on the primary.
+        assert client.get(f"/v1/projects/{project_id}/threads").status_code == 200
+        assert replica_sessions == []
+
+        client.cookies.clear()
+        assert client.get(f"/v1/projects/{project_id}/threads").json() == []
+        assert len(replica_sessions) == 1
+
+        client.get(f"/v1/projects/{project_id}/threads", headers={"X-Read-Primary": "1"})
+        assert len(replica_sessions) == 1
+
+        monkeypatch.setattr(session_module, "replica_lag_seconds", lambda: 30.0)
+        client.get(f"/v1/projects/{project_id}/threads")
+        assert len(replica_sessions) == 1
+    finally:
+        app.dependency_overrides.clear()
+        engine = session_module._read_engine
+        if engine is not None:
+            engine.dispose()
+
+
+def test_replica_lag_is_cached_and_unreachable_replica_is_lagging(monkeypatch):
+    monkeypatch.setenv("READ_DATABASE_URL", "postgresql+psycopg://nobody@127.0.0.1:1/none")
+    monkeypatch.setenv("REPLICA_LAG_CHECK_INTERVAL_SECONDS", "60")
+    monkeypatch.setattr(session_module, "_read_engine", None)
+    monkeypatch.setattr(session_module, "_replica_lag", None)
+
+    assert session_module.replica_lag_seconds() == float("inf")
+    checked_at, _ = session_module._replica_lag
+    assert session_module.replica_lag_seconds() == float("inf")
+    assert session_module._replica_lag[0] == checked_at
+
+
+def test_replica_lag_probe_does_not_block_other_requests(monkeypatch):
+    monkeypatch.setenv("REPLICA_LAG_CHECK_INTERVAL_SECONDS", "0")
+    monkeypatch.setattr(session_module, "_replica_lag", (0.0, 2.0))
+    started, release = threading.Event(), threading.Event()
+
+    class SlowConnection:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, statement):
+            started.set()
+            release.wait(5)
+            return SimpleNamespace(scalar_one=lambda: 3.0)
+
+    monkeypatch.setattr(
+        session_module, "get_read_engine", lambda: SimpleNamespace(connect=SlowConnection)
+    )
+    probe = threading.Thread(target=session_module.replica_lag_seconds)
+    probe.start()
+    assert started.wait(5)
+    # Served from the previous measurement while the probe is in flight.
+    assert session_module.replica_lag_seconds() == 2.0
+    release.set()
+    probe.join(5)
+    assert session_module._replica_lag[1] == 3.0
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize(
+    ("replay_lsn", "expected"),
+    [("0/3000060", 0), ("0/3000000", 3600)],
+    ids=["idle-primary", "replay-behind"],
+)
+def test_replica_lag_sql_ignores_an_idle_primary(replay_lsn, expected):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    # Stand-ins for the replica's recovery functions: the last transaction was
+    # replayed an hour ago, and the replica received WAL up to 0/3000060.
+    sql = (
+        session_module.REPLICA_LAG_SQL.text.replace(
+            "pg_last_wal_receive_lsn()", "'0/3000060'::pg_lsn"
+        )
+        .replace("pg_last_wal_replay_lsn()", f"'{replay_lsn}'::pg_lsn")
+        .replace("pg_last_xact_replay_timestamp()", "(now() - interval '1 hour')")
+    )
+    engine = create_engine(database_url)
+    try:
+        with engine.connect() as conn:
+            assert float(conn.execute(text(sql)).scalar_one()) == pytest.approx(expected)
+            # On a server that is not a replica every function is NULL: no lag.
+            assert float(conn.execute(session_module.REPLICA_LAG_SQL).scalar_one()) == 0
+    finally:
+        engine.dispose()
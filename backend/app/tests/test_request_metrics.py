@@ -0,0 +1,118 @@
+import os
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.metrics import Histogram
+from app.core.profiling import instrument_endpoints
+from app.db.session import get_db_session
+from app.main import app, create_app
+from app.middleware.timing import SERVER_TIMING_ALLOW_HEADER_ENV, TimingMiddleware
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.1, route="/a")
+    histogram.observe(3.0, route="/a")
+
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+    assert "# TYPE demo_seconds histogram" in lines
+
+
+def test_sampled_requests_write_profiles(tmp_path):
+    profiled = FastAPI()
+
+    @profiled.get("/work/{n}")
+    def work(n: int) -> dict:
+        return {"total": sum(range(n))}
+
+    instrument_endpoints(profiled, tmp_path)
+    profiled.add_middleware(TimingMiddleware, profile_allow_header=True)
+    client = TestClient(profiled)
+
+    assert client.get("/work/10").json() == {"total": 45}
+    assert list(tmp_path.iterdir()) == []
+
+    assert client.get("/work/10", headers={"X-Profile": "1"}).json() == {"total": 45}
+    dumps = list(tmp_path.iterdir())
+    assert len(dumps) == 1
+    assert dumps[0].name.endswith("-GET-work_n.prof")
+
+
+@pytest.mark.integration
+def test_request_metrics_and_server_timing(client: TestClient, monkeypatch):
+    project = client.post("/v1/projects", json={"slug": "proj", "name": "Proj", "settings": {}}).json()
+    client.post(f"/v1/projects/{project['id']}/threads", json={"title": "T", "tags": {}}).raise_for_status()
+
+    plain = client.get(f"/v1/projects/{project['id']}/threads")
+    assert "server-timing" not in plain.headers
+    # Off unless enabled for the deployment.
+    asked = client.get(f"/v1/projects/{project['id']}/threads", headers={"X-Server-Timing": "1"})
+    assert "server-timing" not in asked.headers
+
+    monkeypatch.setenv(SERVER_TIMING_ALLOW_HEADER_ENV, "1")
+    timed_app = create_app()
+    timed_app.dependency_overrides = app.dependency_overrides
+    resp = TestClient(timed_app).get(
+        f"/v1/projects/{project['id']}/threads", headers={"X-Server-Timing": "1"}
+    )
+    assert resp.status_code == 200
+    timing = resp.headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert "db;dur=" in timing and "ser;dur=" in timing
+    assert "0 statements" not in timing
+
+    text = client.get("/metrics").text
+    route = 'method="GET",route="/v1/projects/{project_id}/threads"'
+    assert f'http_request_duration_seconds_count{{{route},status="200"}}' in text
+    assert f"http_request_db_statements_count{{{route}}}" in text
+    assert f"http_response_serialization_seconds_sum{{{route}}}" in text
+    assert "/v1/projects/" + project["id"] not in text
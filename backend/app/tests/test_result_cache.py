@@ -0,0 +1,136 @@
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import HandlerResult
+from app.db.session import get_db_session
+from app.main import app
+from app.services import executor as executor_service
+from app.services import result_cache
+from app.services.result_cache import LocalResultCache, result_key
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+def test_result_key_is_canonical():
+    project, other_project = uuid.uuid4(), uuid.uuid4()
+    assert result_key(project, "lookup", {"a": 1, "b": [1, 2]}) == result_key(
+        project, "lookup", {"b": [1, 2], "a": 1}
+    )
+    assert result_key(project, "lookup", {"a": 1}) != result_key(project, "other", {"a": 1})
+    assert result_key(project, "lookup", {"a": 1}) != result_key(other_project, "lookup", {"a": 1})
+    assert result_key(project, "lookup", None) == result_key(project, "lookup", {})
+
+
+def test_only_opted_in_handlers_are_cached():
+    assert "stub.echo" not in executor_service.CACHE_TTLS
+
+
+def test_local_cache_is_bounded_and_expires():
+    cache = LocalResultCache(max_entries=2)
+    cache.put("a", {"n": 1}, ttl=60)
+    cache.put("b", {"n": 2}, ttl=60)
+    assert cache.get("a") == {"n": 1}
+    cache.put("c", {"n": 3}, ttl=60)
+    # "b" was the least recently used entry.
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    cache.put("d", {"n": 4}, ttl=-1)
+    assert cache.get("d") is None
+
+
+@pytest.mark.integration
+def test_cacheable_handler_results_are_reused(monkeypatch):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.setenv("RESULT_CACHE_SHARED", "1")
+    run_migrations(database_url)
+    result_cache.LOCAL_CACHE.clear()
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    calls = []
+
+    def lookup(db, action):
+        calls.append(action.payload)
+        return {"action_id": str(action.id), "type": action.type, "status": "executed", "data": {"n": len(calls)}}
+
+    monkeypatch.setitem(executor_service.HANDLERS, "test.lookup", lookup)
+    monkeypatch.setitem(executor_service.CACHE_TTLS, "test.lookup", 60)
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        client = TestClient(app)
+        threads = []
+        for slug in ("memo", "memo-other"):
+            project = client.post("/v1/projects", json={"slug": slug, "name": slug, "settings": {}}).json()
+            threads.append(
+                client.post(f"/v1/projects/{project['id']}/threads", json={"title": "M", "tags": {}}).json()
+            )
+
+        def run(key: str, payload: dict, *, policy_mode: str = "READ", thread: dict = threads[0]) -> dict:
+            action = client.post(
+                f"/v1/threads/{thread['id']}/actions",
+                json={"type": "test.lookup", "policy_mode": policy_mode, "payload": payload, "idempotency_key": key},
+            ).json()
+            client.post(f"/v1/actions/{action['id']}/approve", json={"approved_by": "t"}).raise_for_status()
+            return client.post(f"/v1/actions/{action['id']}/execute").json()
+
+        def cache_hit(action: dict) -> bool:
+            audit = client.get(f"/v1/audit?action_id={action['id']}&limit=50").json()
+            (succeeded,) = [row for row in audit if row["event_type"] == "action.execute_succeeded"]
+            return succeeded["payload"]["cache_hit"]
+
+        first = run("memo-1", {"q": "x", "page": 1})
+        second = run("memo-2", {"page": 1, "q": "x"})
+        other = run("memo-3", {"q": "y"})
+        assert len(calls) == 2
+        assert second["status"] == "DONE"
+        assert second["result"]["data"] == first["result"]["data"]
+        assert second["result"]["action_id"] == second["id"]
+        assert [cache_hit(a) for a in (first, second, other)] == [False, True, False]
+
+        # EXECUTE actions may have side effects, and projects do not share results.
+        executed = run("memo-5", {"q": "x", "page": 1}, policy_mode="EXECUTE")
+        elsewhere = run("memo-6", {"q": "x", "page": 1}, thread=threads[1])
+        assert len(calls) == 4
+        assert not cache_hit(executed) and not cache_hit(elsewhere)
+        calls.clear()
+
+        # Another process only has the shared table.
+        result_cache.LOCAL_CACHE.clear()
+        third = run("memo-4", {"q": "x", "page": 1})
+        assert calls == []
+        assert cache_hit(third)
+        with SessionLocal() as db:
+            assert db.execute(select(func.count()).select_from(HandlerResult)).scalar_one() == 3
+    finally:
+        app.dependency_overrides.clear()
+        result_cache.LOCAL_CACHE.clear()
@@ -0,0 +1,93 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.session import get_db_session
+from app.main import app
+from app.services import executor as executor_service
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+@pytest.mark.integration
+def test_large_results_are_offloaded_to_artifacts(monkeypatch, tmp_path):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    monkeypatch.setenv("RESULT_INLINE_MAX_BYTES", "1024")
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def report(db, action):
+        rows = [{"n": n, "text": "x" * 50} for n in range(action.payload["rows"])]
+        return {"action_id": str(action.id), "type": action.type, "status": "executed", "data": {"rows": rows}}
+
+    monkeypatch.setitem(executor_service.HANDLERS, "test.report", report)
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    try:
+        client = TestClient(app)
+        project = client.post("/v1/projects", json={"slug": "big", "name": "Big", "settings": {}}).json()
+        thread = client.post(f"/v1/projects/{project['id']}/threads", json={"title": "B", "tags": {}}).json()
+
+        def run(key: str, rows: int) -> dict:
+            action = client.post(
+                f"/v1/threads/{thread['id']}/actions",
+                json={"type": "test.report", "policy_mode": "EXECUTE", "payload": {"rows": rows}, "idempotency_key": key},
+            ).json()
+            client.post(f"/v1/actions/{action['id']}/approve", json={"approved_by": "t"}).raise_for_status()
+            return client.post(f"/v1/actions/{action['id']}/execute").json()
+
+        small = run("small", 2)
+        assert small["result"]["data"]["rows"][1]["n"] == 1
+        assert "offloaded" not in small["result"]
+
+        big = run("big", 200)
+        assert big["status"] == "DONE"
+        reference = big["result"]["offloaded"]
+        assert "data" not in big["result"]
+        assert big["result"]["status"] == "executed"
+        assert reference["bytes"] > 1024
+        assert reference["summary"]["keys"] == ["rows"]
+        listed = client.get(f"/v1/threads/{thread['id']}/actions").json()
+        assert all(len(json.dumps(row["result"])) < 2048 for row in listed)
+
+        artifacts = client.get(f"/v1/artifacts?action_id={big['id']}").json()
+        assert [artifact["id"] for artifact in artifacts] == [reference["artifact_id"]]
+
+        inline = client.get(f"/v1/actions/{big['id']}?result=inline").json()
+        assert len(inline["result"]["data"]["rows"]) == 200
+        streamed = client.get(f"/v1/actions/{big['id']}?result=stream")
+        assert streamed.headers["content-type"].startswith("application/json")
+        assert streamed.json()["data"]["rows"][199]["n"] == 199
+        assert client.get(f"/v1/actions/{small['id']}?result=stream").json() == small["result"]
+    finally:
+        app.dependency_overrides.clear()
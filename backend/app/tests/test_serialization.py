@@ -0,0 +1,82 @@
+import json
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+
+from app.api.serialization import (
+    ROW_ADAPTER_CACHE_SIZE,
+    coerce_rows,
+    row_adapter,
+    rows_response,
+    select_columns,
+)
+from app.api.v1.filters import parse_fields
+from app.db.models import Artifact, Message
+from app.schemas.artifacts import ArtifactResponse
+from app.schemas.messages import MessageResponse
+
+
+def _message_row() -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "thread_id": uuid.uuid4(),
+        "channel": "web",
+        "role": "user",
+        "content": "hi",
+        "meta": {"lang": "en"},
+        "created_at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    }
+
+
+def test_rows_response_matches_model_serialization():
+    row = _message_row()
+    response = rows_response(MessageResponse, [row])
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == [json.loads(MessageResponse(**row).model_dump_json())]
+
+
+def test_coerce_rows_parses_archived_strings():
+    row = _message_row()
+    archived = json.loads(json.dumps(row, default=str))
+
+    coerced = coerce_rows(MessageResponse, [archived])
+
+    assert coerced[0]["id"] == row["id"]
+    assert coerced[0]["created_at"] == row["created_at"]
+
+
+def test_select_columns_labels_fields_and_overrides():
+    columns = select_columns(MessageResponse, Message)
+    assert [c.name for c in columns] == list(MessageResponse.model_fields)
+
+    columns = select_columns(
+        ArtifactResponse, Artifact, metadata=Artifact.metadata_, download_url=Artifact.storage_path
+    )
+    assert [c.name for c in columns] == list(ArtifactResponse.model_fields)
+
+
+def test_parse_fields_keeps_model_order_and_id():
+    assert parse_fields(None, MessageResponse) is None
+    assert parse_fields("created_at, role", MessageResponse) == ("id", "role", "created_at")
+    try:
+        parse_fields("role,nope", MessageResponse)
+    except HTTPException as exc:
+        assert exc.status_code == 422
+    else:
+        raise AssertionError("Expected HTTPException for unknown field")
+
+
+def test_rows_response_projection():
+    row = {"id": uuid.uuid4(), "role": "user"}
+    response = rows_response(MessageResponse, [row], ("id", "role"))
+    assert json.loads(response.body) == [{"id": str(row["id"]), "role": "user"}]
+
+
+def test_row_adapter_cache_is_bounded_and_shared_across_spellings():
+    first = parse_fields("role,content", MessageResponse)
+    second = parse_fields(" content ,role,role,id", MessageResponse)
+    assert first == second
+    assert row_adapter(MessageResponse, first) is row_adapter(MessageResponse, second)
+    assert row_adapter.cache_info().maxsize == ROW_ADAPTER_CACHE_SIZE
@@ -0,0 +1,201 @@
+import json
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func, select, text
+
+from app.cli import scheduler
+from app.db import engine as engine_module
+from app.db import session as session_module
+from app.db import sharding
+from app.db.models import Message, Project, ProjectShard, Thread
+from app.main import app
+from app.services import shard_rebalance
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+SHARD_DATABASE = "jack_test_shard_b"
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+def test_choose_shard_is_stable_and_spreads_projects(monkeypatch):
+    monkeypatch.setenv("SHARD_DATABASE_URLS", "b=postgresql://b, c=postgresql://c")
+    assert sharding.shard_names() == ["default", "b", "c"]
+    ids = [uuid.uuid4() for _ in range(300)]
+    placements = [sharding.choose_shard(project_id) for project_id in ids]
+    assert placements == [sharding.choose_shard(project_id) for project_id in ids]
+    assert set(placements) == {"default", "b", "c"}
+
+    monkeypatch.delenv("SHARD_DATABASE_URLS")
+    assert not sharding.sharding_enabled()
+    assert sharding.shard_names() == ["default"]
+
+
+@pytest.mark.integration
+def test_projects_are_routed_to_their_shard_and_can_be_moved(monkeypatch, tmp_path):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    run_migrations(database_url)
+
+    admin = create_engine(database_url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f"DROP DATABASE IF EXISTS {SHARD_DATABASE} WITH (FORCE)"))
+        conn.execute(text(f"CREATE DATABASE {SHARD_DATABASE}"))
+    base, separator, query = database_url.partition("?")
+    shard_url = f"{base.rsplit('/', 1)[0]}/{SHARD_DATABASE}{separator}{query}"
+    # env.py migrates whatever DATABASE_URL points at.
+    monkeypatch.setenv("DATABASE_URL", shard_url)
+    run_migrations(shard_url)
+    monkeypatch.setenv("DATABASE_URL", database_url)
+
+    monkeypatch.setenv("SHARD_DATABASE_URLS", f"b={shard_url}")
+    monkeypatch.setenv("SHARD_CACHE_TTL_SECONDS", "0")
+    monkeypatch.setattr(engine_module, "_engine", None)
+    monkeypatch.setattr(engine_module, "_SessionLocal", None)
+    monkeypatch.setattr(sharding, "_engines", {})
+    monkeypatch.setattr(sharding, "_sessionmakers", {})
+    monkeypatch.setattr(sharding, "_directory_cache", type(sharding._directory_cache)())
+    monkeypatch.setattr(sharding, "_owner_cache", type(sharding._owner_cache)())
+    monkeypatch.setattr(sharding, "choose_shard", lambda project_id: "b")
+    app.dependency_overrides.clear()
+
+    try:
+        client = TestClient(app)
+        project = client.post("/v1/projects", json={"slug": "sh", "name": "Sharded", "settings": {}})
+        assert project.status_code == 201
+        project_id = project.json()["id"]
+        thread = client.post(f"/v1/projects/{project_id}/threads", json={"title": "t", "tags": {}})
+        assert thread.status_code == 201
+        thread_id = thread.json()["id"]
+        message = client.post(
+            f"/v1/threads/{thread_id}/messages",
+            json={"channel": "web", "role": "user", "content": "hello shard", "meta": {}},
+        )
+        assert message.status_code == 201
+
+        default_db = sharding.get_shard_sessionmaker("default")
+        shard_db = sharding.get_shard_sessionmaker("b")
+        with default_db() as db:
+            assert db.get(Project, project_id) is None
+            assert db.get(ProjectShard, project_id).shard == "b"
+        with shard_db() as db:
+            assert db.get(Project, project_id).slug == "sh"
+
+        assert client.get(f"/v1/projects/{project_id}").json()["name"] == "Sharded"
+        messages = client.get(f"/v1/threads/{thread_id}/messages").json()
+        assert [m["content"] for m in messages] == ["hello shard"]
+
+        # A failed create leaves no directory entry behind.
+        failing = TestClient(app, raise_server_exceptions=False)
+        duplicate = failing.post("/v1/projects", json={"slug": "sh", "name": "Again", "settings": {}})
+        assert duplicate.status_code == 500
+        with default_db() as db:
+            assert db.execute(select(func.count()).select_from(ProjectShard)).scalar_one() == 1
+
+        for key in ("sh-1", "sh-2"):
+            action = client.post(
+                f"/v1/threads/{thread_id}/actions",
+                json={
+                    "type": "stub.echo",
+                    "policy_mode": "EXECUTE",
+                    "payload": {},
+                    "idempotency_key": key,
+                    "run_at": "2020-01-01T00:00:00Z",
+                },
+            ).json()
+            client.post(f"/v1/actions/{action['id']}/approve", json={"approved_by": "alice"})
+
+        # While the project is in transit reads still work and writes are deferred.
+        # Full batches of its due actions are not claimed over and over either.
+        with default_db() as db:
+            db.get(ProjectShard, project_id).state = "moving"
+            db.commit()
+        assert scheduler.run_once(batch_size=1) == {}
+        moving = client.post(
+            f"/v1/threads/{thread_id}/messages",
+            json={"channel": "web", "role": "user", "content": "later", "meta": {}},
+        )
+        assert moving.status_code == 503
+        assert moving.headers["retry-after"] == str(session_module.SHARD_MOVE_RETRY_AFTER)
+        assert client.get(f"/v1/threads/{thread_id}/messages").status_code == 200
+        # Nor are those of a project that left the shard, once one was skipped.
+        with default_db() as db:
+            entry = db.get(ProjectShard, project_id)
+            entry.shard, entry.state = "default", "active"
+            db.commit()
+        assert scheduler.run_due_scheduled(shard_db, batch_size=1, shard="b") == {}
+        with default_db() as db:
+            db.get(ProjectShard, project_id).shard = "b"
+            db.commit()
+        assert scheduler.run_once() == {"DONE": 2}
+
+        result = shard_rebalance.move_project(project_id, "default", drain_seconds=0)
+        assert (result.source, result.target) == ("b", "default")
+        assert result.rows["projects"] == 1
+        assert result.rows["messages"] == 1
+
+        with shard_db() as db:
+            assert db.execute(select(func.count()).select_from(Thread)).scalar_one() == 0
+        with default_db() as db:
+            assert db.get(ProjectShard, project_id).shard == "default"
+            assert db.execute(
+                select(func.count()).select_from(Message).where(Message.thread_id == thread_id)
+            ).scalar_one() == 1
+
+        assert client.get(f"/v1/projects/{project_id}").status_code == 200
+        messages = client.get(f"/v1/threads/{thread_id}/messages").json()
+        assert [m["content"] for m in messages] == ["hello shard"]
+        assert client.post(
+            f"/v1/threads/{thread_id}/messages",
+            json={"channel": "web", "role": "user", "content": "after move", "meta": {}},
+        ).status_code == 201
+
+        # Requests that name their project only in the body, or not at all.
+        monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+        other_id = client.post("/v1/projects", json={"slug": "sh2", "name": "B", "settings": {}}).json()["id"]
+        other_thread = client.post(f"/v1/projects/{other_id}/threads", json={"title": "b", "tags": {}}).json()
+        row = {"thread_id": other_thread["id"], "channel": "web", "role": "user", "content": "bulk"}
+        bulk = client.post("/v1/messages:bulk", content=json.dumps(row) + "\n")
+        assert bulk.status_code == 201, bulk.text
+        with shard_db() as db:
+            assert db.execute(
+                select(func.count()).select_from(Message).where(Message.thread_id == other_thread["id"])
+            ).scalar_one() == 1
+        spanning = client.post(
+            "/v1/messages:bulk",
+            content="\n".join(json.dumps({**row, "thread_id": t}) for t in (other_thread["id"], thread_id)),
+        )
+        assert spanning.status_code == 422
+        assert spanning.json()["detail"]["inserted"] == 0
+
+        client.post(
+            "/v1/artifacts",
+            json={"project_id": other_id, "type": "text", "filename": "a.txt", "content_base64": "YQ=="},
+        ).raise_for_status()
+        artifacts = client.get("/v1/artifacts", params={"project_id": other_id})
+        assert len(artifacts.json()) == 1
+        assert client.get("/v1/artifacts").status_code == 422
+        assert client.get("/v1/audit").status_code == 422
+        assert client.get("/v1/audit", params={"project_id": other_id}).status_code == 200
+    finally:
+        app.dependency_overrides.clear()
+        for engine in sharding._engines.values():
+            engine.dispose()
+        with admin.connect() as conn:
+            conn.execute(text(f"DROP DATABASE IF EXISTS {SHARD_DATABASE} WITH (FORCE)"))
+        admin.dispose()
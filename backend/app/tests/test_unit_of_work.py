@@ -0,0 +1,96 @@
+import os
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import Audit, Project
+from app.db.session import get_db_session
+from app.main import app
+
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+
+def run_migrations(database_url: str) -> None:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+
+
+@pytest.mark.integration
+def test_write_routes_commit_once_without_refresh(monkeypatch, tmp_path):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for integration tests")
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    run_migrations(database_url)
+
+    engine = create_engine(database_url)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    commits: list[str] = []
+    statements: list[str] = []
+    event.listen(engine, "commit", lambda conn: commits.append("commit"))
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    def override_db_session():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db_session] = override_db_session
+    client = TestClient(app)
+    try:
+        project = client.post("/v1/projects", json={"slug": "uow", "name": "UoW", "settings": {}})
+        assert project.status_code == 201
+        assert project.json()["created_at"] and project.json()["updated_at"]
+        assert len(commits) == 1
+        assert len(statements) == 1 and statements[0].startswith("INSERT INTO projects")
+        assert "RETURNING" in statements[0]
+
+        thread = client.post(
+            f"/v1/projects/{project.json()['id']}/threads", json={"title": "T", "tags": {}}
+        ).json()
+        commits.clear()
+        action = client.post(
+            f"/v1/threads/{thread['id']}/actions",
+            json={"type": "stub.echo", "policy_mode": "EXECUTE", "payload": {}, "idempotency_key": "uow-1"},
+        ).json()
+        client.post(f"/v1/actions/{action['id']}/approve", json={"approved_by": "alice"})
+        executed = client.post(f"/v1/actions/{action['id']}/execute")
+        assert executed.json()["status"] == "DONE"
+        assert executed.json()["updated_at"] >= action["updated_at"]
+        # One each for create and approve; execute commits the claim and the outcome.
+        assert len(commits) == 4
+
+        # A failing write is rolled back as a whole.
+        commits.clear()
+        duplicate = client.post(
+            f"/v1/threads/{thread['id']}/actions",
+            json={"type": "other", "policy_mode": "EXECUTE", "payload": {}, "idempotency_key": "uow-1"},
+        )
+        assert duplicate.status_code == 409
+        assert commits == []
+
+        with SessionLocal() as db:
+            assert db.execute(select(Project.slug)).scalars().all() == ["uow"]
+            events = db.execute(
+                select(Audit.event_type).where(Audit.action_id == action["id"]).order_by(Audit.created_at)
+            ).scalars().all()
+            assert events[0] == "action.created" and events[-1] == "action.execute_succeeded"
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,112 @@
+"""pytest-benchmark suite for service functions on a seeded database.
+
+Not collected by the regular test run; ``make bench`` runs it, or::
+
+    BENCH_MESSAGES_PER_THREAD=1000 pytest benchmarks -o python_files='bench_*.py' \
+        --benchmark-json=benchmarks/results/services.json
+"""
+
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.serialization import rows_response, select_columns
+from app.db.models import Message, Thread
+from app.schemas.messages import MessageResponse
+from app.services import actions as actions_service
+from app.services import messages as messages_service
+from benchmarks.seed import SeedSize, build_message_rows, seed_dataset
+
+pytest.importorskip("pytest_benchmark")
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+
+def _size_from_env() -> SeedSize:
+    defaults = SeedSize()
+    return SeedSize(
+        projects=int(os.getenv("BENCH_PROJECTS", defaults.projects)),
+        threads_per_project=int(os.getenv("BENCH_THREADS_PER_PROJECT", defaults.threads_per_project)),
+        messages_per_thread=int(os.getenv("BENCH_MESSAGES_PER_THREAD", defaults.messages_per_thread)),
+        actions_per_thread=int(os.getenv("BENCH_ACTIONS_PER_THREAD", defaults.actions_per_thread)),
+    )
+
+
+@pytest.fixture(scope="module")
+def session_factory():
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        pytest.skip("DATABASE_URL is required for benchmarks")
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    config.set_main_option("sqlalchemy.url", database_url)
+    command.upgrade(config, "head")
+    engine = create_engine(database_url)
+    yield sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def seeded(session_factory):
+    with session_factory() as db:
+        return seed_dataset(db, _size_from_env())
+
+
+@pytest.fixture()
+def db(session_factory):
+    with session_factory() as session:
+        yield session
+        session.rollback()
+
+
+def test_list_thread_messages(benchmark, db, seeded):
+    columns = select_columns(MessageResponse, Message)
+    thread_id = seeded.thread_ids[0]
+    benchmark(messages_service.list_thread_messages, db, thread_id, columns, limit=100)
+
+
+def test_serialize_message_page(benchmark, db, seeded):
+    columns = select_columns(MessageResponse, Message)
+    _, rows = messages_service.list_thread_messages(db, seeded.thread_ids[0], columns, limit=500)
+    benchmark(rows_response, MessageResponse, rows)
+
+
+def test_search_messages(benchmark, db, seeded):
+    benchmark(
+        messages_service.search_messages, db, project_id=seeded.project_ids[0], query="invoice refund"
+    )
+
+
+def test_insert_message_chunk(benchmark, db, seeded):
+    thread_id = seeded.thread_ids[-1]
+
+    def insert_chunk() -> None:
+        messages_service.insert_messages(db, build_message_rows(thread_id, 1000))
+        db.rollback()
+
+    benchmark(insert_chunk)
+
+
+def test_action_lifecycle(benchmark, db, seeded):
+    thread = db.get(Thread, seeded.thread_ids[0])
+
+    def lifecycle() -> None:
+        action, _ = actions_service.create_action(
+            db,
+            thread=thread,
+            action_type="stub.echo",
+            policy_mode="EXECUTE",
+            payload={"bench": True},
+            idempotency_key=f"bench-{uuid.uuid4()}",
+        )
+        actions_service.approve_action(db, action=action, approved_by="bench")
+        actions_service.execute_action(db, action=action)
+        db.rollback()
+
+    benchmark(lifecycle)
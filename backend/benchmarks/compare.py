@@ -0,0 +1,29 @@
+"""Compare a benchmark result file against a baseline and fail on regressions.
+
+    python -m benchmarks.compare benchmarks/results/load.json --baseline baseline.json
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from benchmarks.stats import compare, format_table, load_results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("results", type=Path)
+    parser.add_argument("--baseline", type=Path, required=True)
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown (0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    current = load_results(args.results)
+    print(format_table(current))
+    regressions = compare(current, load_results(args.baseline), args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""HTTP load scenario for the v1 API.
+
+Each virtual user repeatedly runs the full flow: create project -> thread ->
+messages -> list messages -> action create/approve/execute -> artifact upload ->
+download. Per-step latencies are summarised into p50/p95/p99 and throughput and
+written to a JSON result file that can be compared against a baseline::
+
+    python -m benchmarks.load --base-url http://localhost:8000 --users 8 --iterations 20
+    python -m benchmarks.load --in-process --baseline benchmarks/results/baseline.json
+"""
+
+import argparse
+import asyncio
+import base64
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+from benchmarks.stats import compare, format_table, load_results, summarize, write_results
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "results" / "load.json"
+
+
+class Recorder:
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        self.client = client
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    async def call(self, step: str, method: str, url: str, **kwargs) -> dict:
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.samples[step].append(time.perf_counter() - started)
+        response.raise_for_status()
+        return response.json() if response.headers.get("content-type") == "application/json" else {}
+
+
+async def run_flow(recorder: Recorder, messages: int, artifact_bytes: bytes) -> None:
+    run = uuid.uuid4().hex[:12]
+    project = await recorder.call(
+        "project.create",
+        "POST",
+        "/v1/projects",
+        json={"slug": f"load-{run}", "name": "Load", "settings": {}},
+    )
+    thread = await recorder.call(
+        "thread.create",
+        "POST",
+        f"/v1/projects/{project['id']}/threads",
+        json={"title": "Load", "tags": {"load": True}},
+    )
+    for index in range(messages):
+        await recorder.call(
+            "message.create",
+            "POST",
+            f"/v1/threads/{thread['id']}/messages",
+            json={"channel": "web", "role": "user", "content": f"message {index}", "meta": {"i": index}},
+        )
+    await recorder.call("messages.list", "GET", f"/v1/threads/{thread['id']}/messages")
+    action = await recorder.call(
+        "action.create",
+        "POST",
+        f"/v1/threads/{thread['id']}/actions",
+        json={
+            "type": "stub.echo",
+            "policy_mode": "EXECUTE",
+            "payload": {"run": run},
+            "idempotency_key": f"load-{run}",
+        },
+    )
+    await recorder.call(
+        "action.approve", "POST", f"/v1/actions/{action['id']}/approve", json={"approved_by": "load"}
+    )
+    await recorder.call("action.execute", "POST", f"/v1/actions/{action['id']}/execute")
+    artifact = await recorder.call(
+        "artifact.upload",
+        "POST",
+        "/v1/artifacts",
+        json={
+            "project_id": project["id"],
+            "thread_id": thread["id"],
+            "type": "file",
+            "filename": "load.txt",
+            "content_base64": base64.b64encode(artifact_bytes).decode(),
+        },
+    )
+    await recorder.call("artifact.download", "GET", artifact["download_url"])
+
+
+async def run_load(
+    client: httpx.AsyncClient, users: int, iterations: int, messages: int, artifact_size: int
+) -> dict[str, dict[str, float]]:
+    recorder = Recorder(client)
+    artifact_bytes = b"x" * artifact_size
+
+    async def user() -> None:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            await run_flow(recorder, messages, artifact_bytes)
+            recorder.samples["flow"].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(users)))
+    wall = time.perf_counter() - started
+    return {step: summarize(samples, wall) for step, samples in recorder.samples.items()}
+
+
+def _client(args: argparse.Namespace) -> httpx.AsyncClient:
+    if args.in_process:
+        from app.main import app
+
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    return httpx.AsyncClient(base_url=args.base_url, timeout=30.0)
+
+
+async def _main(args: argparse.Namespace) -> dict:
+    async with _client(args) as client:
+        return await run_load(client, args.users, args.iterations, args.messages, args.artifact_size)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="drive app.main:app without a server")
+    parser.add_argument("--users", type=int, default=4, help="concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=10, help="flows per user")
+    parser.add_argument("--messages", type=int, default=10, help="messages posted per flow")
+    parser.add_argument("--artifact-size", type=int, default=16 * 1024)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown (0.1 = 10%%)")
+    args = parser.parse_args(argv)
+
+    scenarios = asyncio.run(_main(args))
+    write_results(
+        args.output,
+        scenarios,
+        users=args.users,
+        iterations=args.iterations,
+        messages=args.messages,
+        target="in-process" if args.in_process else args.base_url,
+    )
+    print(format_table(scenarios))
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(scenarios, load_results(args.baseline), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Seed data of a configurable size for benchmarks.
+
+Messages are loaded with the bulk COPY path, so a few hundred thousand rows take
+seconds. Every seeded project slug starts with ``prefix`` so runs can coexist.
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.db.models import Action, Project, Thread
+from app.services import messages as messages_service
+
+WORDS = (
+    "invoice deploy meeting refund schedule contract report budget travel release "
+    "customer ticket outage review payroll vendor quote shipment onboarding renewal"
+).split()
+
+
+@dataclass(frozen=True)
+class SeedSize:
+    projects: int = 2
+    threads_per_project: int = 10
+    messages_per_thread: int = 100
+    actions_per_thread: int = 5
+
+
+@dataclass
+class SeedResult:
+    project_ids: list[UUID] = field(default_factory=list)
+    thread_ids: list[UUID] = field(default_factory=list)
+    messages: int = 0
+
+
+def message_text(index: int) -> str:
+    return " ".join(WORDS[(index * 7 + k * 3) % len(WORDS)] for k in range(12))
+
+
+def build_message_rows(thread_id: UUID, count: int, *, start: datetime | None = None) -> list[dict]:
+    start = start or datetime.now(timezone.utc) - timedelta(days=30)
+    return [
+        messages_service.build_message_row(
+            thread_id,
+            SimpleNamespace(
+                channel="web",
+                role="user" if index % 2 == 0 else "assistant",
+                content=message_text(index),
+                meta={"seq": index},
+                created_at=start + timedelta(seconds=index),
+            ),
+        )
+        for index in range(count)
+    ]
+
+
+def seed_dataset(db: Session, size: SeedSize, *, prefix: str = "bench") -> SeedResult:
+    result = SeedResult()
+    run = uuid.uuid4().hex[:8]
+    for p in range(size.projects):
+        project = Project(slug=f"{prefix}-{run}-{p}", name=f"Benchmark {p}", settings={})
+        db.add(project)
+        db.flush()
+        result.project_ids.append(project.id)
+        for t in range(size.threads_per_project):
+            thread = Thread(project_id=project.id, title=f"Thread {t}", tags={"bench": True})
+            db.add(thread)
+            db.flush()
+            result.thread_ids.append(thread.id)
+            result.messages += messages_service.insert_messages(
+                db, build_message_rows(thread.id, size.messages_per_thread)
+            )
+            for a in range(size.actions_per_thread):
+                db.add(
+                    Action(
+                        thread_id=thread.id,
+                        type="stub.echo",
+                        policy_mode="EXECUTE",
+                        status="DRAFT",
+                        payload={"n": a},
+                        idempotency_key=f"{prefix}-{run}-{thread.id}-{a}",
+                    )
+                )
+        db.commit()
+    return result
@@ -0,0 +1,106 @@
+"""Latency summaries and baseline comparison shared by the benchmark tools.
+
+Result files are JSON objects of the form::
+
+    {"meta": {"commit": "...", ...},
+     "scenarios": {"messages.list": {"count": 200, "throughput": 812.4,
+                                     "p50": 0.0041, "p95": 0.0093, "p99": 0.0151}}}
+
+Latencies are in seconds, throughput in operations per second.
+"""
+
+import json
+import math
+import subprocess
+import time
+from pathlib import Path
+from typing import Any
+
+LATENCY_KEYS = ("p50", "p95", "p99")
+
+
+def percentile(sorted_samples: list[float], fraction: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    # Nearest-rank percentile.
+    return sorted_samples[max(0, math.ceil(fraction * len(sorted_samples)) - 1)]
+
+
+def summarize(samples: list[float], wall_seconds: float) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "throughput": len(ordered) / wall_seconds if wall_seconds > 0 else 0.0,
+        "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+    }
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path: Path, scenarios: dict[str, dict[str, float]], **meta: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "meta": {"commit": current_commit(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), **meta},
+        "scenarios": scenarios,
+    }
+    path.write_text(json.dumps(document, indent=2, sort_keys=True) + "\n")
+
+
+def load_results(path: Path) -> dict[str, dict[str, float]]:
+    """Scenarios of a result file; pytest-benchmark ``--benchmark-json`` files are accepted too."""
+    document = json.loads(path.read_text())
+    if "scenarios" in document:
+        return document["scenarios"]
+    scenarios = {}
+    for bench in document.get("benchmarks", []):
+        stats = bench["stats"]
+        scenarios[bench["name"]] = {
+            "count": stats["rounds"],
+            "throughput": stats["ops"],
+            "mean": stats["mean"],
+            "p50": stats["median"],
+        }
+    return scenarios
+
+
+def compare(
+    current: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    """Regressions of ``current`` against ``baseline`` beyond ``tolerance`` (0.1 = 10%)."""
+    regressions = []
+    for name, stats in sorted(current.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key in LATENCY_KEYS:
+            if key in stats and base.get(key) and stats[key] > base[key] * (1 + tolerance):
+                regressions.append(
+                    f"{name} {key}: {stats[key] * 1000:.2f}ms vs {base[key] * 1000:.2f}ms"
+                )
+        if base.get("throughput") and stats.get("throughput", 0) < base["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{name} throughput: {stats['throughput']:.1f}/s vs {base['throughput']:.1f}/s"
+            )
+    return regressions
+
+
+def format_table(scenarios: dict[str, dict[str, float]]) -> str:
+    lines = [f"{'scenario':<24}{'count':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+    for name, stats in sorted(scenarios.items()):
+        lines.append(
+            f"{name:<24}{stats['count']:>8}{stats['throughput']:>10.1f}"
+            + "".join(f"{stats.get(key, 0.0) * 1000:>10.2f}" for key in LATENCY_KEYS)
+        )
+    return "\n".join(lines)